@@ -25,13 +25,19 @@ class BagMail(common_models.Mail):
         self.sender = common_models.Mail.SET_BAGS
         super().save(*args, **kwargs)
 
-    def send_mail_company(self, company):
-        context = {
+    @staticmethod
+    def company_context(company):
+        return {
             "firma": company.name,
             "anrede": company.anrede,
             "formale_anrede": company.formale_anrede,
         }
-        return self.send_mail(context, company.email)
+
+    def send_mail_company(self, company):
+        return self.send_mail(self.company_context(company), company.email)
+
+    def send_mass_companies(self, companies):
+        return self.send_mass((self.company_context(company), company.email) for company in companies)
 
     def get_mail_company(self):
         context = {
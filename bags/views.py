@@ -8,17 +8,19 @@ from django import forms
 from django.contrib import messages
 from django.contrib.auth.decorators import permission_required, user_passes_test
 from django.core.handlers.wsgi import WSGIRequest
-from django.db.models import Q, QuerySet
+from django.db.models import F, Max, Prefetch, Q, QuerySet
 from django.db.models.aggregates import Count
 from django.forms import formset_factory
-from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.template.loader import render_to_string
 from django.urls import reverse_lazy
 from django.utils.translation import gettext as _
 
 from settool_common import utils
-from settool_common.models import get_semester, Semester
+from settool_common.db import reporting_database
+from settool_common.forms import SelectionFormSet
+from settool_common.models import request_semester, Selection, Semester
 from settool_common.utils import get_or_none
 
 from .forms import (
@@ -63,50 +65,28 @@ def get_possibly_filtered_companies(filter_form, semester):
             companies = companies.filter(giveaway__isnull=True)
         if filter_form.cleaned_data["arrived"]:
             companies = companies.filter(giveaway__arrived=True)
-    return companies.order_by("name").all()
+    return companies.order_by("name").prefetch_related(
+        Prefetch("giveaway_set", queryset=Giveaway.objects.select_related("group")),
+    )
 
 
 @permission_required("bags.view_companies")
 def list_companys(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     filterform = FilterCompaniesForm(request.POST or None)
     companies = get_possibly_filtered_companies(filterform, semester)
 
     mailform = SelectMailForm(request.POST if "mailform" in request.POST else None)
-    select_company_form_set = formset_factory(SelectCompanyForm, extra=0)
-    companyforms = select_company_form_set(
-        request.POST if "mailform" in request.POST else None,
-        initial=[{"id": c.id, "selected": True} for c in companies],
-    )
+    select_company_form_set = formset_factory(SelectCompanyForm, formset=SelectionFormSet, extra=0)
+    companyforms = select_company_form_set(request.POST if "mailform" in request.POST else None, rows=companies)
 
     if "mailform" in request.POST and mailform.is_valid() and companyforms.is_valid():
         mail = mailform.cleaned_data["mail"]
-
-        selected_companies = []
-        for company in companyforms:
-            try:
-                company_id = company.cleaned_data["id"]
-            except KeyError:
-                continue
-            try:
-                selected = company.cleaned_data["selected"]
-            except KeyError:
-                selected = False
-            if selected:
-                selected_companies.append(company_id)
-
-        request.session["selected_companies"] = selected_companies
-        return redirect("bags:send_mail", mail.id)
-
-    companies_and_select = []
-    for company in companies:
-        for company_form in companyforms:
-            if company_form.initial["id"] == company.id:
-                companies_and_select.append((company, company_form))
-                break
+        selection = Selection.store(request, Selection.BAGS_MAIL, companyforms.selected_ids())
+        return redirect(selection.url("bags:send_mail", mail.id))
 
     context = {
-        "companies_and_select": companies_and_select,
+        "companies_and_select": companyforms.rows_and_forms(),
         "filterform": filterform,
         "mailform": mailform,
         "companyforms": companyforms,
@@ -116,7 +96,7 @@ def list_companys(request: WSGIRequest) -> HttpResponse:
 
 @permission_required("bags.view_companies")
 def add_company(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
 
     form = CompanyForm(request.POST or None, semester=semester)
     if form.is_valid():
@@ -264,19 +244,19 @@ def delete_mail(request: WSGIRequest, mail_pk: int) -> HttpResponse:
 @permission_required("bags.view_companies")
 def send_mail(request: WSGIRequest, mail_pk: int) -> HttpResponse:
     mail = get_object_or_404(BagMail, pk=mail_pk)
-    selected_companies = request.session["selected_companies"]
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    selection = Selection.from_request(request, Selection.BAGS_MAIL)
+    semester: Semester = request_semester(request)
     companies = semester.company_set.filter(
-        id__in=selected_companies,
+        id__in=selection.id_list,
     ).order_by("name")
 
     subject, text, from_email = mail.get_mail_company()
 
     form = forms.Form(request.POST or None)
     if form.is_valid():
-        company: Company
-        for company in companies:
-            company.email_sent_success = mail.send_mail_company(company)
+        companies_list: list[Company] = list(companies)
+        for company, success in zip(companies_list, mail.send_mass_companies(companies_list)):
+            company.email_sent_success = success
             company.email_sent = True
             company.save()
         return redirect("bags:main_index")
@@ -325,7 +305,7 @@ def import_company_csv_to_db(csv_file, semester):
 @user_passes_test(lambda user: user.is_staff)
 @permission_required("bags.view_companies")
 def import_csv(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     file_upload_form = CSVFileUploadForm(request.POST or None, request.FILES)
     if file_upload_form.is_valid():
         import_company_csv_to_db(request.FILES["file"], semester)
@@ -341,7 +321,7 @@ def import_csv(request: WSGIRequest) -> HttpResponse:
 @permission_required("bags.view_companies")
 @user_passes_test(lambda user: user.is_staff)
 def import_previous_semester(request: WSGIRequest) -> HttpResponse:
-    new_semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    new_semester: Semester = request_semester(request)
 
     form = ImportForm(request.POST or None, semester=new_semester)
     if form.is_valid():
@@ -381,8 +361,9 @@ def import_previous_semester(request: WSGIRequest) -> HttpResponse:
 
 
 @permission_required("bags.view_companies")
-def export_csv(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+@reporting_database()
+def export_csv(request: WSGIRequest) -> StreamingHttpResponse:
+    semester: Semester = request_semester(request)
     companies = semester.company_set.order_by("name")
     return utils.download_csv(
         [
@@ -404,8 +385,9 @@ def export_csv(request: WSGIRequest) -> HttpResponse:
 
 
 @permission_required("bags.view_companies")
+@reporting_database()
 def dashboard(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
 
     companies: QuerySet[Company] = Company.objects.filter(semester=semester)
     g_companies: QuerySet[Company] = companies.filter(giveaway__isnull=False)
@@ -421,14 +403,20 @@ def dashboard(request: WSGIRequest) -> HttpResponse:
 
     g_by_item_count_labels: list[str] = []
     g_by_item_count_data: list[int] = []
-    g_item_count_max = giveaways.order_by("-item_count").first()
-    g_item_count_min = giveaways.order_by("item_count").first()
-    if g_item_count_max and g_item_count_min:  # do giveaways exist?
-        item_count_max_range = math.ceil(g_item_count_max.item_count / 100) * 100
-        item_count_min_range = math.floor(g_item_count_min.item_count / 100) * 100
+    # item_count is an integer, thus the division truncates to the bucket of 100 items
+    giveaways_per_bucket: dict[int, int] = dict(
+        giveaways.annotate(bucket=F("item_count") / 100)
+        .values_list("bucket")
+        .annotate(bucket_count=Count("id"))
+        .order_by(),
+    )
+    if giveaways_per_bucket:  # do giveaways exist?
+        item_count_max = giveaways.aggregate(item_count_max=Max("item_count"))["item_count_max"]
+        item_count_max_range = math.ceil(item_count_max / 100) * 100
+        item_count_min_range = min(giveaways_per_bucket) * 100
         for i in range(item_count_min_range, item_count_max_range, 100):
             g_by_item_count_labels.append(f"{i} - {i + 99}")
-            g_by_item_count_data.append(giveaways.filter(item_count__gte=i, item_count__lte=i + 99).count())
+            g_by_item_count_data.append(giveaways_per_bucket.get(i // 100, 0))
     context = {
         "c_by_giveaway_data": [
             companies.filter(giveaway__isnull=False).count(),
@@ -485,7 +473,7 @@ def dashboard(request: WSGIRequest) -> HttpResponse:
 
 @permission_required("bags.view_companies")
 def list_grouped_giveaways(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     context = {
         "giveaway_groups": [
             (ggroup, ggroup.giveaway_set.filter(company__semester=semester).all())
@@ -498,7 +486,7 @@ def list_grouped_giveaways(request: WSGIRequest) -> HttpResponse:
 
 @permission_required("bags.view_companies")
 def list_giveaway_distribution(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     context = {
         "giveaway_groups": [
             (ggroup, ggroup.giveaway_set.filter(company__semester=semester).all())
@@ -515,46 +503,30 @@ def list_giveaway_distribution(request: WSGIRequest) -> HttpResponse:
 
 @permission_required("bags.view_companies")
 def list_giveaways_arrivals(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     giveaways: list[Giveaway] = list(Giveaway.objects.filter(company__semester=semester).all())
 
-    select_giveaway_form_set = formset_factory(SelectGiveawaySwitchForm, extra=0)
+    select_giveaway_form_set = formset_factory(SelectGiveawaySwitchForm, formset=SelectionFormSet, extra=0)
     giveawayforms = select_giveaway_form_set(
         request.POST or None,
-        initial=[{"id": g.id, "selected": g.arrived} for g in giveaways],
+        rows=giveaways,
+        selected=lambda giveaway: giveaway.arrived,
     )
 
     if giveawayforms.is_valid():
-        new_arrived_giveaways: list[int] = []
-        new_unarrived_giveaways: list[int] = []
-        for giveaway in giveawayforms:
-            try:
-                giveaway_id = giveaway.cleaned_data["id"]
-            except KeyError:
-                continue
-            try:
-                selected = giveaway.cleaned_data["selected"]
-            except KeyError:
-                selected = False
-            if selected:
-                if Giveaway.objects.filter(id=giveaway_id, arrived=False).exists():
-                    new_arrived_giveaways.append(giveaway_id)
-            else:
-                if Giveaway.objects.filter(id=giveaway_id, arrived=True).exists():
-                    new_unarrived_giveaways.append(giveaway_id)
+        # the submitted state is compared to the state, which was loaded above
+        new_arrived_giveaways, new_unarrived_giveaways = giveawayforms.changed_ids()
         if new_arrived_giveaways or new_unarrived_giveaways:
-            request.session["new_arrived_giveaways"] = new_arrived_giveaways
-            request.session["new_unarrived_giveaways"] = new_unarrived_giveaways
-            return redirect("bags:confirm_giveaways_arrivals")
-
-    giveaways_and_select = []
-    for giveaway in giveaways:
-        for giveaway_form in giveawayforms:
-            if giveaway_form.initial["id"] == giveaway.id:
-                giveaways_and_select.append((giveaway, giveaway_form))
-                break
+            selection = Selection.store(
+                request,
+                Selection.BAGS_ARRIVALS,
+                new_arrived_giveaways,
+                deselected_ids=new_unarrived_giveaways,
+            )
+            return redirect(selection.url("bags:confirm_giveaways_arrivals"))
+
     context = {
-        "giveaways_and_select": giveaways_and_select,
+        "giveaways_and_select": giveawayforms.rows_and_forms(),
         "giveawayforms": giveawayforms,
     }
     return render(request, "bags/giveaways/giveaway/list/arrival/list_giveaways_arrivals.html", context)
@@ -562,12 +534,11 @@ def list_giveaways_arrivals(request: WSGIRequest) -> HttpResponse:
 
 @permission_required("bags.view_companies")
 def confirm_giveaways_arrivals(request: WSGIRequest) -> HttpResponse:
-    new_arrived_giveaways: list[Giveaway] = [
-        Giveaway.objects.get(id=part_id) for part_id in request.session["new_arrived_giveaways"]
-    ]
-    new_unarrived_giveaways: list[Giveaway] = [
-        Giveaway.objects.get(id=part_id) for part_id in request.session["new_unarrived_giveaways"]
-    ]
+    selection = Selection.from_request(request, Selection.BAGS_ARRIVALS)
+    semester: Semester = request_semester(request)
+    giveaways = Giveaway.objects.filter(company__semester=semester)
+    new_arrived_giveaways: list[Giveaway] = list(giveaways.filter(id__in=selection.id_list))
+    new_unarrived_giveaways: list[Giveaway] = list(giveaways.filter(id__in=selection.deselected_id_list))
     form = forms.Form(request.POST or None)
     if form.is_valid():
         for new_arrived_giveaway in new_arrived_giveaways:
@@ -576,6 +547,7 @@ def confirm_giveaways_arrivals(request: WSGIRequest) -> HttpResponse:
         for new_unarrived_giveaway in new_unarrived_giveaways:
             new_unarrived_giveaway.arrived = False
             new_unarrived_giveaway.save()
+        selection.delete()
         messages.success(request, _("Saved changed arrival status"))
         return redirect("bags:list_giveaways_arrivals")
 
@@ -589,7 +561,7 @@ def confirm_giveaways_arrivals(request: WSGIRequest) -> HttpResponse:
 
 @permission_required("bags.view_companies")
 def add_giveaway(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     form = GiveawayForm(request.POST or None, semester=semester)
     if form.is_valid():
         form.save()
@@ -611,7 +583,7 @@ def add_giveaway(request: WSGIRequest) -> HttpResponse:
 
 @permission_required("bags.view_companies")
 def add_giveaway_for_company(request: WSGIRequest, company_pk: int) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     company: Company = get_object_or_404(Company, id=company_pk)
     form = GiveawayForCompanyForm(request.POST or None, semester=semester, company=company)
     if form.is_valid():
@@ -642,7 +614,7 @@ class GiveawayCreateView(BSModalCreateView):
 
 @permission_required("bags.view_companies")
 def edit_giveaway(request: WSGIRequest, giveaway_pk: int) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     giveaway: Giveaway = get_object_or_404(Giveaway, id=giveaway_pk)
 
     form = GiveawayEditForm(request.POST or None, instance=giveaway, semester=semester)
@@ -667,7 +639,7 @@ class GiveawayDistributionUpdateView(BSModalUpdateView):
 
 @permission_required("bags.view_companies")
 def giveaway_data_ungrouped(request):
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     if request.method == "GET":
         ungrouped_giveaways = Giveaway.objects.filter(Q(group=None) & Q(company__semester=semester))
         data = {
@@ -683,7 +655,7 @@ def giveaway_data_ungrouped(request):
 
 @permission_required("bags.view_companies")
 def giveaway_data_grouped(request):
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     if request.method == "GET":
         giveaway_groups = [
             (ggroup, ggroup.giveaway_set.filter(company__semester=semester).all())
@@ -702,7 +674,7 @@ def giveaway_data_grouped(request):
 
 @permission_required("bags.view_companies")
 def giveaway_data_condensed_grouped(request):
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     if request.method == "GET":
         giveaway_groups = [
             (ggroup, ggroup.giveaway_set.filter(company__semester=semester).all())
@@ -746,7 +718,7 @@ def del_giveaway(request: WSGIRequest, giveaway_pk: int) -> HttpResponse:
 
 @permission_required("bags.view_companies")
 def add_giveaway_group(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     form = GiveawayGroupForm(request.POST or None, semester=semester)
     if form.is_valid():
         form.save()
@@ -760,7 +732,7 @@ def add_giveaway_group(request: WSGIRequest) -> HttpResponse:
 
 @permission_required("bags.view_companies")
 def add_giveaway_to_giveaway_group(request: WSGIRequest, giveaway_group_pk: int) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     giveaway_group: GiveawayGroup = get_object_or_404(GiveawayGroup, id=giveaway_group_pk)
     form = GiveawayToGiveawayGroupForm(request.POST or None, semester=semester, giveaway_group=giveaway_group)
     if form.is_valid():
@@ -778,7 +750,7 @@ def add_giveaway_to_giveaway_group(request: WSGIRequest, giveaway_group_pk: int)
 
 @permission_required("bags.view_companies")
 def edit_giveaway_group(request: WSGIRequest, giveaway_group_pk: int) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     giveaway_group: GiveawayGroup = get_object_or_404(GiveawayGroup, id=giveaway_group_pk)
 
     form = GiveawayGroupForm(request.POST or None, instance=giveaway_group, semester=semester)
@@ -811,7 +783,7 @@ def del_giveaway_group(request: WSGIRequest, giveaway_group_pk: int) -> HttpResp
 
 @permission_required("bags.view_companies")
 def list_giveaway_group(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     context = {
         "giveaway_groups": semester.giveawaygroup_set.all(),
     }
@@ -820,7 +792,7 @@ def list_giveaway_group(request: WSGIRequest) -> HttpResponse:
 
 @permission_required("bags.view_companies")
 def settings(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
 
     setting: BagSettings = BagSettings.objects.get_or_create(
         semester=semester,
@@ -1,4 +1,6 @@
 from datetime import date
+from typing import Any
+from uuid import UUID
 
 from bootstrap_datepicker_plus.widgets import DatePickerInput, DateTimePickerInput
 from django import forms
@@ -220,7 +222,7 @@ class FilterRegisteredParticipantsForm(SemesterBasedForm):
             .distinct()
             .values_list("subject", flat=True)
         )
-        return Subject.objects.filter(pk__in=choosable_subjects_ids).order_by("subject")
+        return Subject.objects.filter(pk__in=choosable_subjects_ids).select_related("course_bundle").order_by("subject")
 
 
 class FilterParticipantsForm(forms.Form):
@@ -246,7 +248,7 @@ class FilterParticipantsForm(forms.Form):
 
 
 class SelectParticipantForm(forms.Form):
-    id = forms.IntegerField()
+    id = forms.UUIDField()
     selected = forms.BooleanField(
         widget=forms.widgets.CheckboxInput(attrs={"class": "selectTarget"}),
         required=False,
@@ -254,7 +256,7 @@ class SelectParticipantForm(forms.Form):
 
 
 class SelectParticipantSwitchForm(forms.Form):
-    id = forms.IntegerField()
+    id = forms.UUIDField()
     selected = forms.BooleanField(
         widget=forms.widgets.CheckboxInput(
             attrs={
@@ -280,6 +282,20 @@ class ParticipantSelectForm(SemesterBasedForm):
         self.fields["selected"].queryset = Participant.objects.filter(semester=self.semester, status="confirmed").all()
 
 
+class ParticipantIdSelectForm(forms.Form):
+    """
+    selects a participant by its id. The choices are passed in and validated without a query,
+    so a formset of these forms loads the participants only once.
+    """
+
+    # the initial value is already an UUID
+    selected = forms.TypedChoiceField(coerce=lambda value: UUID(str(value)), empty_value=None, required=False)
+
+    def __init__(self, *args, choices: list[tuple[Any, str]], **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["selected"].choices = choices
+
+
 class CSVFileUploadForm(forms.Form):
     file = forms.FileField(
         allow_empty_file=False,
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from fahrt.models import Fahrt, Participant
+from fahrt.non_liability import merge_non_liability_forms, zip_non_liability_forms
+from settool_common.models import current_semester
+
+
+class Command(BaseCommand):
+    help = "Exports the non-liability forms of the selected participants as one PDF or as a ZIP of PDFs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="file to write the export to")
+        parser.add_argument("--semester", type=int, help="pk of the semester (default: the current semester)")
+        parser.add_argument(
+            "--status",
+            default=Participant.STATUS_CONFIRMED,
+            choices=[
+                Participant.STATUS_REGISTERED,
+                Participant.STATUS_CONFIRMED,
+                Participant.STATUS_WAITINGLIST,
+                Participant.STATUS_CANCELED,
+            ],
+        )
+        parser.add_argument(
+            "--missing",
+            action="store_true",
+            help="only participants, who have not submitted their non-liability form",
+        )
+        parser.add_argument("--format", choices=["pdf", "zip"], default="pdf")
+
+    def handle(self, *args, **options):
+        semester_pk = options["semester"] or current_semester().pk
+        try:
+            fahrt = Fahrt.objects.get(semester_id=semester_pk)
+        except Fahrt.DoesNotExist as error:
+            raise CommandError(f"There is no Fahrt in the semester {semester_pk}") from error
+        participants = Participant.objects.filter(semester_id=semester_pk, status=options["status"])
+        if options["missing"]:
+            participants = participants.filter(non_liability__isnull=True)
+        participants = participants.select_related("semester__fahrt").order_by("surname", "firstname")
+        if not participants.exists():
+            raise CommandError("There are no participants matching the selection")
+
+        if options["format"] == "zip":
+            export = zip_non_liability_forms(fahrt, participants)
+        else:
+            export = merge_non_liability_forms(fahrt, participants)
+        with open(options["output"], "wb") as file:
+            file.write(export)
+        self.stdout.write(f"exported the forms of {participants.count()} participants to {options['output']}")
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from fahrt.models import Participant
+
+
+class Command(BaseCommand):
+    help = "Generates the non-liability forms of new participants and sends them their registration mail."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running and poll for new participants instead of exiting",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Seconds to wait between polls if --loop is given",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent = Participant.send_pending_registration_mails()
+            if sent:
+                self.stdout.write(f"sent {sent} registration mails")
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,147 @@
+"""
+Matching of bank-transactions (see parser.py) to the participants, who paid with them.
+
+Participants are asked to put their UUID into the purpose of the transfer. Banks insert spaces and line breaks into
+long purposes and some payers change the case or drop the hyphens. Thus the purpose is normalised to its hexadecimal
+digits and every run of 32 digits is looked up in the set of UUIDs of the participants.
+
+Transactions without UUID are matched by the name of the payer: every token of the payer is looked up in an index of
+the name-tokens of the participants and the candidates are ranked by the similarity of their name. A unique candidate
+with a less similar name (e.g. parents paying for their child) is accepted, if the usual amount was transferred.
+These matches are only suggestions, which have to be confirmed.
+"""
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal
+from difflib import SequenceMatcher
+from typing import Iterable, Optional
+from uuid import UUID
+
+from django.utils.translation import gettext_lazy as _
+
+from .parser import Entry
+
+# a UUID written without hyphens. Lookahead, so that overlapping candidates are found as well
+UUID_CANDIDATE_REGEX = re.compile(r"(?=([0-9a-f]{32}))")
+NON_HEX_REGEX = re.compile(r"[^0-9a-f]")
+NAME_TOKEN_REGEX = re.compile(r"[a-z]+")
+TRANSLITERATIONS = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss"})
+# minimal similarity of the names (between 0 and 1) to suggest a participant
+NAME_SIMILARITY_THRESHOLD = 0.8
+
+
+def uuid_candidates(purpose: str) -> set[str]:
+    """all hexadecimal representations of UUIDs, which could be contained in the purpose of a transaction"""
+    hex_digits = NON_HEX_REGEX.sub("", purpose.lower())
+    return set(UUID_CANDIDATE_REGEX.findall(hex_digits))
+
+
+def name_tokens(name: str) -> tuple[str, ...]:
+    """the normalised words of a name. Case, umlauts, accents and punctuation are ignored"""
+    name = name.casefold().translate(TRANSLITERATIONS)
+    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    return tuple(token for token in NAME_TOKEN_REGEX.findall(name) if len(token) > 1)
+
+
+def _name_similarity(tokens: tuple[str, ...], other_tokens: tuple[str, ...]) -> float:
+    # the order of first name and surname differs between banks
+    return SequenceMatcher(None, " ".join(sorted(tokens)), " ".join(sorted(other_tokens))).ratio()
+
+
+@dataclass
+class MatchResult:
+    matched: list[tuple[UUID, Entry]] = field(default_factory=list)
+    # transactions without UUID and the participant suggested by the name of the payer (if any)
+    unmatched: list[tuple[Entry, Optional[UUID]]] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)
+
+
+class TransactionMatcher:
+    """
+    matches transactions to participants.
+    participants are (id, firstname, surname, paid) of the participants, which could have paid.
+    """
+
+    def __init__(self, participants: Iterable[tuple[UUID, str, str, bool]]) -> None:
+        self.participants_by_hex: dict[str, UUID] = {}
+        self.names: dict[UUID, tuple[str, ...]] = {}
+        self.name_index: dict[str, set[UUID]] = defaultdict(set)
+        for participant_id, firstname, surname, paid in participants:
+            self.participants_by_hex[participant_id.hex] = participant_id
+            if paid:
+                # a participant, who already paid, is not suggested
+                continue
+            tokens = name_tokens(f"{firstname} {surname}")
+            self.names[participant_id] = tokens
+            for token in tokens:
+                self.name_index[token].add(participant_id)
+
+    def match_uuids(self, transaction: Entry) -> list[UUID]:
+        return sorted(
+            self.participants_by_hex[candidate]
+            for candidate in uuid_candidates(transaction.verwendungszweck)
+            if candidate in self.participants_by_hex
+        )
+
+    def suggest(self, transaction: Entry, usual_amount: Optional[Decimal], excluded: set[UUID]) -> Optional[UUID]:
+        """the participant, whose name is the most similar to the name of the payer (if unambiguous)"""
+        payer = name_tokens(transaction.zahlungspflichtiger)
+        candidates = {candidate for token in payer for candidate in self.name_index.get(token, ())} - excluded
+        if not candidates:
+            return None
+        ranked = sorted(
+            ((_name_similarity(payer, self.names[candidate]), candidate) for candidate in candidates),
+            reverse=True,
+        )
+        best_similarity, best = ranked[0]
+        if len(ranked) > 1 and ranked[1][0] == best_similarity:
+            return None
+        amount_matches = Decimal(transaction.betrag) == usual_amount
+        if best_similarity >= NAME_SIMILARITY_THRESHOLD or (len(ranked) == 1 and amount_matches):
+            return best
+        return None
+
+    def match(self, transactions: Iterable[Entry]) -> MatchResult:
+        result = MatchResult()
+        matches_by_participant: dict[UUID, list[Entry]] = defaultdict(list)
+        without_uuid: list[Entry] = []
+        for transaction in transactions:
+            matches = self.match_uuids(transaction)
+            if not matches:
+                without_uuid.append(transaction)
+                continue
+            for match in matches:
+                result.matched.append((match, transaction))
+                matches_by_participant[match].append(transaction)
+            # Transaction:Person = 1:1
+            if len(matches) > 1:
+                result.errors.append(
+                    _("Transaction {transaction} contains multiple UUIDs (matches). This is not allowed.").format(
+                        transaction=repr(transaction),
+                        matches=matches,
+                    ),
+                )
+        # Transaction:Person = 1:1
+        for p_uuid, transaction_list in matches_by_participant.items():
+            if len(transaction_list) >= 2:
+                result.errors.append(
+                    _(
+                        "UUIDs {p_uuid} is contained in multiple Transactions {transaction_list}. This is not allowed.",
+                    ).format(
+                        p_uuid=p_uuid,
+                        transaction_list=transaction_list,
+                    ),
+                )
+
+        # the fee of the Fahrt is not stored, but most participants transfer exactly it
+        amounts = Counter(Decimal(transaction.betrag) for _p_uuid, transaction in result.matched)
+        usual_amount = amounts.most_common(1)[0][0] if amounts else None
+        suggested: set[UUID] = set(matches_by_participant)
+        for transaction in without_uuid:
+            suggestion = self.suggest(transaction, usual_amount, suggested)
+            if suggestion is not None:
+                suggested.add(suggestion)
+            result.unmatched.append((transaction, suggestion))
+        return result
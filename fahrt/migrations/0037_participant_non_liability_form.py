@@ -0,0 +1,28 @@
+# Generated by Django 4.1.13 on 2026-10-18 14:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("fahrt", "0036_alter_participant_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="participant",
+            name="non_liability_form",
+            field=models.FileField(blank=True, editable=False, upload_to="fahrt/non_liability"),
+        ),
+        migrations.AddField(
+            model_name="participant",
+            name="non_liability_form_hash",
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="participant",
+            name="registration_mail_pending",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
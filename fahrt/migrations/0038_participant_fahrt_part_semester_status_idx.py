@@ -0,0 +1,17 @@
+# Generated by Django 4.1.13 on 2026-10-18 14:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("fahrt", "0037_participant_non_liability_form"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="participant",
+            index=models.Index(fields=["semester", "status"], name="fahrt_part_semester_status_idx"),
+        ),
+    ]
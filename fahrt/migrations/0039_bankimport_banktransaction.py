@@ -0,0 +1,85 @@
+# Generated by Django 4.1.13 on 2026-10-18 14:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("fahrt", "0038_participant_fahrt_part_semester_status_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BankImport",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("filename", models.CharField(max_length=200, verbose_name="File")),
+                ("fahrt", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="fahrt.fahrt")),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="BankTransaction",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("date", models.DateField(verbose_name="Buchungstag")),
+                ("purpose", models.TextField(verbose_name="Verwendungszweck")),
+                ("purpose_hash", models.CharField(editable=False, max_length=64)),
+                ("payer", models.CharField(max_length=200, verbose_name="Beguenstigter/Zahlungspflichtiger")),
+                ("iban", models.CharField(max_length=34, verbose_name="Kontonummer/IBAN")),
+                ("bic", models.CharField(max_length=11, verbose_name="BIC (SWIFT-Code)")),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=10, verbose_name="Betrag")),
+                (
+                    "bank_import",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="transactions", to="fahrt.bankimport"
+                    ),
+                ),
+                (
+                    "participant",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="fahrt.participant",
+                    ),
+                ),
+                (
+                    "suggestion",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="fahrt.participant",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["date", "id"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="banktransaction",
+            constraint=models.UniqueConstraint(
+                fields=("date", "iban", "amount", "purpose_hash"), name="fahrt_banktransaction_unique"
+            ),
+        ),
+    ]
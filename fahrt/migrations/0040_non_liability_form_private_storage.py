@@ -0,0 +1,36 @@
+# Generated by Django 4.1.13 on 2026-10-18 15:10
+
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+import settool_common.utils
+
+
+def delete_public_non_liability_forms(apps, schema_editor):
+    """the forms were stored in MEDIA_ROOT, which is served publicly. They are regenerated on demand"""
+    _ = schema_editor
+    participant_model = apps.get_model("fahrt", "Participant")
+    for name in participant_model.objects.exclude(non_liability_form="").values_list("non_liability_form", flat=True):
+        default_storage.delete(name)
+    participant_model.objects.exclude(non_liability_form="").update(non_liability_form="", non_liability_form_hash="")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("fahrt", "0039_bankimport_banktransaction"),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_public_non_liability_forms, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="participant",
+            name="non_liability_form",
+            field=models.FileField(
+                blank=True,
+                editable=False,
+                storage=settool_common.utils.PrivateStorage(),
+                upload_to="fahrt/non_liability",
+            ),
+        ),
+    ]
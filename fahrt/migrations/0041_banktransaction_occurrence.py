@@ -0,0 +1,28 @@
+# Generated by Django 4.1.13 on 2026-10-18 15:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("fahrt", "0040_non_liability_form_private_storage"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="banktransaction",
+            name="fahrt_banktransaction_unique",
+        ),
+        migrations.AddField(
+            model_name="banktransaction",
+            name="occurrence",
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddConstraint(
+            model_name="banktransaction",
+            constraint=models.UniqueConstraint(
+                fields=("date", "iban", "amount", "purpose_hash", "occurrence"), name="fahrt_banktransaction_unique"
+            ),
+        ),
+    ]
@@ -1,19 +1,38 @@
 import datetime
+import hashlib
+import itertools
+import logging
+import os
+import re
+from collections import Counter
+from decimal import Decimal
+from typing import Any, Iterable, Iterator, Optional
 
 from dateutil.relativedelta import relativedelta
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.core.files.base import ContentFile
+from django.db import models, transaction
+from django.db.models.functions import ExtractDay, ExtractMonth, ExtractYear
+from django.dispatch import receiver
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
+from django_tex.core import render_template_with_context
 from django_tex.response import PDFResponse
-from django_tex.shortcuts import render_to_pdf
 
 import settool_common.models as common_models
 from settool_common.models import Semester, Subject
+from settool_common.tex import compile_source_to_pdf
+from settool_common.utils import PrivateStorage
+
+from .matching import TransactionMatcher
+from .parser import Entry
 
 ANNONIMISATION_GRACEPERIOD_AFTER_FAHRT = relativedelta(weeks=6)
+# name-option of \TextField, \CheckBox, ... in the non-liability forms
+FORM_FIELD_NAME_REGEX = re.compile(r"(?<=[\[,])\s*name\s*=\s*\{?\s*")
 
 
 class FahrtMail(common_models.Mail):
@@ -38,21 +57,24 @@ class FahrtMail(common_models.Mail):
         self.sender = common_models.Mail.SET_FAHRT
         super().save(*args, **kwargs)
 
-    def send_mail_participant(self, participant: "Participant") -> bool:
-        context = {
+    @staticmethod
+    def participant_context(participant: "Participant") -> dict[str, Any]:
+        return {
             "vorname": participant.firstname,
             "frist": participant.payment_deadline,
             "participant": participant,
         }
-        return self.send_mail(context, participant.email)
+
+    def send_mail_participant(self, participant: "Participant") -> bool:
+        return self.send_mail(self.participant_context(participant), participant.email)
+
+    def send_mass_participants(self, participants: Iterable["Participant"]) -> list[bool]:
+        return self.send_mass(
+            (self.participant_context(participant), participant.email) for participant in participants
+        )
 
     def send_mail_registration(self, participant: "Participant", non_liability: HttpResponse) -> bool:
-        context = {
-            "vorname": participant.firstname,
-            "frist": participant.payment_deadline,
-            "participant": participant,
-        }
-        return self.send_mail(context, participant.email, attachments=[non_liability])
+        return self.send_mail(self.participant_context(participant), participant.email, attachments=[non_liability])
 
     def get_mail_participant(self) -> tuple[str, str, str]:
         context = {
@@ -117,6 +139,14 @@ class Fahrt(common_models.LoggedModelBase):
         return self.open_registration < timezone.now() < self.close_registration
 
 
+@receiver(models.signals.post_save, sender=Fahrt)
+@receiver(models.signals.post_delete, sender=Fahrt)
+def invalidate_semester_cache_on_fahrt_change(sender, **_kwargs):
+    """the semesters handed out by the semester_cache must not know an outdated semester.fahrt"""
+    _ = sender  # sender is needed, for api. it cannot be renamed, but is unused here.
+    common_models.semester_cache.invalidate()
+
+
 class Transportation(common_models.LoggedModelBase):
     CAR = 0
     TRAIN = 1
@@ -164,6 +194,24 @@ class Transportation(common_models.LoggedModelBase):
         return _("Car ({free_places} free)").format(free_places=free_places)
 
 
+class ParticipantQuerySet(models.QuerySet):
+    def with_age_at_fahrt(self) -> "ParticipantQuerySet":
+        """annotates age_at_fahrt (the age in years at the date of the Fahrt), computed in the database"""
+        fahrt_date = "semester__fahrt__date"
+        birthday_not_reached = models.Q(**{f"{fahrt_date}__month__lt": ExtractMonth("birthday")}) | models.Q(
+            **{f"{fahrt_date}__month": ExtractMonth("birthday"), f"{fahrt_date}__day__lt": ExtractDay("birthday")},
+        )
+        return self.annotate(
+            age_at_fahrt=ExtractYear(fahrt_date)
+            - ExtractYear("birthday")
+            - models.Case(models.When(birthday_not_reached, then=1), default=0),
+        )
+
+
+# filter of the participants, which are under 18 at the date of the Fahrt. Requires with_age_at_fahrt()
+U18 = models.Q(age_at_fahrt__lt=18)
+
+
 class Participant(common_models.UUIDModelBase, common_models.LoggedModelBase, common_models.SemesterModelBase):
     class Meta:
         permissions = (
@@ -172,6 +220,9 @@ class Participant(common_models.UUIDModelBase, common_models.LoggedModelBase, co
                 "Can view and edit the list of participants",
             ),
         )
+        indexes = [models.Index(fields=["semester", "status"], name="fahrt_part_semester_status_idx")]
+
+    objects = ParticipantQuerySet.as_manager()
 
     registration_time = models.DateTimeField(_("Registration time"), auto_now_add=True)
 
@@ -231,6 +282,16 @@ class Participant(common_models.UUIDModelBase, common_models.LoggedModelBase, co
 
     comment = models.CharField(_("Comment"), max_length=400, blank=True)
 
+    # generated in the background after the signup (see send_pending_registration_mails)
+    registration_mail_pending = models.BooleanField(default=False, editable=False)
+    non_liability_form = models.FileField(
+        upload_to="fahrt/non_liability",
+        storage=PrivateStorage(),
+        blank=True,
+        editable=False,
+    )
+    non_liability_form_hash = models.CharField(max_length=64, blank=True, editable=False)
+
     def __str__(self) -> str:
         return f"{self.firstname} {self.surname}"
 
@@ -241,9 +302,24 @@ class Participant(common_models.UUIDModelBase, common_models.LoggedModelBase, co
             text=text,
         )
 
+    @property
+    def age_at_fahrt(self) -> Optional[int]:
+        """the age in years at the date of the Fahrt. ParticipantQuerySet.with_age_at_fahrt() computes it in SQL"""
+        if "age_at_fahrt" in self.__dict__:
+            return self.__dict__["age_at_fahrt"]
+        fahrt_date: datetime.date = self.semester.fahrt.date
+        birthday_not_reached = (fahrt_date.month, fahrt_date.day) < (self.birthday.month, self.birthday.day)
+        return fahrt_date.year - self.birthday.year - birthday_not_reached
+
+    @age_at_fahrt.setter
+    def age_at_fahrt(self, age: Optional[int]) -> None:
+        # the annotation of with_age_at_fahrt(). It is None, if the semester has no Fahrt
+        self.__dict__["age_at_fahrt"] = age
+
     @property
     def u18(self) -> bool:
-        return relativedelta(self.semester.fahrt.date, self.birthday).years < 18
+        age_at_fahrt = self.age_at_fahrt
+        return age_at_fahrt is not None and age_at_fahrt < 18
 
     @property
     def deadline_exceeded(self) -> bool:
@@ -257,17 +333,109 @@ class Participant(common_models.UUIDModelBase, common_models.LoggedModelBase, co
             return False
         return self.payment_deadline < datetime.date.today() + datetime.timedelta(days=7)
 
-    def get_non_liability(self) -> PDFResponse:
-        fahrt: Fahrt = get_object_or_404(Fahrt, semester=self.semester)
+    def render_non_liability(self, fahrt: Optional[Fahrt] = None) -> tuple[str, str]:
+        if fahrt is None:
+            fahrt = get_object_or_404(Fahrt, semester=self.semester)
         context = {
             "participant": self,
             "fahrt": fahrt,
         }
-        filename = f"non_liability_{self.surname}_{self.firstname}.pdf"
-        # first param is not needed and only included to make the signature conform to django's render function
-        if self.u18:
-            return render_to_pdf({}, "fahrt/tex/u18_non_liability.tex", context, filename)
-        return render_to_pdf({}, "fahrt/tex/ü18_non_liability.tex", context, filename)
+        template_name = "fahrt/tex/u18_non_liability.tex" if self.u18 else "fahrt/tex/ü18_non_liability.tex"
+        source = render_template_with_context(template_name, context)
+        # field names are unique per participant, as equally named fields of merged forms share their value
+        return template_name, FORM_FIELD_NAME_REGEX.sub(rf"\g<0>p{self.pk.hex}-", source)
+
+    def has_current_non_liability_form(self, source: str) -> bool:
+        return bool(
+            self.non_liability_form
+            and self.non_liability_form_hash == hashlib.sha256(source.encode()).hexdigest()
+            and self.non_liability_form.storage.exists(self.non_liability_form.name),
+        )
+
+    def generate_non_liability_form(self) -> None:
+        """(re)generates the stored non-liability form, if it does not exist or the participant's data changed"""
+        template_name, source = self.render_non_liability()
+        if not self.has_current_non_liability_form(source):
+            self.store_non_liability_form(source, compile_source_to_pdf(source, template_name=template_name))
+
+    def store_non_liability_form(self, source: str, pdf: bytes) -> None:
+        source_hash = hashlib.sha256(source.encode()).hexdigest()
+        if self.non_liability_form:
+            self.non_liability_form.delete(save=False)
+        self.non_liability_form.save(f"non_liability_{self.pk}.pdf", ContentFile(pdf), save=False)
+        self.non_liability_form_hash = source_hash
+        # only update the form, as the participant might have been edited concurrently
+        Participant.objects.filter(pk=self.pk).update(
+            non_liability_form=self.non_liability_form.name,
+            non_liability_form_hash=source_hash,
+        )
+
+    def get_non_liability(self) -> PDFResponse:
+        self.generate_non_liability_form()
+        with self.non_liability_form.open("rb") as file:
+            return PDFResponse(file.read(), filename=f"non_liability_{self.surname}_{self.firstname}.pdf")
+
+    def request_registration_mail(self) -> bool:
+        """
+        the non-liability form is generated and the registration mail is sent.
+        If MAIL_OUTBOX_BACKGROUND is enabled, this is done by the fahrt_registration_cronjob instead of the request.
+        Returns, if the mail was sent or queued.
+        """
+        self.registration_mail_pending = True
+        Participant.objects.filter(pk=self.pk).update(registration_mail_pending=True)
+        if settings.MAIL_OUTBOX_BACKGROUND:
+            return True
+        return self.send_registration_mail()
+
+    def send_registration_mail(self) -> bool:
+        """sends the pending registration mail. Returns, if it was sent"""
+        try:
+            non_liability = self.get_non_liability()
+        except Exception:  # pylint: disable=broad-except
+            # the participant stays pending and is retried by the next run
+            logging.exception("Could not generate the non-liability form of %s", self.pk)
+            return False
+        if not Participant.objects.filter(pk=self.pk, registration_mail_pending=True).update(
+            registration_mail_pending=False,
+        ):
+            return False  # already handled by a concurrently running job
+        self.registration_mail_pending = False
+        mail = self.semester.fahrt.mail_registration
+        if mail and mail.send_mail_registration(self, non_liability):
+            self.log(None, "Registration mail sent")
+            return True
+        self.log(None, "Could not send the registration mail")
+        return False
+
+    @classmethod
+    def send_pending_registration_mails(cls) -> int:
+        sent = 0
+        participant: Participant
+        for participant in cls.objects.filter(registration_mail_pending=True).order_by("registration_time"):
+            sent += participant.send_registration_mail()
+        return sent
+
+    @classmethod
+    def update_payments(cls, user: Any, paid: Iterable[Any], unpaid: Iterable[Any]) -> tuple[int, int]:
+        """
+        sets the paid participants to paid today and the unpaid participants to not paid.
+        Participants, whose payment-state already is the requested one, are skipped. Every change is logged.
+        Returns the number of changed paid and unpaid participants.
+        """
+        today = timezone.now().date()
+        with transaction.atomic():
+            paid_ids = list(cls.objects.filter(id__in=list(paid), paid__isnull=True).values_list("id", flat=True))
+            unpaid_ids = list(cls.objects.filter(id__in=list(unpaid), paid__isnull=False).values_list("id", flat=True))
+            cls.objects.filter(id__in=paid_ids).update(paid=today, updated_at=timezone.now())
+            cls.objects.filter(id__in=unpaid_ids).update(paid=None, updated_at=timezone.now())
+            LogEntry.objects.bulk_create(
+                [LogEntry(participant_id=participant_id, user=user, text="Set paid") for participant_id in paid_ids]
+                + [
+                    LogEntry(participant_id=participant_id, user=user, text="Set unpaid")
+                    for participant_id in unpaid_ids
+                ],
+            )
+        return len(paid_ids), len(unpaid_ids)
 
     def toggle_mailinglist(self) -> None:
         self.mailinglist = not self.mailinglist
@@ -280,6 +448,17 @@ class Participant(common_models.UUIDModelBase, common_models.LoggedModelBase, co
     #    self.payment_deadline = deadline.strftime("%d.%m.%Y")
 
 
+@receiver(models.signals.post_delete, sender=Participant)
+def auto_delete_non_liability_form_on_delete(sender, instance, **_kwargs):
+    """
+    Deletes file from filesystem
+    when corresponding `Participant` object is deleted.
+    """
+    _ = sender  # sender is needed, for api. it cannot be renamed, but is unused here.
+    if instance.non_liability_form and os.path.isfile(instance.non_liability_form.path):
+        os.remove(instance.non_liability_form.path)
+
+
 class TransportationComment(common_models.LoggedModelBase):
     sender = models.ForeignKey(Participant, on_delete=models.CASCADE)
     commented_on = models.ForeignKey(Transportation, on_delete=models.CASCADE)
@@ -311,3 +490,177 @@ class LogEntry(common_models.LoggedModelBase):
 
     def __str__(self) -> str:
         return f"{self.time}, {self.user}: {self.text}"
+
+
+# entries of a bank-statement, which are checked for duplicates and stored at once
+STAGING_CHUNK_SIZE = 500
+
+
+def _chunks(iterable: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+class BankImport(common_models.LoggedModelBase):
+    """an uploaded bank-statement, whose transactions are staged for matching them to the participants"""
+
+    fahrt = models.ForeignKey(Fahrt, on_delete=models.CASCADE)
+    filename = models.CharField(_("File"), max_length=200)
+    user = models.ForeignKey(get_user_model(), on_delete=models.SET_NULL, blank=True, null=True)
+
+    def __str__(self) -> str:
+        return f"{self.filename} ({self.created_at})"
+
+    @classmethod
+    def stage(
+        cls,
+        fahrt: Fahrt,
+        filename: str,
+        user: Any,
+        entries: Iterable[Entry],
+        errors: list[str],
+    ) -> tuple[Optional["BankImport"], int, int]:
+        """
+        streams the entries, which were not imported before, into the staging table and matches them to the
+        participants. Returns the import, the number of staged transactions and the number of skipped duplicates.
+        errors may already be filled while the entries are consumed (see parse_camt_csv), the errors of the matching are
+        appended. If there are errors, nothing is stored.
+        If every transaction was imported before, the latest import of the fahrt, which holds them, is returned.
+        """
+        with transaction.atomic():
+            bank_import = cls.objects.create(fahrt=fahrt, filename=filename, user=user)
+            staged, duplicates, duplicate_import_ids = BankTransaction.stage_entries(bank_import, entries)
+            if not errors and staged:
+                errors.extend(bank_import.match(fahrt))
+            if errors or not staged:
+                transaction.set_rollback(True)
+        if errors:
+            return None, 0, 0
+        if not staged:
+            existing_import = cls.objects.filter(fahrt=fahrt, pk__in=duplicate_import_ids).order_by("-pk").first()
+            if existing_import is None:
+                errors.append(_("The file does not contain any new transactions"))
+            return existing_import, 0, duplicates
+        return bank_import, staged, duplicates
+
+    def match(self, fahrt: Fahrt) -> list[str]:
+        """matches the staged transactions to the participants. Returns the errors of the matching"""
+        participants = Participant.objects.filter(semester=fahrt.semester, status=Participant.STATUS_CONFIRMED)
+        matcher = TransactionMatcher(
+            (participant_id, firstname, surname, paid is not None)
+            for participant_id, firstname, surname, paid in participants.values_list(
+                "id",
+                "firstname",
+                "surname",
+                "paid",
+            )
+        )
+        # id(entry) -> (transaction, entry). The matcher returns the entries, which it was given
+        transactions: dict[int, tuple[BankTransaction, Entry]] = {}
+        for bank_transaction in self.transactions.all():
+            entry = bank_transaction.as_entry()
+            transactions[id(entry)] = (bank_transaction, entry)
+        result = matcher.match(entry for _bank_transaction, entry in transactions.values())
+        if result.errors:
+            return result.errors
+        for participant_id, entry in result.matched:
+            transactions[id(entry)][0].participant_id = participant_id
+        for entry, suggestion_id in result.unmatched:
+            transactions[id(entry)][0].suggestion_id = suggestion_id
+        BankTransaction.objects.bulk_update(
+            [bank_transaction for bank_transaction, _entry in transactions.values()],
+            ["participant", "suggestion"],
+            batch_size=500,
+        )
+        return []
+
+
+class BankTransaction(common_models.LoggedModelBase):
+    class Meta:
+        ordering = ["date", "id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "iban", "amount", "purpose_hash", "occurrence"],
+                name="fahrt_banktransaction_unique",
+            ),
+        ]
+
+    bank_import = models.ForeignKey(BankImport, on_delete=models.CASCADE, related_name="transactions")
+    date = models.DateField("Buchungstag")
+    purpose = models.TextField("Verwendungszweck")
+    purpose_hash = models.CharField(max_length=64, editable=False)
+    payer = models.CharField("Beguenstigter/Zahlungspflichtiger", max_length=200)
+    iban = models.CharField("Kontonummer/IBAN", max_length=34)
+    bic = models.CharField("BIC (SWIFT-Code)", max_length=11)
+    amount = models.DecimalField("Betrag", max_digits=10, decimal_places=2)
+    # identical transfers (e.g. paying twice on the same day) within one statement are counted through
+    occurrence = models.PositiveSmallIntegerField(default=0, editable=False)
+    # matched by the UUID in the purpose
+    participant = models.ForeignKey(Participant, on_delete=models.SET_NULL, blank=True, null=True, related_name="+")
+    # suggested by the name of the payer, if there is no UUID in the purpose
+    suggestion = models.ForeignKey(Participant, on_delete=models.SET_NULL, blank=True, null=True, related_name="+")
+
+    def __str__(self) -> str:
+        return f"{self.date}: {self.amount} {self.payer}"
+
+    @staticmethod
+    def deduplication_key(entry: Entry) -> tuple[datetime.date, str, Decimal, str]:
+        """transactions with the same key and occurrence are the same transaction imported (with another statement)"""
+        purpose_hash = hashlib.sha256(entry.verwendungszweck.encode()).hexdigest()
+        return entry.datum, entry.iban, Decimal(entry.betrag).quantize(Decimal("0.01")), purpose_hash
+
+    @classmethod
+    def stage_entries(cls, bank_import: BankImport, entries: Iterable[Entry]) -> tuple[int, int, set[int]]:
+        """
+        stores the entries in chunks, skipping the ones imported before.
+        Returns the number of staged entries, of skipped duplicates and the imports holding the duplicates.
+        """
+        occurrences: Counter[tuple[datetime.date, str, Decimal, str]] = Counter()
+        staged = duplicates = 0
+        duplicate_import_ids: set[int] = set()
+        for chunk in _chunks(entries, STAGING_CHUNK_SIZE):
+            keyed_chunk = []
+            for entry in chunk:
+                key = cls.deduplication_key(entry)
+                keyed_chunk.append((entry, (*key, occurrences[key])))
+                occurrences[key] += 1
+            imported = {
+                (date, iban, amount, purpose_hash, occurrence): import_id
+                for date, iban, amount, purpose_hash, occurrence, import_id in cls.objects.filter(
+                    date__in={key[0] for _entry, key in keyed_chunk},
+                ).values_list("date", "iban", "amount", "purpose_hash", "occurrence", "bank_import_id")
+            }
+            new_transactions = []
+            for entry, key in keyed_chunk:
+                if key in imported:
+                    duplicates += 1
+                    duplicate_import_ids.add(imported[key])
+                else:
+                    new_transactions.append(cls.from_entry(bank_import, entry, key))
+            cls.objects.bulk_create(new_transactions)
+            staged += len(new_transactions)
+        return staged, duplicates, duplicate_import_ids
+
+    @classmethod
+    def from_entry(
+        cls,
+        bank_import: BankImport,
+        entry: Entry,
+        key: tuple[datetime.date, str, Decimal, str, int],
+    ) -> "BankTransaction":
+        date, iban, amount, purpose_hash, occurrence = key
+        return cls(
+            bank_import=bank_import,
+            date=date,
+            purpose=entry.verwendungszweck,
+            purpose_hash=purpose_hash,
+            payer=entry.zahlungspflichtiger,
+            iban=iban,
+            bic=entry.bic,
+            amount=amount,
+            occurrence=occurrence,
+        )
+
+    def as_entry(self) -> Entry:
+        return Entry(self.date, self.purpose, self.payer, self.iban, self.bic, str(self.amount))
@@ -0,0 +1,63 @@
+import io
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable
+
+from pypdf import PdfWriter
+
+from settool_common.tex import compile_source_to_pdf
+
+from .models import Fahrt, Participant
+
+
+def generate_non_liability_forms(fahrt: Fahrt, participants: Iterable[Participant]) -> list[Participant]:
+    """
+    Makes sure every participant has a current non-liability form stored.
+    Forms of participants, whose data did not change, are reused. The others are compiled in parallel.
+    """
+    participants = list(participants)
+    outdated: list[tuple[Participant, str, str]] = []
+    for participant in participants:
+        template_name, source = participant.render_non_liability(fahrt)
+        if not participant.has_current_non_liability_form(source):
+            outdated.append((participant, template_name, source))
+    if not outdated:
+        return participants
+
+    def compile_form(outdated_form: tuple[Participant, str, str]) -> bytes:
+        _participant, template_name, source = outdated_form
+        return compile_source_to_pdf(source, template_name=template_name)
+
+    # the compiles run in separate latex-processes, the threads only wait for them
+    with ThreadPoolExecutor(max_workers=min(os.cpu_count() or 1, len(outdated))) as executor:
+        pdfs = list(executor.map(compile_form, outdated))
+    for (participant, _template_name, source), pdf in zip(outdated, pdfs):
+        participant.store_non_liability_form(source, pdf)
+    return participants
+
+
+def merge_non_liability_forms(fahrt: Fahrt, participants: Iterable[Participant]) -> bytes:
+    """
+    All forms in one document.
+    The stored forms are appended to each other. Their form fields (and the prefilled names) are kept, as the field
+    names are unique per participant (see Participant.render_non_liability).
+    """
+    writer = PdfWriter()
+    for participant in generate_non_liability_forms(fahrt, participants):
+        with participant.non_liability_form.open("rb") as file:
+            writer.append(io.BytesIO(file.read()))
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def zip_non_liability_forms(fahrt: Fahrt, participants: Iterable[Participant]) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for participant in generate_non_liability_forms(fahrt, participants):
+            archive.write(
+                participant.non_liability_form.path,
+                f"non_liability_{participant.surname}_{participant.firstname}_{str(participant.pk)[:8]}.pdf",
+            )
+    return buffer.getvalue()
@@ -1,7 +1,6 @@
-import json
 from csv import DictReader
 from decimal import Decimal, InvalidOperation
-from typing import Any
+from typing import Any, Iterator
 
 from django.utils.datetime_safe import date, datetime
 
@@ -16,23 +15,6 @@ class Entry:
         self.bic: str = bic
         self.betrag: str = betrag
 
-    def to_json(self):
-        dump = self.__dict__.copy()
-        dump["datum"] = self.datum.strftime("%d.%m.%y")
-        return json.dumps(dump)
-
-    @staticmethod
-    def from_json(json_str):
-        entity_dict = json.loads(json_str)
-        return Entry(
-            datum=Entry.parse_date(entity_dict["datum"]),
-            verwendungszweck=entity_dict["verwendungszweck"],
-            zahlungspflichtiger=entity_dict["zahlungspflichtiger"],
-            iban=entity_dict["iban"],
-            bic=entity_dict["bic"],
-            betrag=entity_dict["betrag"],
-        )
-
     def __repr__(self):
         return (
             f"Entry <"
@@ -52,10 +34,8 @@ class Entry:
             return datetime.strptime(s_date, "%d.%m.%Y").date()
 
 
-def parse_camt_csv(csvfile):
-    results = []
-    errors = []
-
+def parse_camt_csv(csvfile, errors: list[str]) -> Iterator[Entry]:
+    """yields the incoming transfers row by row. Rows, which cannot be parsed, are appended to errors"""
     csv_contents = DictReader(csvfile, delimiter=";")
     for counter, row in enumerate(csv_contents):
         buchungstext = row["Buchungstext"]
@@ -88,7 +68,7 @@ def parse_camt_csv(csvfile):
                 row["BIC (SWIFT-Code)"],
                 betrag,
             )
-            results.append(entry.to_json())
+            yield entry
 
         elif buchungstext in [
             "ENTGELTABSCHLUSS",
@@ -100,4 +80,3 @@ def parse_camt_csv(csvfile):
             pass
         else:
             errors.append(f"Transaktion in Zeile {counter} mit Typ {buchungstext} nicht erkannt")
-    return results, errors
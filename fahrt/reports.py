@@ -0,0 +1,74 @@
+"""
+Statistics of the confirmed participants of a Fahrt.
+They are shown below the list of confirmed participants and are used by the kitchen-planning export.
+"""
+from dataclasses import dataclass, field
+
+from django.db.models import Count, Q, Sum
+
+from .models import Fahrt, Participant, ParticipantQuerySet, Transportation, U18
+
+
+@dataclass
+class NutritionBucket:
+    nutrition: str
+    name: str
+    count: int = 0
+    # (allergies, number of participants with exactly these allergies)
+    allergies: list[tuple[str, int]] = field(default_factory=list)
+
+
+@dataclass
+class ParticipantsReport:
+    number: int
+    num_women: int
+    non_liability: int
+    paid: int
+    u18s: int
+    allergies: int
+    nutritions: list[NutritionBucket]
+    cars: int
+    car_places: int
+
+    @property
+    def proportion_of_women(self) -> int:
+        return int(self.num_women * 100 / self.number) if self.number else 0
+
+
+def _nutrition_buckets(participants: ParticipantQuerySet) -> list[NutritionBucket]:
+    buckets = {
+        nutrition: NutritionBucket(nutrition=nutrition, name=name) for nutrition, name in Participant.NUTRITION_CHOICES
+    }
+    grouped = (
+        participants.order_by("nutrition", "allergies")
+        .values("nutrition", "allergies")
+        .annotate(allergies_count=Count("pk"))
+    )
+    for group in grouped:
+        bucket = buckets[group["nutrition"]]
+        bucket.count += group["allergies_count"]
+        if group["allergies"]:
+            bucket.allergies.append((group["allergies"], group["allergies_count"]))
+    return [bucket for bucket in buckets.values() if bucket.count]
+
+
+def build_participants_report(participants: ParticipantQuerySet, fahrt: Fahrt) -> ParticipantsReport:
+    """computes the statistics of the participants (e.g. the filtered confirmed participants) in three queries"""
+    counts = participants.with_age_at_fahrt().aggregate(
+        number=Count("pk"),
+        num_women=Count("pk", filter=Q(gender="female")),
+        non_liability=Count("pk", filter=Q(non_liability__isnull=False)),
+        paid=Count("pk", filter=Q(paid__isnull=False)),
+        u18s=Count("pk", filter=U18),
+        allergies=Count("pk", filter=~Q(allergies="")),
+    )
+    cars = fahrt.transportation_set.filter(transport_type=Transportation.CAR).aggregate(
+        cars=Count("pk"),
+        car_places=Sum("places"),
+    )
+    return ParticipantsReport(
+        **counts,
+        nutritions=_nutrition_buckets(participants),
+        cars=cars["cars"],
+        car_places=cars["car_places"] or 0,
+    )
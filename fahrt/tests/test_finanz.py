@@ -0,0 +1,113 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+import fahrt.models as fahrt_models
+import settool_common.models as common_models
+from settool_common.settings import SEMESTER_SESSION_KEY
+
+
+class FinanzSimpleTest(TestCase):
+    def setUp(self) -> None:
+        semester = common_models.current_semester()
+        fahrt_models.Fahrt.objects.create(
+            semester=semester,
+            date=date.today(),
+            open_registration=timezone.now(),
+            close_registration=timezone.now(),
+        )
+        course_bundle = common_models.CourseBundle.objects.create(name="Info")
+        subject = common_models.Subject.objects.create(subject="Informatik", course_bundle=course_bundle)
+        self.participants = [
+            fahrt_models.Participant.objects.create(
+                semester=semester,
+                gender="diverse",
+                firstname=f"Participant {i}",
+                surname="Mustermann",
+                birthday=date(2000, 1, 1),
+                email=f"participant{i}@test.de",
+                subject=subject,
+                nutrition="normal",
+                status=fahrt_models.Participant.STATUS_CONFIRMED,
+                paid=date(2022, 1, 1) if i % 2 else None,
+            )
+            for i in range(30)
+        ]
+        self.user = User.objects.create_superuser("admin", "admin@test.de", "admin")
+        self.client.force_login(self.user)
+        session = self.client.session
+        session[SEMESTER_SESSION_KEY] = semester.pk
+        session.save()
+
+    def test_toggle_all_payments(self):
+        data = {"form-TOTAL_FORMS": len(self.participants), "form-INITIAL_FORMS": len(self.participants)}
+        for i, participant in enumerate(self.participants):
+            data[f"form-{i}-id"] = str(participant.pk)
+            if participant.paid is None:
+                data[f"form-{i}-selected"] = "on"
+
+        response = self.client.post(reverse("fahrt:finanz_simple"), data)
+
+        selection = common_models.Selection.objects.get()
+        self.assertRedirects(response, selection.url("fahrt:finanz_confirm"))
+        response = self.client.get(selection.url("fahrt:finanz_confirm"))
+        self.assertEqual(len(response.context["new_paid_participants"]), 15)
+        self.assertEqual(len(response.context["new_unpaid_participants"]), 15)
+
+        # session, user, semester, selection, the two snapshots, one update per direction, one insert of the
+        # log-entries (+ savepoints) and the deletion of the consumed selection.
+        # the browser posts the csrf-token, an empty form would not be bound
+        with self.assertNumQueries(12):
+            response = self.client.post(selection.url("fahrt:finanz_confirm"), {"confirm": ""})
+
+        self.assertRedirects(response, reverse("fahrt:finanz_simple"))
+        for participant in self.participants:
+            was_paid = participant.paid is not None
+            participant.refresh_from_db()
+            self.assertEqual(participant.paid is None, was_paid)
+            self.assertEqual(
+                participant.logentry_set.get().text,
+                "Set unpaid" if was_paid else "Set paid",
+            )
+
+    def test_stale_post_without_changes(self):
+        # a participant was removed after the page was loaded
+        data = {"form-TOTAL_FORMS": len(self.participants), "form-INITIAL_FORMS": len(self.participants)}
+        for i, participant in enumerate(self.participants):
+            data[f"form-{i}-id"] = str(participant.pk)
+            if participant.paid is not None:
+                data[f"form-{i}-selected"] = "on"
+        self.participants.pop().delete()
+
+        response = self.client.post(reverse("fahrt:finanz_simple"), data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["participants_and_select"]), len(self.participants))
+
+    def test_select_participants_for_mail(self):
+        mail = fahrt_models.FahrtMail.objects.create(
+            sender=common_models.Mail.SET_FAHRT,
+            subject="Fahrt",
+            text="Hallo {{vorname}}",
+        )
+        response = self.client.post(reverse("fahrt:filter"), {"search": "Participant"})
+        selection = common_models.Selection.objects.get(kind=common_models.Selection.FAHRT_FILTERED)
+        self.assertRedirects(response, selection.url("fahrt:filtered_participants"))
+        response = self.client.get(selection.url("fahrt:filtered_participants"))
+        self.assertEqual(
+            [(participant, form.initial["id"]) for participant, form in response.context["participants"]],
+            [(participant, participant.pk) for participant in self.participants],
+        )
+
+        data = {"mail": mail.pk, "form-TOTAL_FORMS": 2, "form-INITIAL_FORMS": 2}
+        for i, participant in enumerate(self.participants[:2]):
+            data[f"form-{i}-id"] = str(participant.pk)
+        data["form-0-selected"] = "on"
+        response = self.client.post(selection.url("fahrt:filtered_participants"), data)
+
+        mail_selection = common_models.Selection.objects.get(kind=common_models.Selection.FAHRT_MAIL)
+        self.assertRedirects(response, mail_selection.url("fahrt:send_mail", mail.pk), fetch_redirect_response=False)
+        self.assertEqual(mail_selection.id_list, [self.participants[0].pk.hex])
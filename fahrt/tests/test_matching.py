@@ -0,0 +1,262 @@
+from datetime import date
+from decimal import Decimal
+from uuid import UUID
+
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+import fahrt.models as fahrt_models
+import settool_common.models as common_models
+from fahrt.matching import name_tokens, TransactionMatcher, uuid_candidates
+from fahrt.parser import Entry
+from settool_common.settings import SEMESTER_SESSION_KEY
+
+ANNA = UUID("0f8fad5b-d9cb-469f-a165-70867728950e")
+BEN = UUID("7c9e6679-7425-40de-944b-e07fc1f90ae7")
+JUERGEN = UUID("c56a4180-65aa-42ec-a945-5fd21dec0538")
+MAX = UUID("9b2f6e1c-7a3d-4c55-8f0e-2d1b3a4c5d6e")
+MAXI = UUID("1e2d3c4b-5a69-4788-96a5-b4c3d2e1f009")
+
+PARTICIPANTS = (
+    (ANNA, "Anna", "Mustermann", False),
+    (BEN, "Ben", "Beispiel", False),
+    (JUERGEN, "Jürgen", "Groß", False),
+    (MAX, "Max", "Schmidt", False),
+    (MAXI, "Maxi", "Schmidt", True),
+)
+
+
+def _entry(purpose: str, payer: str = "Someone", amount: str = "120.00") -> Entry:
+    return Entry(date(2022, 10, 1), purpose, payer, "DE02120300000000202051", "BYLADEM1001", amount)
+
+
+class UUIDCandidatesTest(SimpleTestCase):
+    def test_tolerates_bank_formatting(self):
+        for purpose in (
+            f"SET Fahrt {ANNA}",
+            f"SET Fahrt {str(ANNA).upper()}",
+            "0f8fad5b-d9cb-469f-a165-7086\n7728950e",
+            "0f8fad5b d9cb 469f a165 70867728950e Anna",
+            f"{ANNA.hex}",
+        ):
+            with self.subTest(purpose):
+                self.assertIn(ANNA.hex, uuid_candidates(purpose))
+
+    def test_name_tokens(self):
+        self.assertEqual(name_tokens("GROSS, JÜRGEN"), ("gross", "juergen"))
+        self.assertEqual(name_tokens("Dr. Émile O'Neil"), ("dr", "emile", "neil"))
+
+
+class TransactionMatcherTest(SimpleTestCase):
+    def setUp(self) -> None:
+        self.matcher = TransactionMatcher(PARTICIPANTS)
+
+    def test_match_uuids(self):
+        anna = _entry(f"Fahrt {str(ANNA).upper()}")
+        ben = _entry(f"Fahrt {BEN.hex[:20]}\n{BEN.hex[20:]}")
+        other = _entry("Fahrt")
+
+        result = self.matcher.match([anna, ben, other])
+
+        self.assertEqual(result.matched, [(ANNA, anna), (BEN, ben)])
+        self.assertEqual(result.unmatched, [(other, None)])
+        self.assertEqual(result.errors, [])
+
+    def test_multiple_uuids_are_errors(self):
+        self.assertEqual(len(self.matcher.match([_entry(f"{ANNA} {BEN}")]).errors), 1)
+        self.assertEqual(len(self.matcher.match([_entry(str(ANNA)), _entry(str(ANNA))]).errors), 1)
+
+    def test_suggestions(self):
+        paid = [_entry(str(ANNA), amount="120.00"), _entry(str(BEN), amount="120.0")]
+        gross = _entry("Fahrt", payer="GROSS, JUERGEN")
+        parents = _entry("Fahrt", payer="Erika Beispiel", amount="120")
+        schmidt = _entry("Fahrt", payer="Max Schmidt", amount="120")
+        unknown = _entry("Fahrt", payer="Erika Musterfrau", amount="120")
+
+        result = self.matcher.match([*paid, gross, parents, schmidt, unknown])
+
+        self.assertEqual(
+            result.unmatched,
+            [
+                (gross, JUERGEN),
+                # Ben was matched by his UUID
+                (parents, None),
+                # Maxi Schmidt already paid
+                (schmidt, MAX),
+                (unknown, None),
+            ],
+        )
+
+    def test_unique_surname_with_usual_amount(self):
+        paid = [_entry(str(ANNA), amount="120.00")]
+        parents = _entry("Fahrt", payer="Erika Groß", amount="120")
+        other_amount = _entry("Fahrt", payer="Erika Groß", amount="60")
+
+        self.assertEqual(self.matcher.match([*paid, parents]).unmatched, [(parents, JUERGEN)])
+        self.assertEqual(self.matcher.match([*paid, other_amount]).unmatched, [(other_amount, None)])
+
+
+class BankImportTest(TestCase):
+    def setUp(self) -> None:
+        self.semester = common_models.current_semester()
+        self.fahrt = fahrt_models.Fahrt.objects.create(
+            semester=self.semester,
+            date=date.today(),
+            open_registration=timezone.now(),
+            close_registration=timezone.now(),
+        )
+        course_bundle = common_models.CourseBundle.objects.create(name="Info")
+        subject = common_models.Subject.objects.create(subject="Informatik", course_bundle=course_bundle)
+        self.participants = {
+            firstname: fahrt_models.Participant.objects.create(
+                semester=self.semester,
+                gender="diverse",
+                firstname=firstname,
+                surname=surname,
+                birthday=date(2000, 1, 1),
+                email=f"{firstname}@test.de",
+                subject=subject,
+                nutrition="normal",
+                status=fahrt_models.Participant.STATUS_CONFIRMED,
+            )
+            for firstname, surname in (("Anna", "Mustermann"), ("Jürgen", "Groß"))
+        }
+        user = User.objects.create_superuser("admin", "admin@test.de", "admin")
+        self.client.force_login(user)
+        session = self.client.session
+        session[SEMESTER_SESSION_KEY] = self.semester.pk
+        session.save()
+
+    def _upload(self, rows: list[tuple[str, str, str]]) -> HttpResponse:
+        lines = [
+            "Buchungstag;Buchungstext;Verwendungszweck;Beguenstigter/Zahlungspflichtiger;Kontonummer/IBAN;"
+            "BIC (SWIFT-Code);Betrag;Waehrung",
+        ]
+        for purpose, payer, amount in rows:
+            lines.append(f"01.10.22;GUTSCHR. UEBERWEISUNG;{purpose};{payer};DE0212;BYLADEM1001;{amount};EUR")
+        csv_file = SimpleUploadedFile("export.csv", "\n".join(lines).encode("iso-8859-1"), content_type="text/csv")
+        return self.client.post(reverse("fahrt:finanz_automated"), {"file": csv_file})
+
+    def test_import_is_staged_and_deduplicated(self):
+        anna = self.participants["Anna"]
+        response = self._upload(
+            [(f"SET Fahrt {anna.pk}", "Anna Mustermann", "120,00"), ("SET", "GROSS, JUERGEN", "120")]
+        )
+
+        bank_import = fahrt_models.BankImport.objects.get()
+        self.assertRedirects(response, reverse("fahrt:finanz_auto_matching", args=[bank_import.pk]))
+        self.assertEqual(
+            list(bank_import.transactions.values_list("payer", "amount", "participant", "suggestion")),
+            [
+                ("Anna Mustermann", Decimal("120.00"), anna.pk, None),
+                ("GROSS, JUERGEN", Decimal("120.00"), None, self.participants["Jürgen"].pk),
+            ],
+        )
+
+        # the next statement overlaps with the previous one
+        self._upload([("SET", "GROSS, JUERGEN", "120,00"), ("SET", "Erika Musterfrau", "60,00")])
+
+        self.assertEqual(fahrt_models.BankTransaction.objects.count(), 3)
+        self.assertEqual(fahrt_models.BankImport.objects.latest("pk").transactions.get().payer, "Erika Musterfrau")
+
+    def test_identical_transfers_are_kept(self):
+        # e.g. parents paying twice on the same day
+        self._upload([("SET", "Erika Musterfrau", "60,00"), ("SET", "Erika Musterfrau", "60,00")])
+
+        bank_import = fahrt_models.BankImport.objects.get()
+        self.assertEqual(list(bank_import.transactions.values_list("occurrence", flat=True)), [0, 1])
+
+        # only the third transfer of the next (overlapping) statement is new
+        response = self._upload([("SET", "Erika Musterfrau", "60,00")] * 3)
+
+        new_import = fahrt_models.BankImport.objects.latest("pk")
+        self.assertRedirects(response, reverse("fahrt:finanz_auto_matching", args=[new_import.pk]))
+        self.assertEqual(list(new_import.transactions.values_list("occurrence", flat=True)), [2])
+        messages = [str(message) for message in get_messages(response.wsgi_request)]
+        self.assertIn("2 transactions were already imported before and were skipped", messages)
+
+    def test_reupload_redirects_to_the_existing_import(self):
+        rows = [("SET", "GROSS, JUERGEN", "120,00")]
+        self._upload(rows)
+        bank_import = fahrt_models.BankImport.objects.get()
+
+        response = self._upload(rows)
+
+        self.assertRedirects(response, reverse("fahrt:finanz_auto_matching", args=[bank_import.pk]))
+        self.assertEqual(fahrt_models.BankImport.objects.get(), bank_import)
+
+    def test_matching_page(self):
+        self._upload([("SET", "GROSS, JUERGEN", "120,00")])
+        bank_import = fahrt_models.BankImport.objects.get()
+
+        response = self.client.get(reverse("fahrt:finanz_auto_matching", args=[bank_import.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        ((form, transaction),) = response.context["unmatched_transactions"]
+        self.assertEqual(form.initial["selected"], self.participants["Jürgen"].pk)
+        self.assertEqual(transaction.payer, "GROSS, JUERGEN")
+
+        response = self.client.post(
+            reverse("fahrt:finanz_auto_matching", args=[bank_import.pk]),
+            {
+                "matched-TOTAL_FORMS": 0,
+                "matched-INITIAL_FORMS": 0,
+                "unmatched-TOTAL_FORMS": 1,
+                "unmatched-INITIAL_FORMS": 1,
+                "unmatched-0-selected": self.participants["Jürgen"].pk,
+            },
+        )
+
+        selection = common_models.Selection.objects.get()
+        self.assertRedirects(response, selection.url("fahrt:finanz_confirm"))
+        self.assertEqual(selection.id_list, [self.participants["Jürgen"].pk.hex])
+        self.assertEqual(selection.deselected_id_list, [])
+
+    def test_matching_queries_do_not_grow_with_the_transactions(self):
+        jurgen = self.participants["Jürgen"]
+        query_counts = []
+        for transactions in (1, 5):
+            self._upload([(f"SET {transactions} {index}", "GROSS, JUERGEN", "120,00") for index in range(transactions)])
+            bank_import = fahrt_models.BankImport.objects.latest("created_at")
+            data = {
+                "matched-TOTAL_FORMS": 0,
+                "matched-INITIAL_FORMS": 0,
+                "unmatched-TOTAL_FORMS": transactions,
+                "unmatched-INITIAL_FORMS": transactions,
+                **{f"unmatched-{index}-selected": jurgen.pk for index in range(transactions)},
+            }
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(reverse("fahrt:finanz_auto_matching", args=[bank_import.pk]), data)
+            self.assertEqual(response.status_code, 302)
+            query_counts.append(len(queries))
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_unknown_participants_are_rejected(self):
+        self._upload([("SET", "GROSS, JUERGEN", "120,00")])
+        bank_import = fahrt_models.BankImport.objects.get()
+        response = self.client.post(
+            reverse("fahrt:finanz_auto_matching", args=[bank_import.pk]),
+            {
+                "matched-TOTAL_FORMS": 0,
+                "matched-INITIAL_FORMS": 0,
+                "unmatched-TOTAL_FORMS": 1,
+                "unmatched-INITIAL_FORMS": 1,
+                "unmatched-0-selected": ANNA,
+            },
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(common_models.Selection.objects.exists())
+
+    def test_errors_are_not_staged(self):
+        anna = self.participants["Anna"]
+        self._upload([(f"{anna.pk}", "Anna Mustermann", "120,00"), (f"{anna.pk} 2", "Anna Mustermann", "120,00")])
+
+        self.assertFalse(fahrt_models.BankImport.objects.exists())
@@ -0,0 +1,118 @@
+import io
+import shutil
+import tempfile
+import zipfile
+from datetime import date, timedelta
+from typing import Optional
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import override_settings, TestCase
+from django.utils import timezone
+from pypdf import PdfReader, PdfWriter
+
+import fahrt.models as fahrt_models
+import settool_common.models as common_models
+from fahrt.non_liability import generate_non_liability_forms, merge_non_liability_forms, zip_non_liability_forms
+
+
+class NonLiabilityExportTest(TestCase):
+    fahrt: fahrt_models.Fahrt
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        semester = common_models.current_semester()
+        cls.fahrt = fahrt_models.Fahrt.objects.create(
+            semester=semester,
+            date=date.today() + timedelta(days=30),
+            open_registration=timezone.now(),
+            close_registration=timezone.now() + timedelta(days=10),
+        )
+        course_bundle = common_models.CourseBundle.objects.create(name="Info")
+        subject = common_models.Subject.objects.create(subject="Informatik", course_bundle=course_bundle)
+        for firstname, birthday in (("Anna", date(2000, 1, 1)), ("Ben", date.today() - timedelta(days=365 * 16))):
+            fahrt_models.Participant.objects.create(
+                semester=semester,
+                gender="diverse",
+                firstname=firstname,
+                surname="Mustermann",
+                birthday=birthday,
+                email=f"{firstname}@test.de",
+                subject=subject,
+                nutrition="normal",
+                status=fahrt_models.Participant.STATUS_CONFIRMED,
+            )
+
+    def setUp(self) -> None:
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root, PRIVATE_MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.compiled_sources: list[str] = []
+        self.compile_patch = mock.patch("fahrt.non_liability.compile_source_to_pdf", side_effect=self._fake_compile)
+        self.compile_patch.start()
+
+    def tearDown(self) -> None:
+        self.compile_patch.stop()
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def _fake_compile(self, source: str, template_name: Optional[str] = None) -> bytes:
+        _ = template_name
+        self.compiled_sources.append(source)
+        writer = PdfWriter()
+        writer.add_blank_page(width=100, height=100)
+        writer.add_metadata({"/Title": f"form {len(self.compiled_sources)}"})
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        return buffer.getvalue()
+
+    def participants(self):
+        return fahrt_models.Participant.objects.filter(semester=self.fahrt.semester).order_by("firstname")
+
+    def test_forms_are_reused(self):
+        generate_non_liability_forms(self.fahrt, self.participants())
+        self.assertEqual(len(self.compiled_sources), 2)
+        generate_non_liability_forms(self.fahrt, self.participants())
+        self.assertEqual(len(self.compiled_sources), 2)
+
+        fahrt_models.Participant.objects.filter(firstname="Ben").update(surname="Musterfrau")
+        generate_non_liability_forms(self.fahrt, self.participants())
+        self.assertEqual(len(self.compiled_sources), 3)
+        self.assertIn("Musterfrau", self.compiled_sources[-1])
+
+    def test_zip(self):
+        archive = zipfile.ZipFile(io.BytesIO(zip_non_liability_forms(self.fahrt, self.participants())))
+        names = sorted(archive.namelist())
+        self.assertEqual(len(names), 2)
+        self.assertTrue(names[0].startswith("non_liability_Mustermann_Anna_"))
+        self.assertTrue(names[1].startswith("non_liability_Mustermann_Ben_"))
+        self.assertEqual(
+            {PdfReader(io.BytesIO(archive.read(name))).metadata.title for name in names},
+            {"form 1", "form 2"},
+        )
+
+    def test_form_fields_are_unique(self):
+        ben = self.participants().get(firstname="Ben")
+        _template_name, source = ben.render_non_liability(self.fahrt)
+        # Ben is under 18, thus his form has the fields of the u18-form
+        self.assertIn(f"name={{p{ben.pk.hex}-name1}}", source)
+        self.assertIn(f"name=p{ben.pk.hex}-cp1", source)
+        self.assertNotIn("name={name1}", source)
+
+    def test_merge_reuses_stored_forms(self):
+        generate_non_liability_forms(self.fahrt, self.participants())
+
+        merged = PdfReader(io.BytesIO(merge_non_liability_forms(self.fahrt, self.participants())))
+
+        self.assertEqual(len(self.compiled_sources), 2)
+        self.assertEqual(len(merged.pages), 2)
+
+    def test_export_view(self):
+        user = User.objects.create_superuser("admin", "admin@test.de", "password")
+        self.client.force_login(user)
+        response = self.client.get("/fahrt/export/non_liability/zip")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/zip")
+        response = self.client.get("/fahrt/export/non_liability/pdf?missing=1")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/pdf")
@@ -0,0 +1,146 @@
+import os
+import shutil
+import tempfile
+from datetime import date, timedelta
+from typing import Optional
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core import mail
+from django.test import override_settings, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+import fahrt.models as fahrt_models
+import settool_common.models as common_models
+
+
+class RegistrationMailTest(TestCase):
+    participant: fahrt_models.Participant
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        semester = common_models.current_semester()
+        registration_mail = fahrt_models.FahrtMail.objects.create(subject="Registration {{vorname}}", text="text")
+        fahrt_models.Fahrt.objects.create(
+            semester=semester,
+            date=date.today() + timedelta(days=30),
+            open_registration=timezone.now(),
+            close_registration=timezone.now() + timedelta(days=10),
+            mail_registration=registration_mail,
+        )
+        course_bundle = common_models.CourseBundle.objects.create(name="Info")
+        subject = common_models.Subject.objects.create(subject="Informatik", course_bundle=course_bundle)
+        cls.participant = fahrt_models.Participant.objects.create(
+            semester=semester,
+            gender="diverse",
+            firstname="Max",
+            surname="Mustermann",
+            birthday=date(2000, 1, 1),
+            email="max@test.de",
+            subject=subject,
+            nutrition="normal",
+        )
+
+    def setUp(self) -> None:
+        self.media_root = tempfile.mkdtemp()
+        self.private_media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            PRIVATE_MEDIA_ROOT=self.private_media_root,
+        )
+        self.settings_override.enable()
+        self.compiled_sources: list[str] = []
+        self.compile_patch = mock.patch("fahrt.models.compile_source_to_pdf", side_effect=self._fake_compile)
+        self.compile_patch.start()
+        mail.outbox.clear()
+
+    def tearDown(self) -> None:
+        self.compile_patch.stop()
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+        shutil.rmtree(self.private_media_root, ignore_errors=True)
+
+    def _fake_compile(self, source: str, template_name: Optional[str] = None) -> bytes:
+        _ = template_name
+        self.compiled_sources.append(source)
+        return b"%PDF non-liability"
+
+    @override_settings(MAIL_OUTBOX_BACKGROUND=True)
+    def test_registration_mail_is_sent_in_the_background(self):
+        self.participant.request_registration_mail()
+        self.assertEqual(self.compiled_sources, [])
+
+        self.assertEqual(fahrt_models.Participant.send_pending_registration_mails(), 1)
+        self.assertEqual(fahrt_models.Participant.send_pending_registration_mails(), 0)
+        common_models.QueuedMail.deliver_due()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, "Registration Max")
+        self.assertEqual(
+            mail.outbox[0].attachments[0],
+            ("non_liability_Mustermann_Max.pdf", b"%PDF non-liability", "application/pdf"),
+        )
+
+        self.participant.refresh_from_db()
+        self.assertFalse(self.participant.registration_mail_pending)
+        self.assertTrue(self.participant.non_liability_form)
+        common_models.QueuedMail.objects.all().delete()
+
+    def test_registration_mail_is_sent_without_background_workers(self):
+        self.participant.request_registration_mail()
+
+        self.assertEqual([sent_mail.subject for sent_mail in mail.outbox], ["Registration Max"])
+        self.assertEqual(fahrt_models.Participant.send_pending_registration_mails(), 0)
+
+    def test_signup_reports_unsent_registration_mail(self):
+        self.compile_patch.stop()
+        data = {
+            "gender": "diverse",
+            "firstname": "Erika",
+            "surname": "Musterfrau",
+            "birthday": "2000-01-01",
+            "email": "erika@test.de",
+            "subject": self.participant.subject_id,
+            "nutrition": "normal",
+            "dsgvo": "on",
+        }
+        with mock.patch(
+            "fahrt.models.compile_source_to_pdf", side_effect=RuntimeError("latex failed")
+        ), self.assertLogs(
+            level="ERROR",
+        ):
+            response = self.client.post(reverse("fahrt:signup"), data)
+        self.compile_patch.start()
+
+        self.assertRedirects(response, reverse("fahrt:signup_success"), fetch_redirect_response=False)
+        self.assertEqual([message.level_tag for message in get_messages(response.wsgi_request)], ["error"])
+        self.assertEqual(mail.outbox, [])
+        # the registration mail is retried by the fahrt_registration_cronjob
+        self.assertTrue(fahrt_models.Participant.objects.get(firstname="Erika").registration_mail_pending)
+
+    @override_settings(MAIL_OUTBOX_BACKGROUND=True)
+    def test_background_registration_mail_counts_as_sent(self):
+        self.assertTrue(self.participant.request_registration_mail())
+
+    def test_stored_form_is_private(self):
+        self.participant.get_non_liability()
+
+        self.assertTrue(self.participant.non_liability_form.path.startswith(self.private_media_root))
+        self.assertEqual(os.listdir(self.media_root), [])
+        url = reverse("fahrt:non_liability", args=[self.participant.pk])
+        self.assertEqual(self.client.get(url).status_code, 302)  # redirected to the login
+        self.client.force_login(User.objects.create_superuser("admin", "admin@test.de", "admin"))
+        self.assertEqual(self.client.get(url).content, b"%PDF non-liability")
+
+    def test_stored_form_is_reused_until_the_data_changes(self):
+        self.assertEqual(self.participant.get_non_liability().content, b"%PDF non-liability")
+        self.participant.refresh_from_db()
+        self.participant.get_non_liability()
+        self.assertEqual(len(self.compiled_sources), 1)
+
+        self.participant.surname = "Musterfrau"
+        self.participant.save()
+        self.participant.get_non_liability()
+        self.assertEqual(len(self.compiled_sources), 2)
+        self.assertIn("Musterfrau", self.compiled_sources[1])
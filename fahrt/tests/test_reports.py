@@ -0,0 +1,97 @@
+from datetime import date, timedelta
+from typing import Optional
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+import fahrt.models as fahrt_models
+import settool_common.models as common_models
+from fahrt.reports import build_participants_report
+from settool_common.settings import SEMESTER_SESSION_KEY
+
+# (firstname, gender, nutrition, allergies)
+PARTICIPANTS = (
+    ("Anna", "female", "normal", ""),
+    ("Ben", "male", "normal", "Nuts"),
+    ("Carl", "male", "vegan", "Nuts"),
+    ("Dora", "female", "vegan", "Nuts"),
+    ("Emil", "diverse", "vegan", "Gluten"),
+)
+
+
+class ParticipantsReportTest(TestCase):
+    semester: common_models.Semester
+    fahrt: fahrt_models.Fahrt
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.semester = common_models.current_semester()
+        cls.fahrt = fahrt_models.Fahrt.objects.create(
+            semester=cls.semester,
+            date=date.today() + timedelta(days=30),
+            open_registration=timezone.now(),
+            close_registration=timezone.now(),
+        )
+        course_bundle = common_models.CourseBundle.objects.create(name="Info")
+        subject = common_models.Subject.objects.create(subject="Informatik", course_bundle=course_bundle)
+        for firstname, gender, nutrition, allergies in PARTICIPANTS:
+            participant = fahrt_models.Participant.objects.create(
+                semester=cls.semester,
+                gender=gender,
+                firstname=firstname,
+                surname="Mustermann",
+                birthday=date(2000, 1, 1) if firstname != "Emil" else date.today(),
+                email=f"{firstname}@test.de",
+                subject=subject,
+                nutrition=nutrition,
+                allergies=allergies,
+                status=fahrt_models.Participant.STATUS_CONFIRMED,
+                paid=date.today() if gender == "female" else None,
+            )
+            if firstname in ("Anna", "Ben"):
+                fahrt_models.Transportation.objects.create(
+                    transport_type=fahrt_models.Transportation.CAR,
+                    creator=participant,
+                    fahrt=cls.fahrt,
+                    places=3 if firstname == "Anna" else 4,
+                )
+
+    def test_report(self):
+        participants = fahrt_models.Participant.objects.filter(semester=self.semester).order_by("surname")
+        with self.assertNumQueries(3):
+            report = build_participants_report(participants, self.fahrt)
+
+        self.assertEqual(report.number, 5)
+        self.assertEqual(report.num_women, 2)
+        self.assertEqual(report.proportion_of_women, 40)
+        self.assertEqual(report.paid, 2)
+        self.assertEqual(report.non_liability, 0)
+        self.assertEqual(report.u18s, 1)
+        self.assertEqual(report.allergies, 4)
+        self.assertEqual((report.cars, report.car_places), (2, 7))
+        self.assertEqual(
+            [(bucket.nutrition, bucket.count, bucket.allergies) for bucket in report.nutritions],
+            [("normal", 2, [("Nuts", 1)]), ("vegan", 3, [("Gluten", 1), ("Nuts", 2)])],
+        )
+
+    def test_kitchen_export(self):
+        user = User.objects.create_superuser("admin", "admin@test.de", "admin")
+        self.client.force_login(user)
+        session = self.client.session
+        session[SEMESTER_SESSION_KEY] = self.semester.pk
+        session.save()
+        sources: list[str] = []
+
+        def fake_compile(source: str, template_name: Optional[str] = None) -> bytes:
+            _ = template_name
+            sources.append(source)
+            return b"%PDF-1.4"
+
+        with mock.patch("settool_common.tex.compile_source_to_pdf", side_effect=fake_compile):
+            response = self.client.get(reverse("fahrt:export_kitchen"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Gluten, Nuts (2x)", sources[0])
@@ -0,0 +1,99 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+import fahrt.models as fahrt_models
+import settool_common.models as common_models
+from settool_common.settings import SEMESTER_SESSION_KEY
+
+FAHRT_DATE = date(2022, 2, 28)
+# firstname -> birthday. The birthdays are around the 18th birthday at the date of the Fahrt
+BIRTHDAYS = {
+    "Anna": date(2000, 1, 1),
+    "Ben": date(2004, 2, 28),  # 18th birthday at the date of the Fahrt
+    "Carl": date(2004, 3, 1),
+    "Dora": date(2004, 2, 29),  # the 29th of february is not reached in 2022
+    "Emil": date(2004, 12, 31),
+    "Finn": date(2010, 6, 15),
+}
+
+
+class U18Test(TestCase):
+    semester: common_models.Semester
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.semester = common_models.current_semester()
+        fahrt_models.Fahrt.objects.create(
+            semester=cls.semester,
+            date=FAHRT_DATE,
+            open_registration=timezone.now(),
+            close_registration=timezone.now(),
+        )
+        course_bundle = common_models.CourseBundle.objects.create(name="Info")
+        bachelor = common_models.Subject.objects.create(subject="Informatik", course_bundle=course_bundle)
+        for index, (firstname, birthday) in enumerate(BIRTHDAYS.items()):
+            fahrt_models.Participant.objects.create(
+                semester=cls.semester,
+                gender="diverse",
+                firstname=firstname,
+                surname="Mustermann",
+                birthday=birthday,
+                email=f"{firstname}@test.de",
+                subject=bachelor,
+                nutrition="normal",
+                status=fahrt_models.Participant.STATUS_CONFIRMED,
+                paid=FAHRT_DATE if index % 2 else None,
+            )
+
+    def _login(self) -> None:
+        user = User.objects.create_superuser("admin", "admin@test.de", "admin")
+        self.client.force_login(user)
+        session = self.client.session
+        session[SEMESTER_SESSION_KEY] = self.semester.pk
+        session.save()
+
+    def test_age_at_fahrt_matches_property(self):
+        participants = fahrt_models.Participant.objects.with_age_at_fahrt()
+        for participant in participants:
+            with self.subTest(participant.firstname):
+                # without annotation, the age is computed in python
+                self.assertEqual(
+                    participant.age_at_fahrt,
+                    fahrt_models.Participant.objects.get(pk=participant.pk).age_at_fahrt,
+                )
+        self.assertEqual(
+            set(participants.filter(fahrt_models.U18).values_list("firstname", flat=True)),
+            {"Carl", "Dora", "Emil", "Finn"},
+        )
+
+    def test_list_confirmed_filters_u18(self):
+        self._login()
+        for u18, expected in (("true", {"Carl", "Dora", "Emil", "Finn"}), ("false", {"Anna", "Ben"})):
+            with self.subTest(u18=u18):
+                response = self.client.post(reverse("fahrt:list_confirmed"), {"u18": u18})
+
+                self.assertEqual({p.firstname for p in response.context["participants"]}, expected)
+                self.assertEqual(response.context["report"].u18s, 4 if u18 == "true" else 0)
+
+    def test_list_registered_without_queries_per_row(self):
+        self._login()
+        fahrt_models.Participant.objects.update(status=fahrt_models.Participant.STATUS_REGISTERED)
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse("fahrt:list_registered"))
+        self.assertContains(response, "Finn")
+
+    def test_dashboard_counts(self):
+        self._login()
+
+        response = self.client.get(reverse("fahrt:dashboard"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["cp_age"], [4, 2])
+        self.assertEqual(response.context["cp_paid"], [3, 3])
+        self.assertEqual(response.context["cp_non_liability"], [0, 6])
+        self.assertEqual(response.context["cp_bachlor_master"], [6, 0])
+        self.assertEqual(response.context["cp_by_transportation_type_data"], [0, 0, 6])
@@ -202,9 +202,19 @@ urlpatterns = [
                 path("confirm/", finanz_views.finanz_confirm, name="finanz_confirm"),
                 path("simple/", finanz_views.finanz_simple, name="finanz_simple"),
                 path("automated/", finanz_views.finanz_automated, name="finanz_automated"),
-                path("automated/matching/", finanz_views.finanz_auto_matching, name="finanz_auto_matching"),
+                path(
+                    "automated/matching/<int:bank_import_pk>/",
+                    finanz_views.finanz_auto_matching,
+                    name="finanz_auto_matching",
+                ),
             ],
         ),
     ),
+    path("export/kitchen", tex_views.export_kitchen, name="export_kitchen"),
     path("export/<str:file_format>", tex_views.export, name="export"),
+    path(
+        "export/non_liability/<str:file_format>",
+        tex_views.export_non_liability_forms,
+        name="export_non_liability_forms",
+    ),
 ]
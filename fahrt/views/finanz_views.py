@@ -1,4 +1,3 @@
-from datetime import date
 from io import TextIOWrapper
 from typing import Optional
 from uuid import UUID
@@ -8,63 +7,54 @@ from django.contrib import messages
 from django.contrib.auth.decorators import permission_required
 from django.core.files.uploadedfile import UploadedFile
 from django.core.handlers.wsgi import WSGIRequest
-from django.db.models import QuerySet
+from django.core.paginator import Paginator
+from django.db.models import Count, QuerySet
+from django.db.models.fields import BLANK_CHOICE_DASH
 from django.forms import formset_factory
 from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils.translation import gettext_lazy as _
 
-from settool_common.models import get_semester, Semester
+from settool_common.forms import SelectionFormSet
+from settool_common.models import request_semester, Selection, Semester
 
-from ..forms import CSVFileUploadForm, ParticipantSelectForm, SelectParticipantSwitchForm
-from ..models import Fahrt, Participant
-from ..parser import Entry, parse_camt_csv
+from ..forms import CSVFileUploadForm, ParticipantIdSelectForm, SelectParticipantSwitchForm
+from ..models import BankImport, Fahrt, Participant
+from ..parser import parse_camt_csv
+
+TRANSACTIONS_PER_PAGE = 50
 
 
 @permission_required("finanz")
 def finanz_simple(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     fahrt: Fahrt = get_object_or_404(Fahrt, semester=semester)
-    participants: list[Participant] = list(Participant.objects.filter(semester=semester, status="confirmed").all())
+    participants: list[Participant] = list(
+        Participant.objects.filter(semester=semester, status="confirmed").select_related("subject__course_bundle"),
+    )
 
-    select_participant_form_set = formset_factory(SelectParticipantSwitchForm, extra=0)
+    select_participant_form_set = formset_factory(SelectParticipantSwitchForm, formset=SelectionFormSet, extra=0)
     participantforms = select_participant_form_set(
         request.POST or None,
-        initial=[{"id": p.id, "selected": p.paid is not None} for p in participants],
+        rows=participants,
+        selected=lambda participant: participant.paid is not None,
     )
 
     if participantforms.is_valid():
-        new_paid_participants: list[int] = []
-        new_unpaid_participants: list[int] = []
-        for participant in participantforms:
-            try:
-                participant_id = participant.cleaned_data["id"]
-            except KeyError:
-                continue
-            try:
-                selected = participant.cleaned_data["selected"]
-            except KeyError:
-                selected = False
-            if selected:
-                if Participant.objects.filter(id=participant_id, paid__isnull=True).exists():
-                    new_paid_participants.append(participant_id)
-            else:
-                if Participant.objects.filter(id=participant_id, paid__isnull=False).exists():
-                    new_unpaid_participants.append(participant_id)
+        # the submitted state is compared to the state, which was loaded above
+        new_paid_participants, new_unpaid_participants = participantforms.changed_ids()
         if new_paid_participants or new_unpaid_participants:
-            request.session["new_paid_participants"] = new_paid_participants
-            request.session["new_unpaid_participants"] = new_unpaid_participants
-            return redirect("fahrt:finanz_confirm")
-
-    participants_and_select = []
-    for participant in participants:
-        for participant_form in participantforms:
-            if participant_form.initial["id"] == participant.id:
-                participants_and_select.append((participant, participant_form))
-                break
+            selection = Selection.store(
+                request,
+                Selection.FAHRT_PAYMENTS,
+                new_paid_participants,
+                deselected_ids=new_unpaid_participants,
+            )
+            return redirect(selection.url("fahrt:finanz_confirm"))
+
     context = {
         "fahrt": fahrt,
-        "participants_and_select": participants_and_select,
+        "participants_and_select": participantforms.rows_and_forms(),
         "participantforms": participantforms,
     }
     return render(request, "fahrt/finanz/simple_finanz.html", context)
@@ -72,20 +62,19 @@ def finanz_simple(request: WSGIRequest) -> HttpResponse:
 
 @permission_required("finanz")
 def finanz_confirm(request: WSGIRequest) -> HttpResponse:
-    new_paid_participants: list[Participant] = [
-        Participant.objects.get(id=part_id) for part_id in request.session["new_paid_participants"]
-    ]
-    new_unpaid_participants: list[Participant] = [
-        Participant.objects.get(id=part_id) for part_id in request.session["new_unpaid_participants"]
-    ]
+    selection = Selection.from_request(request, Selection.FAHRT_PAYMENTS)
+    new_paid_participants: QuerySet[Participant] = Participant.objects.filter(
+        id__in=selection.id_list,
+        paid__isnull=True,
+    ).order_by("surname", "firstname")
+    new_unpaid_participants: QuerySet[Participant] = Participant.objects.filter(
+        id__in=selection.deselected_id_list,
+        paid__isnull=False,
+    ).order_by("surname", "firstname")
     form = forms.Form(request.POST or None)
     if form.is_valid():
-        for new_paid_participant in new_paid_participants:
-            new_paid_participant.paid = date.today()
-            new_paid_participant.save()
-        for new_unpaid_participant in new_unpaid_participants:
-            new_unpaid_participant.paid = None
-            new_unpaid_participant.save()
+        Participant.update_payments(request.user, paid=selection.id_list, unpaid=selection.deselected_id_list)
+        selection.delete()
         messages.success(request, _("Saved changed payment status"))
         return redirect("fahrt:finanz_simple")
 
@@ -99,6 +88,8 @@ def finanz_confirm(request: WSGIRequest) -> HttpResponse:
 
 @permission_required("finanz")
 def finanz_automated(request: WSGIRequest) -> HttpResponse:
+    semester: Semester = request_semester(request)
+    fahrt: Fahrt = get_object_or_404(Fahrt, semester=semester)
     file_upload_form = CSVFileUploadForm(request.POST or None, request.FILES)
 
     if file_upload_form.is_valid():
@@ -106,128 +97,93 @@ def finanz_automated(request: WSGIRequest) -> HttpResponse:
         if csv_file is None:
             raise Http404()  # cannot happen, as file_upload_form would not be valid
         csv_file_text = TextIOWrapper(csv_file.file, encoding="iso-8859-1")
-        results, errors = parse_camt_csv(csv_file_text)
-        if errors:
+        errors: list[str] = []
+        bank_import, staged, duplicates = BankImport.stage(
+            fahrt,
+            csv_file.name or "",
+            request.user,
+            parse_camt_csv(csv_file_text, errors),
+            errors,
+        )
+        if bank_import is None:
             for error in errors:
                 messages.error(request, error)
             return redirect("fahrt:finanz_automated")
-        request.session["results"] = results
-        messages.success(request, _("The File was successfully uploaded"))
-        return redirect("fahrt:finanz_auto_matching")
+        if staged:
+            messages.success(request, _("The File was successfully uploaded"))
+        if duplicates:
+            messages.info(
+                request,
+                _("{duplicates} transactions were already imported before and were skipped").format(
+                    duplicates=duplicates,
+                ),
+            )
+        return redirect("fahrt:finanz_auto_matching", bank_import.pk)
 
     context = {
         "form": file_upload_form,
+        "bank_imports": fahrt.bankimport_set.annotate(transaction_count=Count("transactions")).order_by(
+            "-created_at",
+        )[:10],
     }
     return render(request, "fahrt/finanz/automated_finanz.html", context)
 
 
 @permission_required("finanz")
-def finanz_auto_matching(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
-    participants: QuerySet[Participant] = Participant.objects.filter(semester=semester, status="confirmed")
-
-    # mypy is weird for this one. equivalent [but not Typechecking]:  participants.values_list("id", flat=True)
-    participants_ids_pre_mypy: list[Optional[UUID]] = [element["id"] for element in participants.values("id")]
-    participants_ids: list[UUID] = [uuid for uuid in participants_ids_pre_mypy if uuid]
-
-    transactions: list[Entry] = [Entry.from_json(entry) for entry in request.session["results"]]
-
-    error, matched_transactions, unmatched_transactions = match_transactions_participant_ids(
-        participants_ids,
-        request,
-        transactions,
+def finanz_auto_matching(request: WSGIRequest, bank_import_pk: int) -> HttpResponse:
+    semester: Semester = request_semester(request)
+    bank_import: BankImport = get_object_or_404(BankImport, pk=bank_import_pk, fahrt__semester=semester)
+    paginator = Paginator(bank_import.transactions.all(), TRANSACTIONS_PER_PAGE)
+    page = paginator.get_page(request.GET.get("page"))
+    matched_transactions = [transaction for transaction in page if transaction.participant_id]
+    unmatched_transactions = [transaction for transaction in page if not transaction.participant_id]
+
+    # the participants are loaded once and shared by all selection boxes
+    participants: dict[UUID, Participant] = (
+        Participant.objects.filter(semester=semester, status="confirmed")
+        .only("id", "firstname", "surname", "paid")
+        .in_bulk()
     )
-    if error:
-        return redirect("fahrt:finanz_automated")
+    choices = [*BLANK_CHOICE_DASH, *((participant.id, str(participant)) for participant in participants.values())]
 
-    # genrerate selection boxes
-    unmatched_trans_form_set = formset_factory(ParticipantSelectForm, extra=len(unmatched_transactions))
-    forms_unmatched = unmatched_trans_form_set(request.POST or None, form_kwargs={"semester": semester})
-    forms_unmatched_trans = list(zip(forms_unmatched, unmatched_transactions))
-    matched_trans_form_set = formset_factory(ParticipantSelectForm, extra=0)
-    forms_matched = matched_trans_form_set(
+    # genrerate selection boxes. Participants suggested by the name of the payer are preselected
+    selection_form_set = formset_factory(ParticipantIdSelectForm, extra=0)
+    forms_matched = selection_form_set(
         request.POST or None,
-        initial=[{"selected": p_uuid} for (p_uuid, _) in matched_transactions],
-        form_kwargs={"semester": semester},
+        initial=[{"selected": transaction.participant_id} for transaction in matched_transactions],
+        form_kwargs={"choices": choices},
+        prefix="matched",
     )
-    forms_matched_trans = []
-    for p_uuid, transaction in matched_transactions:
-        for p_form in forms_matched:
-            if p_form.initial["selected"] == p_uuid:
-                forms_matched_trans.append((p_form, transaction))
-                break
+    forms_unmatched = selection_form_set(
+        request.POST or None,
+        initial=[{"selected": transaction.suggestion_id} for transaction in unmatched_transactions],
+        form_kwargs={"choices": choices},
+        prefix="unmatched",
+    )
+    forms_matched_trans = list(zip(forms_matched, matched_transactions))
+    forms_unmatched_trans = list(zip(forms_unmatched, unmatched_transactions))
 
     # parse forms and redirect to confirmation page
     if forms_unmatched.is_valid() and forms_matched.is_valid():
-        # hs notation: fst(unzip xs)++fst(unzip ys)
-        selection_forms = []
-        if forms_matched_trans:
-            selection_forms += list(zip(*forms_matched_trans))[0]
-        if forms_unmatched_trans:
-            selection_forms += list(zip(*forms_unmatched_trans))[0]
         new_paid_participants = set()
-        for form in selection_forms:
+        for form in [*forms_matched, *forms_unmatched]:
             if form.cleaned_data:
-                selected_part: Participant = form.cleaned_data["selected"]
-                if selected_part and Participant.objects.get(id=selected_part.id).paid is None:
-                    new_paid_participants.add(selected_part.id)
+                selected_id: Optional[UUID] = form.cleaned_data["selected"]
+                if selected_id and participants[selected_id].paid is None:
+                    new_paid_participants.add(selected_id)
 
         if new_paid_participants:
-            request.session["new_paid_participants"] = list(new_paid_participants)
-            request.session["new_unpaid_participants"] = []
-            return redirect("fahrt:finanz_confirm")
+            selection = Selection.store(request, Selection.FAHRT_PAYMENTS, new_paid_participants)
+            return redirect(selection.url("fahrt:finanz_confirm"))
         messages.warning(request, _("No Changes to Payment-state detected"))
         return redirect("fahrt:finanz_automated")
 
     context = {
+        "bank_import": bank_import,
+        "page": page,
         "matched_transactions": forms_matched_trans,
         "unmatched_transactions": forms_unmatched_trans,
         "forms_matched": forms_matched,
         "forms_unmatched": forms_unmatched,
     }
     return render(request, "fahrt/finanz/automated_finanz_matching.html", context)
-
-
-def match_transactions_participant_ids(
-    participants_ids: list[UUID],
-    request: WSGIRequest,
-    transactions: list[Entry],
-) -> tuple[bool, list[tuple[UUID, Entry]], list[Entry]]:
-    participant_matches: dict[UUID, list[Entry]] = {p_uuid: [] for p_uuid in participants_ids}
-    matched_transactions: list[tuple[UUID, Entry]] = []
-    unmatched_transactions: list[Entry] = []
-    error = False
-
-    transaction: Entry
-    for transaction in transactions:
-        matches: list[UUID] = [p_uuid for p_uuid in participants_ids if str(p_uuid) in transaction.verwendungszweck]
-        if matches:
-            for match in matches:
-                matched_transactions.append((match, transaction))
-                participant_matches[match].append(transaction)
-            # Transaction:Person = 1:1
-            if len(matches) > 1:
-                messages.error(
-                    request,
-                    _("Transaction {transaction} contains multiple UUIDs (matches). This is not allowed.").format(
-                        transaction=repr(transaction),
-                        matches=matches,
-                    ),
-                )
-                error = True
-        else:
-            unmatched_transactions.append(transaction)
-    # Transaction:Person = 1:1
-    for p_uuid, transaction_list in participant_matches.items():
-        if len(transaction_list) >= 2:
-            messages.error(
-                request,
-                _(
-                    "UUIDs {p_uuid} is contained in multiple Transactions {transaction_list}. This is not allowed.",
-                ).format(
-                    p_uuid=p_uuid,
-                    transaction_list=transaction_list,
-                ),
-            )
-            error = True
-    return error, matched_transactions, unmatched_transactions
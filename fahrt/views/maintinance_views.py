@@ -5,7 +5,7 @@ from django.http import HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
 
-from settool_common.models import get_semester, Semester
+from settool_common.models import request_semester, Selection, Semester
 
 from ..forms import FahrtForm, MailForm
 from ..models import Fahrt, FahrtMail, Participant
@@ -66,17 +66,17 @@ def del_mail(request: WSGIRequest, mail_pk: int) -> HttpResponse:
 @permission_required("fahrt.view_participants")
 def send_mail(request: WSGIRequest, mail_pk: int) -> HttpResponse:
     mail: FahrtMail = get_object_or_404(FahrtMail, pk=mail_pk)
-    selected_participants = request.session["selected_participants"]
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
-    participants = Participant.objects.filter(semester=semester, id__in=selected_participants).order_by("surname")
+    selection = Selection.from_request(request, Selection.FAHRT_MAIL)
+    semester: Semester = request_semester(request)
+    participants = Participant.objects.filter(semester=semester, id__in=selection.id_list).order_by("surname")
 
     subject, text, from_email = mail.get_mail_participant()
 
     form = forms.Form(request.POST or None)
     failed_participants = []
     if form.is_valid():
-        for participant in participants:
-            success = mail.send_mail_participant(participant)
+        participants_list = list(participants)
+        for participant, success in zip(participants_list, mail.send_mass_participants(participants_list)):
             if success:
                 participant.log(request.user, f"Mail '{mail}' sent")
             else:
@@ -100,7 +100,7 @@ def send_mail(request: WSGIRequest, mail_pk: int) -> HttpResponse:
 
 @permission_required("fahrt.view_participants")
 def settings(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
 
     fahrt: Fahrt = Fahrt.objects.get_or_create(
         semester=semester,
@@ -7,14 +7,15 @@ from django.contrib import messages
 from django.contrib.auth.decorators import permission_required
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.handlers.wsgi import WSGIRequest
-from django.db.models import Q, QuerySet, Sum
+from django.db.models import Q
 from django.forms import formset_factory
 from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
-from settool_common.models import get_semester, Semester
+from settool_common.forms import SelectionFormSet
+from settool_common.models import request_semester, Selection, Semester
 
 from ..forms import (
     FilterParticipantsForm,
@@ -24,14 +25,18 @@ from ..forms import (
     SelectMailForm,
     SelectParticipantForm,
 )
-from ..models import Fahrt, FahrtMail, Participant, Transportation
+from ..models import Fahrt, FahrtMail, Participant, ParticipantQuerySet, Transportation, U18
+from ..reports import build_participants_report
 
 
 @permission_required("fahrt.view_participants")
 def list_registered(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
-    participants = Participant.objects.filter(semester=semester, status="registered").order_by(
-        "-registration_time",
+    semester: Semester = request_semester(request)
+    participants = (
+        Participant.objects.filter(semester=semester, status="registered")
+        .with_age_at_fahrt()
+        .select_related("transportation")
+        .order_by("-registration_time")
     )
 
     context = {
@@ -42,8 +47,13 @@ def list_registered(request: WSGIRequest) -> HttpResponse:
 
 @permission_required("fahrt.view_participants")
 def list_waitinglist(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
-    participants = Participant.objects.filter(semester=semester, status="waitinglist").order_by("-registration_time")
+    semester: Semester = request_semester(request)
+    participants = (
+        Participant.objects.filter(semester=semester, status="waitinglist")
+        .with_age_at_fahrt()
+        .select_related("transportation")
+        .order_by("-registration_time")
+    )
 
     context = {
         "participants": participants,
@@ -52,10 +62,11 @@ def list_waitinglist(request: WSGIRequest) -> HttpResponse:
 
 
 def get_possibly_filtered_participants(filterform, semester):
-    participants = Participant.objects.filter(semester=semester, status="confirmed").order_by(
-        "payment_deadline",
-        "surname",
-        "firstname",
+    participants = (
+        Participant.objects.filter(semester=semester, status="confirmed")
+        .with_age_at_fahrt()
+        .select_related("transportation")
+        .order_by("payment_deadline", "surname", "firstname")
     )
     if filterform.is_valid():
         non_liability = filterform.cleaned_data["non_liability"]
@@ -89,16 +100,16 @@ def get_possibly_filtered_participants(filterform, semester):
             participants = participants.filter(mailinglist=mailinglist)
 
         u18 = filterform.cleaned_data["u18"]
-        if u18 is None:
-            return participants
-        participants_id = [p.id for p in participants if p.u18 == u18]
-        participants.filter(id__in=participants_id)
+        if u18:
+            participants = participants.filter(U18)
+        elif u18 is False:
+            participants = participants.exclude(U18)
     return participants
 
 
 @permission_required("fahrt.view_participants")
 def list_confirmed(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
 
     try:
         fahrt: Fahrt = semester.fahrt
@@ -109,51 +120,17 @@ def list_confirmed(request: WSGIRequest) -> HttpResponse:
     filterform = FilterRegisteredParticipantsForm(request.POST or None, semester=semester)
     participants = get_possibly_filtered_participants(filterform, semester)
 
-    u18s: int = sum(p.u18 for p in participants)
-    allergies = participants.exclude(allergies="").count()
-
-    number = participants.count()
-    num_women = participants.filter(gender="female").count()
-    proportion_of_women = int(num_women * 1.0 / number * 100) if number != 0 else 0
-
-    cars = fahrt.transportation_set.filter(transport_type=Transportation.CAR)
-
     context = {
         "filterform": filterform,
-        "nutritions": get_nutritunal_information(participants, semester),
         "participants": participants,
-        "number": number,
-        "non_liability": participants.filter(non_liability__isnull=False).count(),
-        "paid": participants.filter(paid__isnull=False).count(),
-        "car_places": cars.aggregate(car_places=Sum("places"))["car_places"] or 0,
-        "cars": cars.count(),
-        "u18s": u18s,
-        "allergies": allergies,
-        "num_women": num_women,
-        "proportion_of_women": proportion_of_women,
+        "report": build_participants_report(participants, fahrt),
     }
     return render(request, "fahrt/participants/list/list_confirmed.html", context)
 
 
-def get_nutritunal_information(
-    participants: QuerySet[Participant],
-    semester: Semester,
-) -> list[dict[str, object]]:
-    nutritions = Participant.objects.filter(semester=semester, status="confirmed").values("nutrition").distinct()
-    nutrition_choices = [choice["nutrition"] for choice in nutritions]
-    return [
-        {
-            "name": choice,
-            "count": str(participants.filter(nutrition=choice).count()),
-            "allergies": participants.filter(nutrition=choice).exclude(allergies="").values("allergies"),
-        }
-        for choice in nutrition_choices
-    ]
-
-
 @permission_required("fahrt.view_participants")
 def list_cancelled(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     participants = Participant.objects.filter(semester=semester, status="cancelled").order_by("surname")
 
     context = {
@@ -164,16 +141,16 @@ def list_cancelled(request: WSGIRequest) -> HttpResponse:
 
 @permission_required("fahrt.view_participants")
 def view_participant(request: WSGIRequest, participant_pk: UUID) -> HttpResponse:
-    participant = get_object_or_404(Participant, pk=participant_pk)
+    participant = get_object_or_404(Participant.objects.with_age_at_fahrt(), pk=participant_pk)
     log_entries = participant.logentry_set.order_by("time")
 
     form = SelectMailForm(request.POST or None)
 
     if form.is_valid():
         mail = form.cleaned_data["mail"]
-        request.session["selected_participants"] = [participant.id]
+        selection = Selection.store(request, Selection.FAHRT_MAIL, [participant.id])
 
-        return redirect("fahrt:send_mail", mail.id)
+        return redirect(selection.url("fahrt:send_mail", mail.id))
 
     context = {
         "participant": participant,
@@ -301,7 +278,7 @@ def set_status_canceled(request: WSGIRequest, participant_pk: UUID) -> HttpRespo
 
 
 def signup(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     try:
         fahrt = semester.fahrt
     except ObjectDoesNotExist:
@@ -313,23 +290,14 @@ def signup(request: WSGIRequest) -> HttpResponse:
     if form.is_valid():
         participant: Participant = form.save()
         participant.log(None, "Signed up")
-        mail = fahrt.mail_registration
-        if mail:
-            non_liability: Optional[HttpResponse] = None
-            try:
-                non_liability = participant.get_non_liability()
-            except Http404:
-                error: bool = True
-            else:
-                error = False
-            if error or non_liability is None or not mail.send_mail_registration(participant, non_liability):
-                messages.error(
-                    request,
-                    _(
-                        "Could not send you the registration email. You are registered, but you did not receve all "
-                        "nessesary documents. Please contact {mail} to get your non-liability form. ",
-                    ).format(mail=FahrtMail.SET_FAHRT),
-                )
+        if fahrt.mail_registration and not participant.request_registration_mail():
+            messages.error(
+                request,
+                _(
+                    "Could not send you the registration email. You are registered, but you did not receve all "
+                    "nessesary documents. Please contact {mail} to get your non-liability form. ",
+                ).format(mail=FahrtMail.SET_FAHRT),
+            )
 
         return redirect("fahrt:signup_success")
 
@@ -342,7 +310,7 @@ def signup(request: WSGIRequest) -> HttpResponse:
 
 @permission_required("fahrt.view_participants")
 def signup_internal(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
 
     try:
         semester.fahrt
@@ -354,14 +322,11 @@ def signup_internal(request: WSGIRequest) -> HttpResponse:
     if form.is_valid():
         participant: Participant = form.save()
         participant.log(request.user, "Signed up")
-        mail = participant.semester.fahrt.mail_registration
-        if mail:
-            non_liability = participant.get_non_liability()
-            if not mail.send_mail_registration(participant, non_liability):
-                messages.warning(
-                    request,
-                    _("Could not send the registration email. Make shure you configured the Registration-Mail."),
-                )
+        if not participant.semester.fahrt.mail_registration or not participant.request_registration_mail():
+            messages.warning(
+                request,
+                _("Could not send the registration email. Make shure you configured the Registration-Mail."),
+            )
 
         return redirect("fahrt:list_registered")
 
@@ -379,7 +344,7 @@ def signup_success(request: WSGIRequest) -> HttpResponse:
 
 @permission_required("fahrt.view_participants")
 def filter_participants(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     try:
         fahrt: Fahrt = semester.fahrt
     except ObjectDoesNotExist:
@@ -389,8 +354,13 @@ def filter_participants(request: WSGIRequest) -> HttpResponse:
 
     filterform = FilterParticipantsForm(request.POST or None)
     if filterform.is_valid():
-        set_request_session_filtered_participants(filterform, participants, request, fahrt)
-        return redirect("fahrt:filtered_participants")
+        filtered_participants = filter_participants_by_form(filterform, participants, fahrt)
+        selection = Selection.store(
+            request,
+            Selection.FAHRT_FILTERED,
+            filtered_participants.values_list("id", flat=True),
+        )
+        return redirect(selection.url("fahrt:filtered_participants"))
 
     context = {
         "participants": participants,
@@ -399,12 +369,11 @@ def filter_participants(request: WSGIRequest) -> HttpResponse:
     return render(request, "fahrt/maintinance/mail/filter_participants_send_mail.html", context)
 
 
-def set_request_session_filtered_participants(
+def filter_participants_by_form(
     filterform: FilterParticipantsForm,
-    participants: QuerySet[Participant],
-    request: WSGIRequest,
+    participants: ParticipantQuerySet,
     fahrt: Fahrt,
-) -> None:
+) -> ParticipantQuerySet:
     search: str = filterform.cleaned_data["search"]
     if search:
         participants = participants.filter(
@@ -444,56 +413,32 @@ def set_request_session_filtered_participants(
     if status:
         participants = participants.filter(status=status)
 
-    u18 = filterform.cleaned_data["u18"]
-    should_not_filter = u18 is None
-    filtered_participants: list[UUID] = [p.id for p in participants if should_not_filter or p.u18 is u18]
-    request.session["filtered_participants"] = filtered_participants
+    u18: Optional[bool] = filterform.cleaned_data["u18"]
+    if u18:
+        participants = participants.with_age_at_fahrt().filter(U18)
+    elif u18 is False:
+        participants = participants.with_age_at_fahrt().exclude(U18)
+
+    return participants
 
 
 @permission_required("fahrt.view_participants")
 def filtered_list(request: WSGIRequest) -> HttpResponse:
-    filtered_participants = request.session["filtered_participants"]
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
-    participants = Participant.objects.filter(semester=semester, id__in=filtered_participants).order_by("surname")
+    selection = Selection.from_request(request, Selection.FAHRT_FILTERED)
+    semester: Semester = request_semester(request)
+    participants = Participant.objects.filter(semester=semester, id__in=selection.id_list).order_by("surname")
 
     form = SelectMailForm(request.POST or None)
-    select_participant_form_set = formset_factory(
-        SelectParticipantForm,
-        extra=0,
-    )
-    participantforms = select_participant_form_set(
-        request.POST or None,
-        initial=[{"id": p.id, "selected": True} for p in participants],
-    )
+    select_participant_form_set = formset_factory(SelectParticipantForm, formset=SelectionFormSet, extra=0)
+    participantforms = select_participant_form_set(request.POST or None, rows=participants)
 
     if form.is_valid() and participantforms.is_valid():
         mail = form.cleaned_data["mail"]
-
-        selected_participants = []
-        for participant in participantforms:
-            try:
-                participant_id = participant.cleaned_data["id"]
-            except KeyError:
-                continue
-            try:
-                selected = participant.cleaned_data["selected"]
-            except KeyError:
-                selected = False
-            if selected:
-                selected_participants.append(participant_id)
-
-        request.session["selected_participants"] = selected_participants
-        return redirect("fahrt:send_mail", mail.id)
-
-    participants_and_select = []
-    for participant in participants:
-        for participant_form in participantforms:
-            if participant_form.initial["id"] == participant.id:
-                participants_and_select.append((participant, participant_form))
-                break
+        mail_selection = Selection.store(request, Selection.FAHRT_MAIL, participantforms.selected_ids())
+        return redirect(mail_selection.url("fahrt:send_mail", mail.id))
 
     context = {
-        "participants": participants_and_select,
+        "participants": participantforms.rows_and_forms(),
         "form": form,
         "participantforms": participantforms,
     }
@@ -6,21 +6,28 @@ from django.contrib import messages
 from django.contrib.auth.decorators import permission_required
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.handlers.wsgi import WSGIRequest
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.utils.translation import gettext_lazy as _
 from django_tex.response import PDFResponse
-from django_tex.shortcuts import render_to_pdf
 
 from settool_common import utils
-from settool_common.models import get_semester, Semester
+from settool_common.db import reporting_database
+from settool_common.models import request_semester, Semester
+from settool_common.tex import render_to_pdf
 
 from ..models import Participant
+from ..non_liability import merge_non_liability_forms, zip_non_liability_forms
+from ..reports import build_participants_report
 
 
 @permission_required("fahrt.view_participants")
-def export(request: WSGIRequest, file_format: str = "csv") -> Union[HttpResponse, PDFResponse]:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+@reporting_database()
+def export(
+    request: WSGIRequest,
+    file_format: str = "csv",
+) -> Union[HttpResponse, StreamingHttpResponse, PDFResponse]:
+    semester: Semester = request_semester(request)
     try:
         fahrt = semester.fahrt
     except ObjectDoesNotExist:
@@ -48,6 +55,49 @@ def export(request: WSGIRequest, file_format: str = "csv") -> Union[HttpResponse
     return render_to_pdf(request, "fahrt/tex/participants.tex", context, f"{filename}.pdf")
 
 
+@permission_required("fahrt.view_participants")
+@reporting_database()
+def export_kitchen(request: WSGIRequest) -> Union[HttpResponse, PDFResponse]:
+    semester: Semester = request_semester(request)
+    try:
+        fahrt = semester.fahrt
+    except ObjectDoesNotExist:
+        messages.error(request, _("Please setup the SETtings for the Fahrt"))
+        return redirect("fahrt:settings")
+    participants = Participant.objects.filter(semester=semester, status=Participant.STATUS_CONFIRMED)
+    context = {"report": build_participants_report(participants, fahrt), "fahrt": fahrt}
+    filename = f"fahrt_kitchen_{fahrt.semester}_{fahrt.date}_{time.strftime('%Y%m%d-%H%M')}"
+    return render_to_pdf(request, "fahrt/tex/kitchen.tex", context, f"{filename}.pdf")
+
+
+@permission_required("fahrt.view_participants")
+def export_non_liability_forms(request: WSGIRequest, file_format: str = "pdf") -> HttpResponse:
+    semester: Semester = request_semester(request)
+    try:
+        fahrt = semester.fahrt
+    except ObjectDoesNotExist:
+        messages.error(request, _("Please setup the SETtings for the Fahrt"))
+        return redirect("fahrt:settings")
+    participants = Participant.objects.filter(
+        semester=semester,
+        status=request.GET.get("status", Participant.STATUS_CONFIRMED),
+    ).order_by("surname", "firstname")
+    if request.GET.get("missing"):
+        participants = participants.filter(non_liability__isnull=True)
+    participants = participants.with_age_at_fahrt().select_related("semester__fahrt")
+    if not participants.exists():
+        messages.warning(request, _("There are no participants matching the selection"))
+        return redirect("fahrt:list_confirmed")
+
+    filename = f"non_liability_forms_{fahrt.semester}_{time.strftime('%Y%m%d-%H%M')}"
+    if file_format == "zip":
+        response = HttpResponse(zip_non_liability_forms(fahrt, participants), content_type="application/zip")
+        response["Content-Disposition"] = f'attachment; filename="{filename}.zip"'
+        return response
+    return PDFResponse(merge_non_liability_forms(fahrt, participants), filename=f"{filename}.pdf")
+
+
+@permission_required("fahrt.view_participants")
 def liability_form(_request: WSGIRequest, participant_pk: UUID) -> PDFResponse:
     participant: Participant = get_object_or_404(Participant, pk=participant_pk)
 
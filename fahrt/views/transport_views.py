@@ -10,7 +10,7 @@ from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils.translation import gettext_lazy as _
 
-from settool_common.models import get_semester, Semester
+from settool_common.models import request_semester, Semester
 
 from ..forms import (
     AddParticipantToTransportForm,
@@ -40,7 +40,7 @@ def get_transport_types(fahrt: Fahrt) -> list[tuple[str, str, int, Any]]:
 
 
 def transport_participant(request: WSGIRequest, participant_uuid: UUID) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     participant: Participant = get_object_or_404(Participant, pk=participant_uuid, status="confirmed")
     context = {
         "transport_types": get_transport_types(semester.fahrt),
@@ -50,7 +50,7 @@ def transport_participant(request: WSGIRequest, participant_uuid: UUID) -> HttpR
 
 
 def add_transport_option(request: WSGIRequest, participant_uuid: UUID, transport_type: int) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
 
     try:
         fahrt: Fahrt = semester.fahrt
@@ -102,7 +102,7 @@ def add_transport_option(request: WSGIRequest, participant_uuid: UUID, transport
 
 
 def add_transport_participant(request: WSGIRequest, participant_uuid: UUID, transport_pk: int) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     participant: Participant = get_object_or_404(Participant, pk=participant_uuid, status="confirmed")
     new_transport: Transportation = get_object_or_404(Transportation, id=transport_pk, fahrt=semester.fahrt)
 
@@ -128,7 +128,7 @@ def add_transport_participant(request: WSGIRequest, participant_uuid: UUID, tran
 
 @permission_required("fahrt.view_participants")
 def transport_mangagement(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     try:
         fahrt: Fahrt = semester.fahrt
     except ObjectDoesNotExist:
@@ -144,7 +144,7 @@ def transport_mangagement(request: WSGIRequest) -> HttpResponse:
 
 @permission_required("fahrt.view_participants")
 def add_transport_option_by_management(request: WSGIRequest, transport_type: int) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     if transport_type not in [Transportation.CAR, Transportation.TRAIN]:
         raise Http404()
     try:
@@ -170,7 +170,7 @@ def add_transport_option_by_management(request: WSGIRequest, transport_type: int
 
 @permission_required("fahrt.view_participants")
 def add_transport_participant_by_management(request: WSGIRequest, transport_pk: int) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     transport: Transportation = Transportation.objects.get(id=transport_pk)
     form = AddParticipantToTransportForm(request.POST or None, semester=semester)
     if form.is_valid():
@@ -195,7 +195,7 @@ def add_transport_participant_by_management(request: WSGIRequest, transport_pk:
 
 @permission_required("fahrt.view_participants")
 def edit_transport_participant_by_management(request: WSGIRequest, participant_uuid: UUID) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     participant: Participant = get_object_or_404(Participant, pk=participant_uuid, status="confirmed")
     transport: Optional[Transportation] = participant.transportation
 
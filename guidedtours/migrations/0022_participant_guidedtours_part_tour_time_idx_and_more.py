@@ -0,0 +1,21 @@
+# Generated by Django 4.1.13 on 2026-10-18 14:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("guidedtours", "0021_alter_tour_semester"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="participant",
+            index=models.Index(fields=["tour", "time"], name="guidedtours_part_tour_time_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="tour",
+            index=models.Index(fields=["semester", "date"], name="guidedtours_tour_sem_date_idx"),
+        ),
+    ]
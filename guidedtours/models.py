@@ -39,15 +39,23 @@ class TourMail(common_models.Mail):
         }
         return self.get_mail(context)
 
-    def send_mail_participant(self, participant):
-        context = {
+    @staticmethod
+    def participant_context(participant):
+        return {
             "vorname": participant.firstname,
             "tour": participant.tour.name,
             "zeit": participant.tour.date,
             "participant": participant,
             "tour_status": "Tour" if participant.on_the_tour else "Waitinglist",
         }
-        return self.send_mail(context, participant.email)
+
+    def send_mail_participant(self, participant):
+        return self.send_mail(self.participant_context(participant), participant.email)
+
+    def send_mass_participants(self, participants):
+        return self.send_mass(
+            (self.participant_context(participant), participant.email) for participant in participants
+        )
 
 
 class Tour(common_models.LoggedModelBase, common_models.SemesterModelBase):
@@ -58,6 +66,7 @@ class Tour(common_models.LoggedModelBase, common_models.SemesterModelBase):
                 "Can view and edit the list of participants",
             ),
         )
+        indexes = [models.Index(fields=["semester", "date"], name="guidedtours_tour_sem_date_idx")]
 
     name = models.CharField(max_length=200, verbose_name=_("Name"))
     description = models.TextField(null=True, blank=True, verbose_name=_("Description"))
@@ -97,6 +106,7 @@ class Tour(common_models.LoggedModelBase, common_models.SemesterModelBase):
 class Participant(common_models.LoggedModelBase):
     class Meta:
         unique_together = ("tour", "email")
+        indexes = [models.Index(fields=["tour", "time"], name="guidedtours_part_tour_time_idx")]
 
     tour = models.ForeignKey(Tour, on_delete=models.CASCADE, verbose_name=_("Tour"))
     firstname = models.CharField(max_length=200, verbose_name=_("First name"))
@@ -6,20 +6,22 @@ from django import forms
 from django.contrib import messages
 from django.contrib.auth.decorators import permission_required
 from django.core.handlers.wsgi import WSGIRequest
-from django.db.models import Q, QuerySet
+from django.db.models import F, Q, QuerySet
 from django.db.models.aggregates import Count
 from django.forms import formset_factory
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
 from django.utils.datetime_safe import date
 from django.utils.formats import date_format
 from django.utils.translation import gettext as _
 from django_tex.response import PDFResponse
-from django_tex.shortcuts import render_to_pdf
 
 from settool_common import utils
-from settool_common.models import get_semester, Semester
+from settool_common.db import reporting_database
+from settool_common.forms import SelectionFormSet
+from settool_common.models import request_semester, Selection, Semester
+from settool_common.tex import render_to_pdf
 
 from .forms import (
     FilterParticipantsForm,
@@ -35,7 +37,7 @@ from .models import Participant, Setting, Tour, TourMail
 
 @permission_required("guidedtours.view_participants")
 def list_tours(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     tours = semester.tour_set.all()
 
     context = {"tours": tours}
@@ -43,9 +45,10 @@ def list_tours(request: WSGIRequest) -> HttpResponse:
 
 
 @permission_required("guidedtours.view_participants")
+@reporting_database()
 def dashboard(request: WSGIRequest) -> HttpResponse:
     tours = list(
-        Tour.objects.filter(Q(semester=get_semester(request)) & Q(date__gte=date.today()))
+        Tour.objects.filter(Q(semester=request_semester(request)) & Q(date__gte=date.today()))
         .values("capacity", "name", "date")
         .annotate(registered=Count("participant"))
         .order_by("date"),
@@ -85,7 +88,7 @@ def view_tour(request: WSGIRequest, tour_pk: int) -> HttpResponse:
 
 @permission_required("guidedtours.view_participants")
 def add_tour(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
 
     form = TourForm(request.POST or None, semester=semester)
 
@@ -140,7 +143,7 @@ def del_tour(request: WSGIRequest, tour_pk: int) -> HttpResponse:
 
 @permission_required("guidedtours.view_participants")
 def filter_participants(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     participants: QuerySet[Participant] = Participant.objects.filter(tour__semester=semester).order_by("surname")
 
     filterform = FilterParticipantsForm(request.POST or None, semester=semester)
@@ -169,8 +172,8 @@ def filter_participants(request: WSGIRequest) -> HttpResponse:
         else:  # on_the_tour == "":
             filtered_participants = [p.id for p in participants]
 
-        request.session["filtered_participants"] = filtered_participants
-        return redirect("guidedtours:filtered_participants")
+        selection = Selection.store(request, Selection.GUIDEDTOURS_FILTERED, filtered_participants)
+        return redirect(selection.url("guidedtours:filtered_participants"))
 
     context = {
         "participants": participants,
@@ -181,49 +184,22 @@ def filter_participants(request: WSGIRequest) -> HttpResponse:
 
 @permission_required("guidedtours.view_participants")
 def filtered_list(request: WSGIRequest) -> HttpResponse:
-    filtered_participants = request.session["filtered_participants"]
+    selection = Selection.from_request(request, Selection.GUIDEDTOURS_FILTERED)
     participants = Participant.objects.filter(
-        id__in=filtered_participants,
+        id__in=selection.id_list,
     ).order_by("surname")
 
     form = SelectMailForm(request.POST or None)
-    select_participant_form_set = formset_factory(
-        SelectParticipantForm,
-        extra=0,
-    )
-    participantforms = select_participant_form_set(
-        request.POST or None,
-        initial=[{"id": p.id, "selected": True} for p in participants],
-    )
+    select_participant_form_set = formset_factory(SelectParticipantForm, formset=SelectionFormSet, extra=0)
+    participantforms = select_participant_form_set(request.POST or None, rows=participants)
 
     if form.is_valid() and participantforms.is_valid():
         mail = form.cleaned_data["mail"]
-
-        selected_participants = []
-        for participant in participantforms:
-            try:
-                participant_id = participant.cleaned_data["id"]
-            except KeyError:
-                continue
-            try:
-                selected = participant.cleaned_data["selected"]
-            except KeyError:
-                selected = False
-            if selected:
-                selected_participants.append(participant_id)
-
-        request.session["selected_participants"] = selected_participants
-        return redirect("guidedtours:send_mail", mail.id)
-
-    participants_and_select = []
-    for participant in participants:
-        for participant_form in participantforms:
-            if participant_form.initial["id"] == participant.id:
-                participants_and_select.append((participant, participant_form))
-                break
+        mail_selection = Selection.store(request, Selection.GUIDEDTOURS_MAIL, participantforms.selected_ids())
+        return redirect(mail_selection.url("guidedtours:send_mail", mail.id))
 
     context = {
-        "participants": participants_and_select,
+        "participants": participantforms.rows_and_forms(),
         "form": form,
         "participantforms": participantforms,
     }
@@ -285,17 +261,16 @@ def delete_mail(request: WSGIRequest, mail_pk: int) -> HttpResponse:
 @permission_required("guidedtours.view_participants")
 def send_mail(request: WSGIRequest, mail_pk: int) -> HttpResponse:
     mail = get_object_or_404(TourMail, pk=mail_pk)
-    selected_participants = request.session["selected_participants"]
+    selection = Selection.from_request(request, Selection.GUIDEDTOURS_MAIL)
     participants = Participant.objects.filter(
-        id__in=selected_participants,
+        id__in=selection.id_list,
     ).order_by("surname")
 
     subject, text, from_email = mail.get_mail_participant()
 
     form = forms.Form(request.POST or None)
     if form.is_valid():
-        for participant in participants:
-            mail.send_mail_participant(participant)
+        mail.send_mass_participants(participants.select_related("tour"))
         return redirect("guidedtours:filter_participants")
 
     context = {
@@ -310,12 +285,20 @@ def send_mail(request: WSGIRequest, mail_pk: int) -> HttpResponse:
 
 
 def signup(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     curr_settings: Setting = Setting.objects.get_or_create(semester=semester)[0]
-    tours = semester.tour_set.filter(
-        open_registration__lt=timezone.now(),
-        close_registration__gt=timezone.now(),
-    ).order_by("date")
+    # the places are counted with the tours instead of once per tour while rendering
+    tours = (
+        semester.tour_set.filter(
+            open_registration__lt=timezone.now(),
+            close_registration__gt=timezone.now(),
+        )
+        .annotate(
+            free_places=F("capacity") - Count("participant"),
+            waitinglist=Count("participant") - F("capacity"),
+        )
+        .order_by("date")
+    )
 
     if not tours:
         context: dict[str, Any] = {"semester": semester}
@@ -360,7 +343,7 @@ def signup_success(request: WSGIRequest) -> HttpResponse:
 
 @permission_required("guidedtours.view_participants")
 def signup_internal(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     curr_settings: Setting = Setting.objects.get_or_create(semester=semester)[0]
     tours = semester.tour_set.order_by("date")
 
@@ -392,7 +375,8 @@ def signup_internal(request: WSGIRequest) -> HttpResponse:
 
 
 @permission_required("guidedtours.view_participants")
-def export_tour(request: WSGIRequest, file_format: str, tour_pk: int) -> Union[HttpResponse, PDFResponse]:
+@reporting_database()
+def export_tour(request: WSGIRequest, file_format: str, tour_pk: int) -> Union[StreamingHttpResponse, PDFResponse]:
     tour = get_object_or_404(Tour, pk=tour_pk)
     participants = tour.participant_set.order_by("time")
     confirmed_participants = participants[: tour.capacity]
@@ -409,7 +393,7 @@ def export_tour(request: WSGIRequest, file_format: str, tour_pk: int) -> Union[H
 
 @permission_required("guidedtours.view_participants")
 def settings(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     curr_settings: Setting = Setting.objects.get_or_create(semester=semester)[0]
 
     form = SettingsAdminForm(request.POST or None, semester=semester, instance=curr_settings)
@@ -54,12 +54,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "settool_common.middleware.QueryCountMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.locale.LocaleMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "settool_common.middleware.SemesterMiddleware",
+    "settool_common.middleware.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "django.middleware.gzip.GZipMiddleware",
@@ -89,6 +92,10 @@ TEMPLATES = [
     },
 ]
 LATEX_INTERPRETER = "latexmk -pdf"
+# the preamble of templates/tex/base.tex is precompiled into a format (see settool_common.tex)
+LATEX_PRECOMPILED_PREAMBLE = True
+LATEX_FORMAT_DIR = os.path.join(BASE_DIR, "latex_formats")
+LATEX_FORMAT_BUILD_COMMAND = 'pdftex -ini -interaction=batchmode -jobname={name} "&pdflatex" mylatexformat.ltx {source}'
 
 WSGI_APPLICATION = "settool.wsgi.application"
 
@@ -101,6 +108,19 @@ DATABASES = {
         "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
     },
 }
+# read-only connection used by the dashboards and exports (see settool_common.db)
+REPORTING_DATABASE = "reporting"
+DATABASES[REPORTING_DATABASE] = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}
+DATABASE_ROUTERS = ["settool_common.db.ReportingRouter"]
+# applied to every new SQLite-connection (see settool_common.db)
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",  # readers and the writer do not block each other
+    "busy_timeout": 20000,  # ms a writer waits for the lock before "database is locked" is raised
+    "synchronous": "NORMAL",  # safe in WAL-mode, the last transactions may only be lost on power loss
+    "cache_size": -32000,  # KiB
+    "mmap_size": 256 * 1024 * 1024,  # bytes
+    "temp_store": "MEMORY",
+}
 DEFAULT_AUTO_FIELD = "django.db.models.AutoField"
 
 # Auth
@@ -152,9 +172,47 @@ STATICFILES_DIRS = [
 # Media files (QR-Codes, ...)
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+# Files with personal data (e.g. non-liability forms). They are not served, but only by permission-checked views
+PRIVATE_MEDIA_ROOT = os.path.join(BASE_DIR, "private_media")
+
+# Cache of compiled LaTeX-exports (see settool_common.tex). The exports contain personal data, thus it is not served
+PDF_CACHE_DIR = os.path.join(PRIVATE_MEDIA_ROOT, "pdf_cache")
+PDF_CACHE_MAX_SIZE = 256 * 1024 * 1024  # bytes
+PDF_CACHE_SCAN_INTERVAL = 100  # stores after which a process re-synchronises its estimate of the cache size
+
+# seconds until the process-level cache of the semesters is reloaded (see settool_common.models.semester_cache)
+SEMESTER_CACHE_TIMEOUT = 60
+
+# requests with more database-queries are logged as warning (see settool_common.middleware.QueryCountMiddleware)
+QUERY_COUNT_WARNING_THRESHOLD = 50
+
+# requests of superusers can be profiled with ?profile=1 (see settool_common.middleware.ProfilingMiddleware)
+PROFILE_DIR = os.path.join(BASE_DIR, "profiles")
+PROFILE_STATS_LIMIT = 80  # functions shown in the report
+
+# bearer-token required to scrape /metrics. If it is empty, the metrics are not exposed (see settool_common.metrics)
+METRICS_TOKEN = ""
+
+# Mail outbox (see settool_common.models.QueuedMail)
+MAIL_OUTBOX_BATCH_SIZE = 50
+MAIL_OUTBOX_MAX_ATTEMPTS = 6
+MAIL_OUTBOX_RETRY_DELAY = 60  # seconds, doubled after every failed attempt
+MAIL_OUTBOX_SENDING_TIMEOUT = 600  # seconds until a mail claimed by a crashed worker is released again
+MAIL_OUTBOX_RETENTION_DAYS = 14
+# If enabled, mails and the Fahrt registration mails are only queued and delivered by the background workers
+# (send_queued_mails/send_registration_mails or the cronjobs), which then have to run.
+# Otherwise they are delivered while the request is handled, i.e. the Fahrt-signup waits for LaTeX and the mailserver.
+# Failed deliveries stay in the outbox to be retried. Enable it wherever the workers run (e.g. staging, see README.md).
+MAIL_OUTBOX_BACKGROUND = False
+
+# Selections of participants/companies/giveaways (see settool_common.models.Selection)
+SELECTION_LIFETIME_HOURS = 24
 
 # cronjobs
 CRONJOBS = [
+    ("* * * * *", "settool_common.cron.fahrt_registration_cronjob"),  # Every minute
+    ("* * * * *", "settool_common.cron.mail_outbox_cronjob"),  # Every minute
     ("0 6 * * *", "settool_common.cron.reminder_cronjob"),  # At 06:00
+    ("30 * * * *", "settool_common.cron.selection_cronjob"),  # At minute 30
     ("5 0 * * 0", "settool_common.cron.privacy_cronjob"),  # At 05:00 on Sundays
 ]
@@ -17,3 +17,8 @@ DATABASES = {
         "PORT": "5432",
     },
 }
+DATABASES[REPORTING_DATABASE] = {  # noqa: F405
+    **DATABASES["default"],
+    "OPTIONS": {"options": "-c default_transaction_read_only=on"},
+    "TEST": {"MIRROR": "default"},
+}
@@ -16,10 +16,17 @@ else:
 
 DEBUG = os.getenv("DJANGO_DEBUG", "False") == "True"
 ALLOWED_HOSTS = os.getenv("DJANGO_ALLOWED_HOSTS", "").split(",")
+# prometheus scrapes /metrics via the ip of the pod (set by the downward-api in settool-deployment.yaml)
+if os.getenv("POD_IP"):
+    ALLOWED_HOSTS.append(os.environ["POD_IP"])
 
 WSGI_APPLICATION = "settool.staging_wsgi.application"
 
 SECRET_KEY = os.environ["DJANGO_SECRET_KEY"]
+# without a token /metrics is not exposed. Prometheus has to send it as bearer-token
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+# only enable this, if the send_queued_mails and send_registration_mails workers run (see settool-deployment.yaml)
+MAIL_OUTBOX_BACKGROUND = os.getenv("MAIL_OUTBOX_BACKGROUND", "False") == "True"
 # generate your own secret key using
 # import random, string
 # print("".join(random.choice(string.printable) for _ in range(50)))
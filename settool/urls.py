@@ -15,6 +15,8 @@ urlpatterns = [
     path("i18n/", include("django.conf.urls.i18n")),
     # index
     path("", TemplateView.as_view(template_name="main_index.html"), name="main-view"),
+    # monitoring
+    path("metrics", settool_common.views.export_metrics, name="metrics"),
     # settool_common: choose semester
     path("semester/", include("settool_common.urls")),
     # guided tours
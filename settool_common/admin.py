@@ -1,7 +1,8 @@
 from django.contrib import admin
 
-from .models import AnonymisationLog, Semester, Subject
+from .models import AnonymisationLog, QueuedMail, Semester, Subject
 
 admin.site.register(AnonymisationLog)
+admin.site.register(QueuedMail)
 admin.site.register(Semester)
 admin.site.register(Subject)
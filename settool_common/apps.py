@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class SettoolCommonConfig(AppConfig):
     name = "settool_common"
+
+    def ready(self):
+        # registers the configuration of new database-connections
+        import settool_common.db  # noqa: F401 pylint: disable=import-outside-toplevel,unused-import
@@ -15,7 +15,9 @@ import fahrt.models as m_fahrt
 import guidedtours.models as m_guidedtours
 import settool_common.models as m_common
 import tutors.models as m_tutors
+from settool_common.metrics import track_cronjob
 from settool_common.models import AnonymisationLog, current_semester, Semester
+from settool_common.tex import clear_pdf_cache
 from settool_common.utils import get_or_none
 
 
@@ -74,6 +76,24 @@ def fahrt_payment_reminder(semester: Semester, today: date) -> None:
             current_fahrt.mail_payment_deadline.send_mail_participant(participant)
 
 
+@track_cronjob
+def fahrt_registration_cronjob():
+    m_fahrt.Participant.send_pending_registration_mails()
+
+
+@track_cronjob
+def mail_outbox_cronjob():
+    while any(m_common.QueuedMail.deliver_due()):
+        pass
+    m_common.QueuedMail.purge_sent()
+
+
+@track_cronjob
+def selection_cronjob():
+    m_common.Selection.purge_expired()
+
+
+@track_cronjob
 def reminder_cronjob():
     today = date.today()
     semester = current_semester()
@@ -103,6 +123,8 @@ def anonymize_fahrt(semester: Semester, log_name: str) -> bool:
         # fahrt is save to anonymize for this semester
         m_fahrt.Transportation.objects.filter(fahrt__semester=semester).delete()
         m_fahrt.TransportationComment.objects.filter(sender__semester=semester).delete()
+        # the staged bank-transactions contain names and IBANs of the payers
+        m_fahrt.BankImport.objects.filter(fahrt__semester=semester).delete()
         semester_participants = m_fahrt.Participant.objects.filter(semester=semester)
         semester_participants.exclude(status=m_fahrt.Participant.STATUS_CONFIRMED).delete()
         participant: m_fahrt.Participant
@@ -118,6 +140,9 @@ def anonymize_fahrt(semester: Semester, log_name: str) -> bool:
             participant.publish_contact_to_other_paricipants = False
             participant.mailinglist = False
             participant.comment = ""
+            if participant.non_liability_form:
+                participant.non_liability_form.delete(save=False)
+            participant.non_liability_form_hash = ""
             participant.save()
         return True
     return False
@@ -168,6 +193,7 @@ def privacy_helper(semester: Semester, anonymisation_method: Any, log_name: str)
     try:
         if should_anonimise and anonymisation_method(semester, log_name):
             AnonymisationLog.objects.create(semester=semester, anon_log_str=log_name)
+            clear_pdf_cache()  # cached exports might still contain the personal data
             subject = f"[SUCCESS] Anonymisation of {log_name} for {semester}"
             text = f"Anonymization of {log_name} was successfully executed for {semester}"
             if settings.DEBUG:
@@ -185,6 +211,7 @@ def privacy_helper(semester: Semester, anonymisation_method: Any, log_name: str)
         send_mail(subject, text, m_common.Mail.SET, [m_common.Mail.SET_TUTOR], fail_silently=False)
 
 
+@track_cronjob
 def privacy_cronjob():
     for semester in Semester.objects.all():
         # anonymize_bags is not necessary, as this does not have any personal data
@@ -0,0 +1,79 @@
+"""
+Tuning of local SQLite-databases for multiple workers and the read-only reporting database.
+
+Every SQLite-connection (Postgres-connections are not touched) is configured with SQLITE_PRAGMAS when it is created.
+In WAL-mode readers and the (single) writer do not block each other and the busy timeout lets concurrent writers wait
+for the lock instead of failing.
+
+Dashboards and exports only read, but issue many and large queries. Wrapped in reporting_database(), their reads are
+routed to REPORTING_DATABASE, a read-only connection (for Postgres this may be a replica).
+While the default connection is inside a transaction, reads stay there, as the reporting connection can not see its
+uncommitted writes. This also keeps TestCase (which wraps every test in a transaction) on the default database.
+"""
+import contextlib
+import threading
+from typing import Any, Iterator, Optional
+
+from django.conf import settings
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_state = threading.local()
+
+
+@receiver(connection_created)
+def configure_sqlite(sender: Any, connection: Any, **kwargs: Any) -> None:
+    _ = sender
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {pragma} = {value}")
+        if connection.alias == settings.REPORTING_DATABASE:
+            cursor.execute("PRAGMA query_only = ON")
+
+
+@contextlib.contextmanager
+def reporting_database() -> Iterator[None]:
+    """routes the reads of this thread to the read-only REPORTING_DATABASE. Can be used as decorator of a view"""
+    previous = getattr(_state, "reporting", False)
+    _state.reporting = True
+    try:
+        yield
+    finally:
+        _state.reporting = previous
+
+
+class ReportingRouter:
+    """routes reads inside reporting_database() to REPORTING_DATABASE. Writes always go to the default database"""
+
+    def db_for_read(self, model: Any, **hints: Any) -> Optional[str]:
+        _ = model, hints
+        if not getattr(_state, "reporting", False) or settings.REPORTING_DATABASE not in settings.DATABASES:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return settings.REPORTING_DATABASE
+
+    def db_for_write(self, model: Any, **hints: Any) -> Optional[str]:
+        _ = model
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db == settings.REPORTING_DATABASE:
+            # objects loaded from the reporting database would otherwise be saved there
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1: Any, obj2: Any, **hints: Any) -> Optional[bool]:
+        _ = hints
+        # both databases contain the same data
+        databases = {obj1._state.db, obj2._state.db}
+        if databases <= {DEFAULT_DB_ALIAS, settings.REPORTING_DATABASE}:
+            return True
+        return None
+
+    def allow_migrate(self, db: str, app_label: str, **hints: Any) -> Optional[bool]:
+        _ = app_label, hints
+        if db == settings.REPORTING_DATABASE:
+            return False
+        return None
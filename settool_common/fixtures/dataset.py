@@ -0,0 +1,406 @@
+"""
+Reproducible synthetic datasets of configurable size for benchmarks and load-tests.
+All objects are inserted with bulk_create in chunks, thus even large semesters are generated in seconds.
+"""
+import contextlib
+import dataclasses
+import itertools
+import random
+import uuid
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Iterable, Iterator, Optional
+
+from django.db import connection, connections, models, transaction
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+import bags.models
+import fahrt.models
+import guidedtours.models
+import settool_common.models
+import tutors.models
+
+FIRSTNAMES = ("Anna", "Ben", "Clara", "David", "Emma", "Felix", "Greta", "Hannes", "Ida", "Jonas", "Kim", "Lena")
+SURNAMES = ("Bauer", "Fischer", "Hofmann", "Koch", "Meyer", "Müller", "Richter", "Schmidt", "Wagner", "Weber")
+ALLERGIES = ("", "", "", "", "Nüsse", "Laktose", "Gluten")
+
+
+@dataclass
+class DatasetSize:
+    semesters: int = 1
+    subjects: int = 10
+    participants: int = 300  # fahrt-participants per semester
+    tours: int = 20  # per semester
+    tour_participants: int = 15  # per tour
+    tutors: int = 200  # per semester
+    questions: int = 3  # per semester
+    events: int = 5  # per semester
+    tasks: int = 30  # per semester
+    tutors_per_task: int = 8
+    companies: int = 150  # per semester
+    giveaway_groups: int = 10  # per semester
+    giveaways: int = 1  # per company
+
+
+def add_dataset_size_arguments(parser: Any) -> None:
+    """adds an option per field of DatasetSize to the parser of a management command"""
+    for field in dataclasses.fields(DatasetSize):
+        parser.add_argument(
+            f"--{field.name.replace('_', '-')}",
+            type=int,
+            default=field.default,
+            help=f"default: {field.default}",
+        )
+
+
+def dataset_size_from_options(options: dict[str, Any]) -> DatasetSize:
+    return DatasetSize(**{field.name: options[field.name] for field in dataclasses.fields(DatasetSize)})
+
+
+@contextlib.contextmanager
+def test_database(sqlite_file: Optional[str] = None) -> Iterator[None]:
+    """
+    creates an empty test-database (like the testrunner) and destroys it afterwards.
+    SQLite test-databases are in-memory by default, which hides the locking of concurrent writers. sqlite_file creates
+    the test-database in this file instead.
+    Test-mirrors of the default database (e.g. the reporting database) are pointed to the test-database.
+    """
+    if sqlite_file and connection.vendor == "sqlite":
+        connection.settings_dict["TEST"]["NAME"] = sqlite_file
+    mirrors = [
+        alias for alias in connections if connections[alias].settings_dict["TEST"].get("MIRROR") == connection.alias
+    ]
+    mirror_settings = {alias: connections[alias].settings_dict for alias in mirrors}
+    setup_test_environment()
+    old_name: Optional[str] = None
+    try:
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        for alias in mirrors:
+            connections[alias].close()
+            connections[alias].creation.set_as_test_mirror(connection.settings_dict)
+        yield
+    finally:
+        for alias in mirrors:
+            connections[alias].close()
+            connections[alias].settings_dict = mirror_settings[alias]
+        if old_name is not None:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def _bulk_create(model: type[models.Model], objects: Iterable[Any], chunk_size: int) -> int:
+    created = 0
+    iterator = iter(objects)
+    while chunk := list(itertools.islice(iterator, chunk_size)):
+        model.objects.bulk_create(chunk)
+        created += len(chunk)
+    return created
+
+
+def _semesters(count: int) -> list[settool_common.models.Semester]:
+    """the current semester and the count-1 semesters before it"""
+    current = settool_common.models.current_semester()
+    semesters = [current]
+    semester, year = current.semester, current.year
+    for _ in range(count - 1):
+        if semester == settool_common.models.Semester.SUMMER:
+            semester, year = settool_common.models.Semester.WINTER, year - 1
+        else:
+            semester = settool_common.models.Semester.SUMMER
+        semesters.append(settool_common.models.Semester.objects.get_or_create(semester=semester, year=year)[0])
+    return semesters
+
+
+# every semester-bound table the generator writes into, in an order in which they can be deleted
+SEMESTER_MODELS: tuple[type[models.Model], ...] = (
+    fahrt.models.Fahrt,
+    fahrt.models.Participant,
+    guidedtours.models.Tour,
+    tutors.models.Task,
+    tutors.models.Event,
+    tutors.models.Question,
+    tutors.models.Tutor,
+    tutors.models.SubjectTutorCountAssignment,
+    bags.models.Company,
+    bags.models.GiveawayGroup,
+)
+
+
+def semester_has_data(semester: settool_common.models.Semester) -> bool:
+    return any(model.objects.filter(semester=semester).exists() for model in SEMESTER_MODELS)
+
+
+def clear_semester(semester: settool_common.models.Semester) -> None:
+    for model in SEMESTER_MODELS:
+        model.objects.filter(semester=semester).delete()
+
+
+class DatasetGenerator:
+    def __init__(self, size: DatasetSize, seed: int = 0, chunk_size: int = 1000):
+        self.size = size
+        self.rng = random.Random(seed)
+        self.chunk_size = chunk_size
+        self.counts: dict[str, int] = {}
+        self.now = timezone.now().replace(minute=0, second=0, microsecond=0)
+
+    def _uuid(self) -> uuid.UUID:
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def _name(self) -> tuple[str, str]:
+        return self.rng.choice(FIRSTNAMES), self.rng.choice(SURNAMES)
+
+    def _create(self, model: type[models.Model], objects: Iterable[Any]) -> None:
+        created = _bulk_create(model, objects, self.chunk_size)
+        self.counts[model._meta.label] = self.counts.get(model._meta.label, 0) + created
+
+    @transaction.atomic
+    def generate(self, replace: bool = False) -> dict[str, int]:
+        """generates the dataset into the current semester and the semesters before it. Returns the created counts"""
+        semesters = _semesters(self.size.semesters)
+        for semester in semesters:
+            if replace:
+                clear_semester(semester)
+            elif semester_has_data(semester):
+                raise ValueError(f"{semester} already contains data")
+        subjects = self._subjects()
+        for offset, semester in enumerate(semesters):
+            # older semesters are half a year apart
+            semester_start = self.now - timedelta(days=182 * offset)
+            self._generate_fahrt(semester, subjects, semester_start)
+            self._generate_guidedtours(semester, subjects, semester_start)
+            self._generate_tutors(semester, subjects, semester_start)
+            self._generate_bags(semester)
+        return self.counts
+
+    def _subjects(self) -> list[settool_common.models.Subject]:
+        course_bundle, _created = settool_common.models.CourseBundle.objects.get_or_create(name="Synthetic")
+        existing = {
+            subject.subject for subject in settool_common.models.Subject.objects.filter(course_bundle=course_bundle)
+        }
+        degrees = (settool_common.models.Subject.BACHELOR, settool_common.models.Subject.MASTER)
+        self._create(
+            settool_common.models.Subject,
+            (
+                settool_common.models.Subject(
+                    course_bundle=course_bundle,
+                    degree=degrees[i % 2],
+                    subject=f"Subject {i:03}",
+                )
+                for i in range(self.size.subjects)
+                if f"Subject {i:03}" not in existing
+            ),
+        )
+        return list(settool_common.models.Subject.objects.filter(course_bundle=course_bundle).order_by("subject"))
+
+    def _generate_fahrt(self, semester, subjects, semester_start) -> None:
+        fahrt_date = (semester_start + timedelta(days=30)).date()
+        fahrt.models.Fahrt.objects.create(
+            semester=semester,
+            date=fahrt_date,
+            open_registration=semester_start - timedelta(days=10),
+            close_registration=semester_start + timedelta(days=20),
+        )
+        statuses = ("confirmed", "confirmed", "confirmed", "registered", "waitinglist", "cancelled")
+
+        def participants() -> Iterator[fahrt.models.Participant]:
+            for i in range(self.size.participants):
+                firstname, surname = self._name()
+                status = self.rng.choice(statuses)
+                yield fahrt.models.Participant(
+                    id=self._uuid(),
+                    semester=semester,
+                    gender=self.rng.choice(("male", "female", "diverse")),
+                    firstname=firstname,
+                    surname=surname,
+                    birthday=fahrt_date - timedelta(days=self.rng.randint(16 * 365, 30 * 365)),
+                    email=f"participant{i}@example.com",
+                    mobile=f"+49 151 {i:07}",
+                    subject=self.rng.choice(subjects),
+                    nutrition=self.rng.choice(("normal", "normal", "vegeterian", "vegan")),
+                    allergies=self.rng.choice(ALLERGIES),
+                    non_liability=fahrt_date - timedelta(days=5) if self.rng.random() < 0.5 else None,
+                    paid=fahrt_date - timedelta(days=10) if status == "confirmed" and self.rng.random() < 0.6 else None,
+                    payment_deadline=fahrt_date - timedelta(days=3) if status == "confirmed" else None,
+                    status=status,
+                    mailinglist=self.rng.random() < 0.3,
+                )
+
+        self._create(fahrt.models.Participant, participants())
+
+    def _generate_guidedtours(self, semester, subjects, semester_start) -> None:
+        self._create(
+            guidedtours.models.Tour,
+            (
+                guidedtours.models.Tour(
+                    semester=semester,
+                    name=f"Tour {i}",
+                    date=semester_start + timedelta(days=i % 10, hours=9 + i % 8),
+                    capacity=self.rng.randint(5, 30),
+                    open_registration=semester_start - timedelta(days=10),
+                    close_registration=semester_start + timedelta(days=i % 10),
+                )
+                for i in range(self.size.tours)
+            ),
+        )
+        tours = list(guidedtours.models.Tour.objects.filter(semester=semester))
+
+        def participants() -> Iterator[guidedtours.models.Participant]:
+            for tour in tours:
+                for i in range(self.size.tour_participants):
+                    firstname, surname = self._name()
+                    yield guidedtours.models.Participant(
+                        tour=tour,
+                        firstname=firstname,
+                        surname=surname,
+                        email=f"tour{i}@example.com",
+                        phone=f"+49 151 {i:07}",
+                        subject=self.rng.choice(subjects),
+                    )
+
+        self._create(guidedtours.models.Participant, participants())
+
+    def _generate_tutors(self, semester, subjects, semester_start) -> None:
+        statuses = [status for status, _label in tutors.models.Tutor.STATUS_OPTIONS]
+
+        def tutor_objects() -> Iterator[tutors.models.Tutor]:
+            for i in range(self.size.tutors):
+                first_name, last_name = self._name()
+                yield tutors.models.Tutor(
+                    id=self._uuid(),
+                    semester=semester,
+                    first_name=first_name,
+                    last_name=last_name,
+                    email=f"tutor{i}@example.com",
+                    birthday=date(1995, 1, 1) + timedelta(days=self.rng.randint(0, 3650)),
+                    subject=self.rng.choice(subjects),
+                    matriculation_number=f"{i:08}",
+                    tshirt_size=self.rng.choice(("S", "M", "L", "XL", "XXL")),
+                    tshirt_girls_cut=self.rng.random() < 0.3,
+                    status=self.rng.choice(statuses),
+                )
+
+        self._create(tutors.models.Tutor, tutor_objects())
+        # the batch-actions need a wish per subject
+        self._create(
+            tutors.models.SubjectTutorCountAssignment,
+            (
+                tutors.models.SubjectTutorCountAssignment(
+                    semester=semester,
+                    subject=subject,
+                    wanted=self.size.tutors // len(subjects),
+                    waitlist=self.size.tutors // len(subjects) // 4,
+                )
+                for subject in subjects
+            ),
+        )
+        tutor_ids = list(
+            tutors.models.Tutor.objects.filter(semester=semester).order_by("id").values_list("id", flat=True),
+        )
+
+        self._create(
+            tutors.models.Question,
+            (
+                tutors.models.Question(id=self._uuid(), semester=semester, question=f"Question {i}")
+                for i in range(self.size.questions)
+            ),
+        )
+        questions = list(tutors.models.Question.objects.filter(semester=semester).order_by("id"))
+        answers = [choice for choice, _label in tutors.models.Answer.ANSWERS]
+        self._create(
+            tutors.models.Answer,
+            (
+                tutors.models.Answer(tutor_id=tutor_id, question=question, answer=self.rng.choice(answers))
+                for tutor_id in tutor_ids
+                for question in questions
+            ),
+        )
+
+        self._create(
+            tutors.models.Event,
+            (
+                tutors.models.Event(
+                    id=self._uuid(),
+                    semester=semester,
+                    name=f"Event {i}",
+                    begin=semester_start + timedelta(days=i),
+                    end=semester_start + timedelta(days=i, hours=8),
+                    meeting_point="MI",
+                )
+                for i in range(self.size.events)
+            ),
+        )
+        events = list(tutors.models.Event.objects.filter(semester=semester).order_by("id"))
+        if not events:
+            return
+        tasks = []
+        for i in range(self.size.tasks):
+            event = events[i % len(events)]
+            begin = event.begin + timedelta(hours=i % 8)
+            tasks.append(
+                tutors.models.Task(
+                    id=self._uuid(),
+                    semester=semester,
+                    event=event,
+                    name=f"Task {i}",
+                    begin=begin,
+                    end=begin + timedelta(hours=1),
+                    meeting_point="MI",
+                    min_tutors=self.size.tutors_per_task // 2,
+                    max_tutors=self.size.tutors_per_task,
+                ),
+            )
+        self._create(tutors.models.Task, tasks)
+        self._create(
+            tutors.models.TutorAssignment,
+            (
+                tutors.models.TutorAssignment(task=task, tutor_id=tutor_id)
+                for task in tasks
+                for tutor_id in self.rng.sample(tutor_ids, min(self.size.tutors_per_task, len(tutor_ids)))
+            ),
+        )
+
+    def _generate_bags(self, semester) -> None:
+        def companies() -> Iterator[bags.models.Company]:
+            for i in range(self.size.companies):
+                firstname, surname = self._name()
+                email_sent = self.rng.random() < 0.8
+                yield bags.models.Company(
+                    semester=semester,
+                    name=f"Company {i:04}",
+                    contact_gender=self.rng.choice(("Herr", "Frau", "")),
+                    contact_firstname=firstname,
+                    contact_lastname=surname,
+                    email=f"company{i}@example.com",
+                    email_sent=email_sent,
+                    email_sent_success=email_sent and self.rng.random() < 0.9,
+                    promise=self.rng.choice((True, False, None)),
+                    last_year=self.rng.random() < 0.5,
+                    contact_again=self.rng.choice((True, False, None)),
+                )
+
+        self._create(bags.models.Company, companies())
+        self._create(
+            bags.models.GiveawayGroup,
+            (bags.models.GiveawayGroup(semester=semester, name=f"Group {i}") for i in range(self.size.giveaway_groups)),
+        )
+        # the pools of the random choices are ordered, so a seed always generates the same dataset
+        company_ids = list(
+            bags.models.Company.objects.filter(semester=semester).order_by("id").values_list("id", flat=True),
+        )
+        group_ids = list(
+            bags.models.GiveawayGroup.objects.filter(semester=semester).order_by("id").values_list("id", flat=True),
+        )
+        self._create(
+            bags.models.Giveaway,
+            (
+                bags.models.Giveaway(
+                    company_id=company_id,
+                    group_id=self.rng.choice(group_ids) if group_ids else None,
+                    item_count=self.rng.randint(0, 2000),
+                    arrived=self.rng.random() < 0.5,
+                )
+                for company_id in company_ids
+                for _ in range(self.size.giveaways)
+            ),
+        )
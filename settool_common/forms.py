@@ -1,4 +1,7 @@
+from typing import Any, Callable, Iterable
+
 from django import forms
+from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 
 from bags.models import BagMail
@@ -54,6 +57,19 @@ class MailForm(forms.ModelForm):
         mails = self.get_mails()
         return list(mails.keys())
 
+    def clean(self):
+        cleaned_data = super().clean()
+        poss_senders_for_user: dict[str, type[Mail]] = {
+            sender: klass for (sender, _label), klass in self.get_mails().items()
+        }
+        klass = poss_senders_for_user.get(cleaned_data.get("sender"))
+        if klass and "subject" in cleaned_data and "text" in cleaned_data:
+            try:
+                klass.validate_placeholders(cleaned_data["subject"], cleaned_data["text"])
+            except ValidationError as error:
+                self.add_error(None, error)
+        return cleaned_data
+
     def save(self, commit: bool = True) -> Mail:
         mail: Mail = super().save(commit=False)
         poss_senders_for_user: dict[str, type[Mail]] = {
@@ -77,6 +93,55 @@ class SelectMailForm(forms.Form):
     mail = forms.ModelChoiceField(queryset=Mail.objects.all(), label=_("Email template:"))
 
 
+class SelectionFormSet(forms.BaseFormSet):
+    """
+    Formset of forms with the fields id and selected, one for each row.
+    Rows and forms are paired via a dict keyed by id, so pairing and validating the selection is linear in the rows.
+    Use it via formset_factory(SelectForm, formset=SelectionFormSet, extra=0).
+    """
+
+    def __init__(
+        self,
+        data: Any = None,
+        *,
+        rows: Iterable[Any],
+        selected: Callable[[Any], bool] = lambda _row: True,
+        **kwargs: Any,
+    ) -> None:
+        self.rows: list[Any] = list(rows)
+        self.initially_selected: dict[Any, bool] = {row.id: selected(row) for row in self.rows}
+        initial = [{"id": row_id, "selected": value} for row_id, value in self.initially_selected.items()]
+        super().__init__(data, initial=initial, **kwargs)
+
+    def rows_and_forms(self) -> list[tuple[Any, forms.Form]]:
+        # a stale POST (rows were removed since the page was loaded) has more forms than rows, they have no initial
+        forms_by_id = {form.initial["id"]: form for form in self.forms[: len(self.rows)]}
+        return [(row, forms_by_id[row.id]) for row in self.rows if row.id in forms_by_id]
+
+    def selection(self) -> dict[Any, bool]:
+        """the submitted selection by id. Forms for ids, which are not in the rows, are ignored"""
+        selection: dict[Any, bool] = {}
+        for form in self:
+            row_id = form.cleaned_data.get("id")
+            if row_id in self.initially_selected:
+                selection[row_id] = form.cleaned_data.get("selected", False)
+        return selection
+
+    def selected_ids(self) -> list[Any]:
+        return [row_id for row_id, selected in self.selection().items() if selected]
+
+    def changed_ids(self) -> tuple[list[Any], list[Any]]:
+        """the ids of the rows, which were selected and the ids of the rows, which were deselected"""
+        newly_selected: list[Any] = []
+        newly_deselected: list[Any] = []
+        for row_id, selected in self.selection().items():
+            if selected and not self.initially_selected[row_id]:
+                newly_selected.append(row_id)
+            elif not selected and self.initially_selected[row_id]:
+                newly_deselected.append(row_id)
+        return newly_selected, newly_deselected
+
+
 def produce_csv_file_upload_field(fields):
     return forms.FileField(
         allow_empty_file=False,
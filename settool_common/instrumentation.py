@@ -0,0 +1,52 @@
+"""
+Instrumentation of the database-queries issued while handling a request.
+"""
+import contextlib
+import time
+from typing import Any, Callable, Iterator, Optional
+
+from django.db import connections
+
+
+class QueryStats:
+    """execute_wrapper (see django.db.backends.base.base.BaseDatabaseWrapper), which counts and times queries"""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0  # seconds
+
+    def __call__(self, execute: Callable[..., Any], sql: str, params: Any, many: bool, context: dict[str, Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class QueryLog(QueryStats):
+    """QueryStats, which additionally keeps every query with its parameters and duration"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.queries: list[tuple[str, Any, float]] = []
+
+    def __call__(self, execute: Callable[..., Any], sql: str, params: Any, many: bool, context: dict[str, Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.duration += duration
+            self.count += 1
+            self.queries.append((sql, params, duration))
+
+
+@contextlib.contextmanager
+def record_queries(stats: Optional[QueryStats] = None) -> Iterator[QueryStats]:
+    """records the queries of all database-aliases issued in this thread"""
+    stats = stats or QueryStats()
+    with contextlib.ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(stats))
+        yield stats
@@ -0,0 +1,48 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from django_tex.core import render_template_with_context
+
+from settool_common import tex
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the compile latency of a LaTeX-export with and without the precompiled preamble. "
+        "The PDF cache is bypassed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--template", default="tutors/tex/tshirts.tex", help="tex-template to compile")
+        parser.add_argument("--runs", type=int, default=5, help="compiles per variant")
+
+    def _measure(self, source: str, template_name: str, runs: int) -> list[float]:
+        durations = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            tex.compile_source_to_pdf_uncached(source, template_name=template_name)
+            durations.append(time.perf_counter() - start)
+        return durations
+
+    def handle(self, *args, **options):
+        template_name = options["template"]
+        source = render_template_with_context(template_name, {})
+
+        with override_settings(LATEX_PRECOMPILED_PREAMBLE=True):
+            start = time.perf_counter()
+            if tex.get_preamble_format(source) is None:
+                raise CommandError("The preamble format could not be built. Is mylatexformat installed?")
+            self.stdout.write(f"format available after {time.perf_counter() - start:.3f}s")
+            with_format = self._measure(source, template_name, options["runs"])
+        with override_settings(LATEX_PRECOMPILED_PREAMBLE=False):
+            without_format = self._measure(source, template_name, options["runs"])
+
+        for name, durations in (("without format", without_format), ("with format", with_format)):
+            self.stdout.write(
+                f"{name:>15}: median {statistics.median(durations):.3f}s, "
+                f"min {min(durations):.3f}s, max {max(durations):.3f}s",
+            )
+        speedup = statistics.median(without_format) / statistics.median(with_format)
+        self.stdout.write(f"speedup: {speedup:.2f}x")
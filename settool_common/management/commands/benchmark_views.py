@@ -0,0 +1,192 @@
+import json
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+import guidedtours.models
+import tutors.models
+from settool_common.fixtures.dataset import (
+    add_dataset_size_arguments,
+    dataset_size_from_options,
+    DatasetGenerator,
+    test_database,
+)
+from settool_common.instrumentation import record_queries
+from settool_common.models import current_semester
+from settool_common.settings import SEMESTER_SESSION_KEY
+from settool_common.tex import clear_pdf_cache
+
+
+def _first_task_pk() -> Any:
+    return tutors.models.Task.objects.filter(semester=current_semester()).order_by("begin").values_list("pk")[0][0]
+
+
+def _first_tour_pk() -> Any:
+    return guidedtours.models.Tour.objects.filter(semester=current_semester()).order_by("date").values_list("pk")[0][0]
+
+
+# name -> function returning the url. The urls are resolved after the dataset was generated
+BENCHMARKED_PAGES: dict[str, Callable[[], str]] = {
+    "fahrt:dashboard": lambda: reverse("fahrt:dashboard"),
+    "fahrt:list_confirmed": lambda: reverse("fahrt:list_confirmed"),
+    "fahrt:export csv": lambda: reverse("fahrt:export", args=["csv"]),
+    "fahrt:export pdf": lambda: reverse("fahrt:export", args=["pdf"]),
+    "tutors:dashboard": lambda: reverse("tutors:dashboard"),
+    "tutors:list_status_all": lambda: reverse("tutors:list_status_all"),
+    "tutors:view_task": lambda: reverse("tutors:view_task", args=[_first_task_pk()]),
+    "tutors:batch_accept": lambda: reverse("tutors:batch_accept"),
+    "tutors:export_tutors csv": lambda: reverse("tutors:export_tutors", args=["csv"]),
+    "tutors:export_tutors pdf": lambda: reverse("tutors:export_tutors", args=["pdf"]),
+    "bags:dashboard": lambda: reverse("bags:dashboard"),
+    "bags:list_companys": lambda: reverse("bags:list_companys"),
+    "bags:export_csv": lambda: reverse("bags:export_csv"),
+    "guidedtours:signup": lambda: reverse("guidedtours:signup"),
+    "guidedtours:filter_participants": lambda: reverse("guidedtours:filter_participants"),
+    "guidedtours:export_tour csv": lambda: reverse("guidedtours:export_tour", args=["csv", _first_tour_pk()]),
+    "guidedtours:export_tour pdf": lambda: reverse("guidedtours:export_tour", args=["pdf", _first_tour_pk()]),
+}
+# pages served from the PDF-cache after the first request. Their cold (cache cleared before every request) and warm
+# latency is reported separately
+PDF_PAGES = frozenset(
+    {
+        "fahrt:export pdf",
+        "tutors:export_tutors pdf",
+        "guidedtours:export_tour pdf",
+    }
+)
+
+
+def _get(client: Client, url: str) -> int:
+    response: Any = client.get(url)
+    if response.streaming:
+        for _chunk in response.streaming_content:
+            pass
+    return response.status_code
+
+
+def _percentile(durations: list[float], percentile: int) -> float:
+    if len(durations) == 1:
+        return durations[0]
+    return statistics.quantiles(durations, n=100, method="inclusive")[percentile - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the key pages and exports against a generated dataset in a temporary test-database. "
+        "Reports p50/p95 latency, query counts and peak memory per page as JSON."
+    )
+
+    def add_arguments(self, parser):
+        add_dataset_size_arguments(parser)
+        parser.add_argument("--seed", type=int, default=0, help="seed of the dataset")
+        parser.add_argument("--runs", type=int, default=20, help="timed requests per page")
+        parser.add_argument("--warmup", type=int, default=2, help="untimed requests per page")
+        parser.add_argument("--page", action="append", choices=list(BENCHMARKED_PAGES), help="only these pages")
+        parser.add_argument("--output", help="file to write the JSON-report to (default: stdout)")
+
+    @staticmethod
+    def _time_page(client: Client, url: str, runs: int, before_each: Callable[[], None]) -> dict[str, Any]:
+        durations = []
+        status_code = 0
+        for _ in range(runs):
+            before_each()
+            start = time.perf_counter()
+            status_code = _get(client, url)
+            durations.append(time.perf_counter() - start)
+        return {
+            "status_code": status_code,
+            "p50_ms": round(_percentile(durations, 50) * 1000, 2),
+            "p95_ms": round(_percentile(durations, 95) * 1000, 2),
+            "mean_ms": round(statistics.mean(durations) * 1000, 2),
+        }
+
+    def _benchmark_page(self, client: Client, url: str, runs: int, warmup: int, cached: bool) -> dict[str, Any]:
+        for _ in range(warmup):
+            _get(client, url)
+
+        if cached:
+            cold = self._time_page(client, url, runs, before_each=clear_pdf_cache)
+            timings = {"cold": cold, "warm": self._time_page(client, url, runs, before_each=lambda: None)}
+        else:
+            timings = self._time_page(client, url, runs, before_each=lambda: None)
+
+        with record_queries() as stats:
+            _get(client, url)
+
+        # tracemalloc slows down the request, thus the memory is measured in a separate request
+        tracemalloc.start()
+        try:
+            _get(client, url)
+            _current, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            "url": url,
+            **timings,
+            "queries": stats.count,
+            "db_ms": round(stats.duration * 1000, 2),
+            "peak_memory_kib": round(peak_memory / 1024, 1),
+        }
+
+    def _benchmark(self, options: dict[str, Any]) -> dict[str, Any]:
+        size = dataset_size_from_options(options)
+        start = time.perf_counter()
+        counts = DatasetGenerator(size, seed=options["seed"]).generate()
+        self.stderr.write(f"generated the dataset in {time.perf_counter() - start:.1f}s")
+
+        user = get_user_model().objects.create_superuser("benchmark", "benchmark@example.com", "benchmark")
+        client = Client()
+        client.force_login(user)
+        session = client.session
+        session[SEMESTER_SESSION_KEY] = current_semester().pk
+        session.save()
+
+        pages = {}
+        for name in options["page"] or BENCHMARKED_PAGES:
+            self.stderr.write(f"benchmarking {name}")
+            try:
+                pages[name] = self._benchmark_page(
+                    client,
+                    BENCHMARKED_PAGES[name](),
+                    options["runs"],
+                    options["warmup"],
+                    cached=name in PDF_PAGES,
+                )
+            # pylint: disable=broad-except
+            except Exception as exception:  # e.g. latex is not installed
+                pages[name] = {"error": repr(exception)}
+            # pylint: enable=broad-except
+        return {
+            "environment": {
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+            },
+            "dataset": {"seed": options["seed"], "size": vars(size), "counts": counts},
+            "runs": options["runs"],
+            "pages": pages,
+        }
+
+    def handle(self, *args, **options):
+        # the benchmark must neither be served from nor fill the PDF-cache of the installation
+        with tempfile.TemporaryDirectory() as pdf_cache_dir, override_settings(PDF_CACHE_DIR=pdf_cache_dir):
+            with test_database():
+                report = self._benchmark(options)
+
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                file.write(f"{output}\n")
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from settool_common.fixtures.dataset import add_dataset_size_arguments, dataset_size_from_options, DatasetGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates a reproducible synthetic dataset into the current semester and the semesters before it. "
+        "Sizes are per semester."
+    )
+
+    def add_arguments(self, parser):
+        add_dataset_size_arguments(parser)
+        parser.add_argument("--seed", type=int, default=0, help="seed of the random generator")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="objects per INSERT")
+        parser.add_argument(
+            "--replace",
+            action="store_true",
+            help="delete the existing data of the generated semesters instead of aborting",
+        )
+
+    def handle(self, *args, **options):
+        size = dataset_size_from_options(options)
+        generator = DatasetGenerator(size, seed=options["seed"], chunk_size=options["chunk_size"])
+        start = time.perf_counter()
+        try:
+            counts = generator.generate(replace=options["replace"])
+        except ValueError as error:
+            raise CommandError(f"{error}. Use --replace to overwrite it.") from error
+        for label, count in counts.items():
+            self.stdout.write(f"{label:>30}: {count}")
+        self.stdout.write(f"generated in {time.perf_counter() - start:.1f}s")
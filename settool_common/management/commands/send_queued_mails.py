@@ -0,0 +1,45 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from settool_common.models import QueuedMail
+
+
+class Command(BaseCommand):
+    help = "Delivers the mails waiting in the outbox. Failed deliveries are retried with exponential backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.MAIL_OUTBOX_BATCH_SIZE,
+            help="Amount of mails sent over one connection",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running and poll the outbox instead of exiting once it is drained",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=10.0,
+            help="Seconds to wait between polls if --loop is given",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent_total = failed_total = 0
+            while True:
+                sent, failed = QueuedMail.deliver_due(options["batch_size"])
+                if not sent and not failed:
+                    break
+                sent_total += sent
+                failed_total += failed
+            purged = QueuedMail.purge_sent()
+            if sent_total or failed_total or purged:
+                self.stdout.write(f"sent {sent_total}, failed {failed_total}, purged {purged} mails")
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,294 @@
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Callable, Optional
+
+from django.core.management.base import BaseCommand
+from django.db import connection, OperationalError
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+import fahrt.models
+import guidedtours.models
+import tutors.models
+from settool_common.fixtures.dataset import (
+    add_dataset_size_arguments,
+    dataset_size_from_options,
+    DatasetGenerator,
+    test_database,
+)
+from settool_common.models import current_semester, Semester, Subject
+
+
+class LockStats:
+    """execute_wrapper, which records the writes of a request and how often the database was locked"""
+
+    def __init__(self) -> None:
+        self.locked = 0
+        self.writes: list[float] = []  # seconds, waiting for the write-lock is included
+
+    def __call__(self, execute: Callable[..., Any], sql: str, params: Any, many: bool, context: dict[str, Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        except OperationalError as error:
+            if "locked" in str(error):
+                self.locked += 1
+            raise
+        finally:
+            if not sql.lstrip().upper().startswith("SELECT"):
+                self.writes.append(time.perf_counter() - start)
+
+
+@dataclass
+class Signup:
+    endpoint: str
+    outcome: str  # "success", "rejected" (the form was shown again), "error" or "locked"
+    get_duration: float = 0.0
+    post_duration: float = 0.0
+    locked: int = 0
+    writes: list[float] = field(default_factory=list)
+
+
+def _fahrt_data(index: int, semester: Semester, subjects: list[int], rng: random.Random) -> dict[str, Any]:
+    _ = semester
+    return {
+        "gender": rng.choice(("male", "female", "diverse")),
+        "firstname": "Load",
+        "surname": f"Test {index}",
+        "birthday": "2000-01-01",
+        "email": f"load{index}@example.com",
+        "mobile": f"+49 151 {index:07}",
+        "subject": rng.choice(subjects),
+        "nutrition": rng.choice(("normal", "vegeterian", "vegan")),
+        "dsgvo": "on",
+    }
+
+
+def _guidedtours_data(index: int, semester: Semester, subjects: list[int], rng: random.Random) -> dict[str, Any]:
+    now = timezone.now()
+    tours = list(
+        semester.tour_set.filter(open_registration__lt=now, close_registration__gt=now).values_list("pk", flat=True),
+    )
+    return {
+        "tour": rng.choice(tours),
+        "firstname": "Load",
+        "surname": f"Test {index}",
+        "email": f"load{index}@example.com",
+        "phone": f"+49 151 {index:07}",
+        "subject": rng.choice(subjects),
+        "dsgvo": "on",
+    }
+
+
+def _tutors_data(index: int, semester: Semester, subjects: list[int], rng: random.Random) -> dict[str, Any]:
+    questions = list(tutors.models.Question.objects.filter(semester=semester).values_list("pk", flat=True))
+    data = {
+        "first_name": "Load",
+        "last_name": f"Test {index}",
+        "email": f"load{index}@example.com",
+        "subject": rng.choice(subjects),
+        "tshirt_size": rng.choice(("S", "M", "L", "XL")),
+        "dsgvo": "on",
+        "form-TOTAL_FORMS": len(questions),
+        "form-INITIAL_FORMS": 0,
+        "form-MIN_NUM_FORMS": len(questions),
+        "form-MAX_NUM_FORMS": len(questions),
+    }
+    for i, question in enumerate(questions):
+        data[f"form-{i}-question"] = question
+        data[f"form-{i}-answer"] = rng.choice(tutors.models.Answer.ANSWERS)[0]
+    return data
+
+
+# endpoint -> (signup url, success url, function generating the POST-data of the index-th signup)
+SIGNUP_ENDPOINTS: dict[str, tuple[str, str, Callable[[int, Semester, list[int], random.Random], dict[str, Any]]]] = {
+    "fahrt": ("fahrt:signup", "fahrt:signup_success", _fahrt_data),
+    "guidedtours": ("guidedtours:signup", "guidedtours:signup_success", _guidedtours_data),
+    "tutors": ("tutors:tutor_signup", "tutors:tutor_signup_confirmation_required", _tutors_data),
+}
+
+
+def _open_registrations(semester: Semester) -> None:
+    """opens the registrations of all endpoints for the next hour"""
+    now = timezone.now()
+    fahrt.models.Fahrt.objects.update_or_create(
+        semester=semester,
+        defaults={
+            "date": (now + timedelta(days=30)).date(),
+            "open_registration": now - timedelta(hours=1),
+            "close_registration": now + timedelta(hours=1),
+        },
+    )
+    guidedtours.models.Tour.objects.filter(semester=semester).update(
+        open_registration=now - timedelta(hours=1),
+        close_registration=now + timedelta(hours=1),
+    )
+    mail_registration = tutors.models.TutorMail.objects.create(
+        subject="Registration",
+        text="Please confirm your registration: {{activation_url}}",
+    )
+    tutors.models.Settings.objects.update_or_create(
+        semester=semester,
+        defaults={
+            "open_registration": now - timedelta(hours=1),
+            "close_registration": now + timedelta(hours=1),
+            "mail_registration": mail_registration,
+        },
+    )
+
+
+def _percentile(durations: list[float], percentile: int) -> float:
+    if not durations:
+        return 0.0
+    if len(durations) == 1:
+        return durations[0]
+    return statistics.quantiles(durations, n=100, method="inclusive")[percentile - 1]
+
+
+def _latency(durations: list[float]) -> dict[str, float]:
+    return {
+        "p50_ms": round(_percentile(durations, 50) * 1000, 2),
+        "p95_ms": round(_percentile(durations, 95) * 1000, 2),
+        "p99_ms": round(_percentile(durations, 99) * 1000, 2),
+        "max_ms": round(max(durations, default=0.0) * 1000, 2),
+    }
+
+
+def _summarize(signups: list[Signup], wall_time: float) -> dict[str, Any]:
+    outcomes = {outcome: 0 for outcome in ("success", "rejected", "error", "locked")}
+    for signup in signups:
+        outcomes[signup.outcome] += 1
+    writes = [duration for signup in signups for duration in signup.writes]
+    return {
+        "signups": len(signups),
+        "outcomes": outcomes,
+        "error_rate": round((len(signups) - outcomes["success"]) / len(signups), 4) if signups else 0.0,
+        "throughput_per_s": round(outcomes["success"] / wall_time, 2),
+        "get": _latency([signup.get_duration for signup in signups]),
+        "post": _latency([signup.post_duration for signup in signups]),
+        "sqlite_locks": {
+            "locked_errors": sum(signup.locked for signup in signups),
+            "write_statements": len(writes),
+            "write_wait_s": round(sum(writes), 3),
+            "write": _latency(writes),
+        },
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulates many students signing up concurrently for the Fahrt, the guided tours and as tutors. "
+        "Every client loads the signup-form and submits it. "
+        "Reports throughput, error rate, tail latency and the lock-contention of SQLite as JSON."
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._local = threading.local()
+
+    def add_arguments(self, parser):
+        add_dataset_size_arguments(parser)
+        parser.add_argument("--seed", type=int, default=0, help="seed of the dataset and the submitted data")
+        parser.add_argument("--clients", type=int, default=20, help="number of concurrent clients")
+        parser.add_argument("--signups", type=int, default=300, help="number of signups per endpoint")
+        parser.add_argument("--endpoint", action="append", choices=list(SIGNUP_ENDPOINTS), help="only these endpoints")
+        parser.add_argument(
+            "--sqlite-file",
+            help="file of the SQLite test-database (default: a temporary file). "
+            "The in-memory database of the testrunner would hide the locking.",
+        )
+        parser.add_argument("--output", help="file to write the JSON-report to (default: stdout)")
+
+    def _client(self) -> Client:
+        """one client per thread, like a browser per student"""
+        if not hasattr(self._local, "client"):
+            self._local.client = Client()
+        return self._local.client
+
+    def _signup(self, endpoint: str, data: dict[str, Any]) -> Signup:
+        url_name, success_url_name, _data = SIGNUP_ENDPOINTS[endpoint]
+        client = self._client()
+        lock_stats = LockStats()
+        signup = Signup(endpoint=endpoint, outcome="error")
+        try:
+            with connection.execute_wrapper(lock_stats):
+                start = time.perf_counter()
+                client.get(reverse(url_name))
+                signup.get_duration = time.perf_counter() - start
+
+                start = time.perf_counter()
+                response = client.post(reverse(url_name), data)
+                signup.post_duration = time.perf_counter() - start
+            if response.status_code == 302 and response.url == reverse(success_url_name):
+                signup.outcome = "success"
+            elif response.status_code == 200:
+                signup.outcome = "rejected"
+        # pylint: disable=broad-except
+        except Exception as exception:
+            signup.outcome = "locked" if isinstance(exception, OperationalError) and lock_stats.locked else "error"
+            self.stderr.write(f"{endpoint}: {exception!r}")
+        # pylint: enable=broad-except
+        finally:
+            # the connection of this thread would otherwise stay open until the thread exits
+            connection.close()
+        signup.locked = lock_stats.locked
+        signup.writes = lock_stats.writes
+        return signup
+
+    def _simulate(self, options: dict[str, Any]) -> dict[str, Any]:
+        size = dataset_size_from_options(options)
+        DatasetGenerator(size, seed=options["seed"]).generate()
+        semester = current_semester()
+        _open_registrations(semester)
+        subjects = list(Subject.objects.values_list("pk", flat=True))
+
+        # the POST-data is generated upfront, thus only the requests themselves are measured
+        rng = random.Random(options["seed"])
+        jobs = [
+            (endpoint, SIGNUP_ENDPOINTS[endpoint][2](index, semester, subjects, rng))
+            for endpoint in options["endpoint"] or SIGNUP_ENDPOINTS
+            for index in range(options["signups"])
+        ]
+        rng.shuffle(jobs)
+        # the connection of the main thread must not hold a transaction or lock while the clients run
+        connection.close()
+
+        self.stderr.write(f"simulating {len(jobs)} signups with {options['clients']} clients")
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["clients"]) as executor:
+            signups = list(executor.map(lambda job: self._signup(*job), jobs))
+        wall_time = time.perf_counter() - start
+
+        return {
+            "environment": {"database": connection.vendor},
+            "dataset": {"seed": options["seed"], "size": vars(size)},
+            "clients": options["clients"],
+            "wall_time_s": round(wall_time, 3),
+            "total": _summarize(signups, wall_time),
+            "endpoints": {
+                endpoint: _summarize([signup for signup in signups if signup.endpoint == endpoint], wall_time)
+                for endpoint in options["endpoint"] or SIGNUP_ENDPOINTS
+            },
+        }
+
+    def handle(self, *args, **options):
+        sqlite_file: Optional[str] = options["sqlite_file"]
+        with tempfile.TemporaryDirectory() as directory:
+            with test_database(sqlite_file or os.path.join(directory, "loadtest.sqlite3")):
+                report = self._simulate(options)
+
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                file.write(f"{output}\n")
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,103 @@
+"""
+Prometheus-metrics of the requests, the database, the mails, the LaTeX-exports and the cronjobs.
+They are exposed at /metrics (see settool_common.views.metrics).
+
+If PROMETHEUS_MULTIPROC_DIR is set, every process (gunicorn-workers, cronjobs, mail-workers) writes its metrics into
+this directory and /metrics aggregates them. Otherwise only the metrics of the serving process are exposed.
+"""
+import functools
+import os
+import time
+from typing import Any, Callable, TypeVar
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, generate_latest, Histogram, multiprocess, REGISTRY
+
+REQUEST_DURATION = Histogram(
+    "settool_request_duration_seconds",
+    "Duration of the requests per url-name",
+    ["view", "method"],
+)
+REQUESTS = Counter(
+    "settool_requests_total",
+    "Requests per url-name and status-code",
+    ["view", "method", "status"],
+)
+REQUEST_QUERIES = Histogram(
+    "settool_request_db_queries",
+    "Database-queries per request",
+    ["view"],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+REQUEST_QUERY_DURATION = Histogram(
+    "settool_request_db_duration_seconds",
+    "Total duration of the database-queries per request",
+    ["view"],
+)
+MAIL_RENDER_FAILURES = Counter(
+    "settool_mail_render_failures_total",
+    "Mails, which could not be rendered (placeholders were left over) and thus were neither queued nor sent",
+    ["mail"],
+)
+MAIL_DELIVERY_DURATION = Histogram(
+    "settool_mail_delivery_duration_seconds",
+    "Duration of delivering a queued mail to the mail-server per sender",
+    ["sender"],
+)
+MAIL_DELIVERIES = Counter(
+    "settool_mail_deliveries_total",
+    "Delivery attempts of queued mails per sender and result (sent, retry or failed)",
+    ["sender", "result"],
+)
+LATEX_COMPILE_DURATION = Histogram(
+    "settool_latex_compile_duration_seconds",
+    "Duration of compiling a LaTeX-export (cache-hits are not included)",
+    ["template"],
+    buckets=(0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120),
+)
+CRON_DURATION = Histogram(
+    "settool_cron_duration_seconds",
+    "Duration of the cronjobs",
+    ["job"],
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 300, 600, 1800),
+)
+CRON_FAILURES = Counter(
+    "settool_cron_failures_total",
+    "Cronjobs, which raised an exception",
+    ["job"],
+)
+CRON_LAST_SUCCESS = Gauge(
+    "settool_cron_last_success_timestamp_seconds",
+    "Unix-time of the last successful run of the cronjob",
+    ["job"],
+    multiprocess_mode="max",
+)
+
+Function = TypeVar("Function", bound=Callable[..., Any])
+
+
+def track_cronjob(function: Function) -> Function:
+    """records the duration, failures and last success of a cronjob"""
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = function(*args, **kwargs)
+        except Exception:
+            CRON_FAILURES.labels(function.__name__).inc()
+            raise
+        finally:
+            CRON_DURATION.labels(function.__name__).observe(time.perf_counter() - start)
+        CRON_LAST_SUCCESS.labels(function.__name__).set_to_current_time()
+        return result
+
+    return wrapper  # type: ignore[return-value]
+
+
+def render_metrics() -> bytes:
+    """the metrics in the text-format of prometheus"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
@@ -0,0 +1,129 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import time
+from typing import Callable
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+
+from settool_common import metrics
+from settool_common.instrumentation import QueryLog, record_queries
+from settool_common.models import resolve_semester
+
+query_logger = logging.getLogger("settool.queries")
+
+
+class SemesterMiddleware:
+    """
+    Attaches the semester selected in the session as request.semester.
+    It is resolved lazily, thus requests not using it neither touch the session nor the database.
+    """
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        request.semester = SimpleLazyObject(lambda: resolve_semester(request))  # type: ignore[attr-defined]
+        return self.get_response(request)
+
+
+class QueryCountMiddleware:
+    """
+    Logs the number and the total duration of the database-queries of every request.
+    In DEBUG, they are additionally exposed as X-DB-Query-Count and Server-Timing headers.
+    The duration of the request and its queries are recorded as metrics per url-name.
+    Queries of streaming responses, which are issued while the content is consumed, are not included.
+    """
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        start = time.perf_counter()
+        with record_queries() as stats:
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+        # unresolved requests (404) are aggregated, thus arbitrary paths do not create new time-series
+        view = request.resolver_match.view_name if request.resolver_match else "<unresolved>"
+        metrics.REQUEST_DURATION.labels(view, request.method).observe(duration)
+        metrics.REQUESTS.labels(view, request.method, response.status_code).inc()
+        metrics.REQUEST_QUERIES.labels(view).observe(stats.count)
+        metrics.REQUEST_QUERY_DURATION.labels(view).observe(stats.duration)
+
+        duration_ms = stats.duration * 1000
+        level = logging.WARNING if stats.count > settings.QUERY_COUNT_WARNING_THRESHOLD else logging.DEBUG
+        query_logger.log(
+            level,
+            "%s %s: %d queries in %.1fms",
+            request.method,
+            request.path,
+            stats.count,
+            duration_ms,
+        )
+        if settings.DEBUG:
+            response["X-DB-Query-Count"] = str(stats.count)
+            response["Server-Timing"] = f'db;dur={duration_ms:.1f};desc="{stats.count} queries"'
+        return response
+
+
+PROFILING_ENABLED_VALUES = frozenset({"1", "true"})
+
+
+def _profiling_requested(request: HttpRequest) -> bool:
+    values = (request.GET.get("profile", ""), request.headers.get("X-Profile", ""))
+    return any(value.strip().lower() in PROFILING_ENABLED_VALUES for value in values)
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a request of a superuser if it is requested via ?profile=1 or X-Profile: 1 (or true).
+    Instead of the page, the cProfile-statistics and the SQL-log of the request are returned.
+    Both are additionally stored in PROFILE_DIR (the .prof-file can be viewed as flame-graph, e.g. with snakeviz).
+    Other requests only pay for the lookup of the parameter.
+    """
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if not _profiling_requested(request) or not request.user.is_superuser:
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        query_log = QueryLog()
+        with record_queries(query_log):
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+                if response.streaming:
+                    # the content of streaming responses is generated while it is consumed
+                    for _chunk in response.streaming_content:  # type: ignore[attr-defined]
+                        pass
+            finally:
+                profiler.disable()
+
+        stats_output = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stats_output)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(settings.PROFILE_STATS_LIMIT)
+
+        sql_log = "\n".join(
+            f"{duration * 1000:8.2f}ms  {sql}  {params!r}" for sql, params, duration in query_log.queries
+        )
+        name = f"{timezone.now():%Y%m%d-%H%M%S}-{request.path.strip('/').replace('/', '_') or 'index'}"
+        os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+        stats.dump_stats(os.path.join(settings.PROFILE_DIR, f"{name}.prof"))
+        with open(os.path.join(settings.PROFILE_DIR, f"{name}.sql"), "w", encoding="utf-8") as file:
+            file.write(sql_log)
+
+        report = (
+            f"{request.method} {request.get_full_path()} -> {response.status_code}\n"
+            f"stored as {name}.prof and {name}.sql in {settings.PROFILE_DIR}\n\n"
+            f"{query_log.count} queries in {query_log.duration * 1000:.1f}ms\n{sql_log}\n\n"
+            f"{stats_output.getvalue()}"
+        )
+        return HttpResponse(report, content_type="text/plain; charset=utf-8")
@@ -0,0 +1,74 @@
+# Generated by Django 4.1.13 on 2026-10-18 13:59
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("settool_common", "0018_alter_anonymisationlog_semester"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QueuedMail",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("sender", models.CharField(max_length=100, verbose_name="From")),
+                ("recipients", models.JSONField(default=list, verbose_name="Recipients")),
+                ("subject", models.TextField(verbose_name="Email subject")),
+                ("text", models.TextField(verbose_name="Text")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "pending"),
+                            ("sending", "sending"),
+                            ("sent", "sent"),
+                            ("failed", "failed"),
+                        ],
+                        db_index=True,
+                        default="pending",
+                        max_length=10,
+                        verbose_name="Status",
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0, verbose_name="Delivery attempts")),
+                (
+                    "next_retry_at",
+                    models.DateTimeField(default=django.utils.timezone.now, verbose_name="Next delivery attempt"),
+                ),
+                ("sent_at", models.DateTimeField(blank=True, null=True, verbose_name="Sent at")),
+                ("last_error", models.TextField(blank=True, verbose_name="Last error")),
+            ],
+            options={
+                "ordering": ["next_retry_at", "created_at"],
+            },
+        ),
+        migrations.CreateModel(
+            name="QueuedMailAttachment",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("filename", models.CharField(max_length=200)),
+                ("content", models.FileField(upload_to="mail_outbox")),
+                ("mimetype", models.CharField(max_length=200)),
+                (
+                    "mail",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="attachments",
+                        to="settool_common.queuedmail",
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.1.13 on 2026-10-18 14:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+import settool_common.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("settool_common", "0019_queuedmail"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Selection",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "token",
+                    models.CharField(
+                        default=settool_common.models.generate_selection_token,
+                        editable=False,
+                        max_length=16,
+                        unique=True,
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("fahrt_filtered", "Filtered participants of the Fahrt"),
+                            ("fahrt_mail", "Recipients of a Fahrt-mail"),
+                            ("fahrt_payments", "Changed payments of the Fahrt"),
+                            ("tours_filtered", "Filtered participants of the guided tours"),
+                            ("tours_mail", "Recipients of a guided tours-mail"),
+                            ("bags_mail", "Recipients of a bags-mail"),
+                            ("bags_arrivals", "Changed arrivals of giveaways"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("ids", models.TextField(blank=True)),
+                ("deselected_ids", models.TextField(blank=True)),
+                ("expires_at", models.DateTimeField(db_index=True, default=settool_common.models.selection_expiry)),
+                ("owner", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                (
+                    "semester",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="settool_common.semester",
+                        verbose_name="Semester",
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+    ]
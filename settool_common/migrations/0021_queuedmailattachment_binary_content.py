@@ -0,0 +1,39 @@
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+
+def move_attachments_into_database(apps, schema_editor):
+    _ = schema_editor
+    queued_mail_attachment = apps.get_model("settool_common", "QueuedMailAttachment")
+    for attachment in queued_mail_attachment.objects.exclude(file=""):
+        if default_storage.exists(attachment.file.name):
+            with default_storage.open(attachment.file.name, "rb") as file:
+                attachment.content = file.read()
+            attachment.save(update_fields=["content"])
+            default_storage.delete(attachment.file.name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("settool_common", "0020_selection"),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name="queuedmailattachment",
+            old_name="content",
+            new_name="file",
+        ),
+        migrations.AddField(
+            model_name="queuedmailattachment",
+            name="content",
+            field=models.BinaryField(default=b""),
+            preserve_default=False,
+        ),
+        migrations.RunPython(move_attachments_into_database, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="queuedmailattachment",
+            name="file",
+        ),
+    ]
@@ -1,24 +1,36 @@
+import copy
 import datetime
+import functools
 import os
 import re
+import secrets
+import threading
+import time
 import uuid
 from io import BytesIO
-from typing import Any, Optional, Union
+from typing import Any, Iterable, Optional, Union
 
 import qrcode
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.core.files import File
-from django.core.mail import EmailMessage, send_mail
-from django.db import models
+from django.core.mail import EmailMessage, get_connection
+from django.db import models, transaction
 from django.dispatch import receiver
-from django.http import HttpRequest, HttpResponse
-from django.template import Context, Template
+from django.http import Http404, HttpRequest, HttpResponse
+from django.template import Context, Template, TemplateSyntaxError, Variable
+from django.template.base import VariableNode
+from django.template.defaulttags import ForNode, WithNode
+from django.urls import reverse
 from django.utils import timezone
 from django.utils.deconstruct import deconstructible
+from django.utils.http import urlencode
 from django.utils.translation import gettext_lazy as _
 from PIL import Image
 
-from .settings import SEMESTER_SESSION_KEY
+from settool_common import metrics
+
+from .settings import SELECTION_PARAMETER, SEMESTER_SESSION_KEY
 
 
 class UUIDModelBase(models.Model):
@@ -43,6 +55,13 @@ class LoggedModelBase(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
 
+@functools.lru_cache(maxsize=256)
+def compile_mail_template(mail_pk: int, updated_at: datetime.datetime, source: str) -> Template:
+    """compiled subject/text of a Mail. The cache is cleared whenever a Mail is saved (see Mail.save)"""
+    _ = mail_pk, updated_at  # only part of the cache key
+    return Template(source)
+
+
 class Mail(LoggedModelBase):
     SET = "SET-Team <set@fs.tum.de>"
     SET_FAHRT = "SET-Fahrt-Team <setfahrt@fs.tum.de>"
@@ -84,60 +103,365 @@ class Mail(LoggedModelBase):
             return f"{self.subject} ({self.comment})"
         return str(self.subject)
 
+    # pylint: disable=signature-differs
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        compile_mail_template.cache_clear()
+
+    def clean(self):
+        super().clean()
+        self.validate_placeholders(self.subject, self.text)
+
+    @classmethod
+    def allowed_placeholders(cls) -> set[str]:
+        placeholders = [
+            placeholder for placeholder, *_details in cls.general_placeholders + cls.conditional_placeholders
+        ]
+        return {placeholder.strip("{} ").split(".")[0] for placeholder in placeholders}
+
+    @classmethod
+    def unknown_placeholders(cls, source: str) -> list[str]:
+        """raises TemplateSyntaxError, if the source is not a valid template"""
+        template = Template(source)
+        allowed_placeholders = cls.allowed_placeholders()
+        for for_node in template.nodelist.get_nodes_by_type(ForNode):
+            allowed_placeholders.update(for_node.loopvars)
+        for with_node in template.nodelist.get_nodes_by_type(WithNode):
+            allowed_placeholders.update(with_node.extra_context.keys())
+
+        unknown_placeholders: list[str] = []
+        for variable_node in template.nodelist.get_nodes_by_type(VariableNode):
+            variable = variable_node.filter_expression.var
+            if not isinstance(variable, Variable) or variable.lookups is None:
+                continue  # literal like {{ "text" }}
+            name = variable.lookups[0]
+            if name not in allowed_placeholders and name not in unknown_placeholders:
+                unknown_placeholders.append(name)
+        return unknown_placeholders
+
+    @classmethod
+    def validate_placeholders(cls, subject: str, text: str) -> None:
+        if not cls.general_placeholders and not cls.conditional_placeholders:
+            return  # generic mails do not know, which context they will be rendered with
+        errors: dict[str, ValidationError] = {}
+        for field, source in (("subject", subject), ("text", text)):
+            try:
+                unknown_placeholders = cls.unknown_placeholders(source)
+            except TemplateSyntaxError as error:
+                errors[field] = ValidationError(_("Invalid template: {error}").format(error=error))
+                continue
+            if unknown_placeholders:
+                errors[field] = ValidationError(
+                    _("Unknown placeholders: {placeholders}").format(
+                        placeholders=", ".join(f"{{{{{name}}}}}" for name in unknown_placeholders),
+                    ),
+                )
+        if errors:
+            raise ValidationError(errors)
+
+    def _compiled_template(self, source: str) -> Template:
+        if self.pk is None or self.updated_at is None:
+            return Template(source)
+        return compile_mail_template(self.pk, self.updated_at, source)
+
     def get_mail(self, context: Union[Context, dict[str, Any], None]) -> tuple[str, str, str]:
         if not isinstance(context, Context):
             context = Context(context or {})
 
-        subject_template = Template(self.subject)
+        subject_template = self._compiled_template(self.subject)
         subject: str = subject_template.render(context).rstrip()
 
-        text_template = Template(self.text)
+        text_template = self._compiled_template(self.text)
         text: str = text_template.render(context)
 
         return subject, text, self.sender
 
-    def send_mail(
-        self,
-        context: Union[Context, dict[str, Any], None],
-        recipients: Union[list[str], str],
-        attachments: Optional[list[Union[HttpResponse, tuple[str, Any, str]]]] = None,
-    ) -> bool:
-        if isinstance(recipients, str):
-            recipients = [recipients]
+    def render_mail(self, context: Union[Context, dict[str, Any], None]) -> Optional[tuple[str, str]]:
+        """returns the rendered subject and text or None, if placeholders are left over"""
         if not isinstance(context, Context):
             context = Context(context or {})
-        subject_template = Template(self.subject)
+        subject_template = self._compiled_template(self.subject)
         subject = subject_template.render(context).rstrip()
 
-        text_template = Template(self.text)
+        text_template = self._compiled_template(self.text)
         text = text_template.render(context)
 
         regex = r"({{.*?}})"
-        subject_matches = re.match(regex, subject, re.MULTILINE)
-        text_matches = re.match(regex, text, re.MULTILINE)
+        subject_matches = re.search(regex, subject, re.MULTILINE)
+        text_matches = re.search(regex, text, re.MULTILINE)
 
         if subject_matches is not None or text_matches is not None:
+            return None
+        return subject, text
+
+    def send_mail(
+        self,
+        context: Union[Context, dict[str, Any], None],
+        recipients: Union[list[str], str],
+        attachments: Optional[list[Union[HttpResponse, tuple[str, Any, str]]]] = None,
+    ) -> bool:
+        """
+        Renders the mail and adds it to the outbox. Unless MAIL_OUTBOX_BACKGROUND is enabled, it is delivered now.
+        Returns, if the mail was sent or will be sent: a failed delivery is retried by the outbox, thus only mails,
+        which could not be rendered or finally failed, return False.
+        """
+        if isinstance(recipients, str):
+            recipients = [recipients]
+        rendered_mail = self.render_mail(context)
+        if rendered_mail is None:
+            metrics.MAIL_RENDER_FAILURES.labels(type(self).__name__).inc()
             return False
-        if attachments is None:
-            send_mail(subject, text, self.sender, recipients, fail_silently=False)
-        else:
-            mail = EmailMessage(subject, text, self.sender, recipients)
-            attach: Union[HttpResponse, tuple[str, Any, str]]
-            for attach in attachments:
-                (filename, content, mimetype) = clean_attachable(attach)
-                mail.attach(filename, content, mimetype)
-            mail.send(fail_silently=False)
-        return True
+        subject, text = rendered_mail
+        queued_mail = QueuedMail.enqueue(subject, text, self.sender, recipients, attachments)
+        if not settings.MAIL_OUTBOX_BACKGROUND:
+            queued_mail.deliver()
+        return queued_mail.will_be_delivered
+
+    def send_mass(
+        self,
+        contexts_and_recipients: Iterable[tuple[Union[Context, dict[str, Any], None], Union[list[str], str]]],
+        batch_size: Optional[int] = None,
+    ) -> list[bool]:
+        """
+        Renders one mail per (context, recipients)-pair and adds them to the outbox in chunks of batch_size.
+        Every batch is delivered over a single connection.
+        Returns for every pair, if the mail was sent or will be sent (see send_mail).
+        """
+        batch_size = batch_size or settings.MAIL_OUTBOX_BATCH_SIZE
+        results: list[bool] = []
+        # (index in results, mail)
+        queued_mails: list[tuple[int, QueuedMail]] = []
+        with transaction.atomic():
+            for context, recipients in contexts_and_recipients:
+                rendered_mail = self.render_mail(context)
+                results.append(rendered_mail is not None)
+                if rendered_mail is None:
+                    metrics.MAIL_RENDER_FAILURES.labels(type(self).__name__).inc()
+                    continue
+                subject, text = rendered_mail
+                if isinstance(recipients, str):
+                    recipients = [recipients]
+                queued_mail = QueuedMail(
+                    subject=subject,
+                    text=text,
+                    sender=self.sender,
+                    recipients=recipients,
+                    status=QueuedMail.initial_status(),
+                )
+                queued_mails.append((len(results) - 1, queued_mail))
+            if settings.MAIL_OUTBOX_BACKGROUND:
+                QueuedMail.objects.bulk_create([queued_mail for _index, queued_mail in queued_mails], batch_size)
+            else:
+                # the mails are delivered below, which requires their primary keys
+                for _index, queued_mail in queued_mails:
+                    queued_mail.save()
+        if not settings.MAIL_OUTBOX_BACKGROUND:
+            for offset in range(0, len(queued_mails), batch_size):
+                batch = queued_mails[offset : offset + batch_size]
+                QueuedMail.deliver_batch([queued_mail for _index, queued_mail in batch])
+                for index, queued_mail in batch:
+                    results[index] = queued_mail.will_be_delivered
+        return results
 
 
 def clean_attachable(response: Union[HttpResponse, tuple[str, Any, str]]) -> tuple[str, Any, str]:
     if not isinstance(response, HttpResponse):
         return response
     content_type = response.get("Content-Type", "text/text")
-    filename = response.get("Content-Disposition", "filename.txt").replace("inline; filename=", "")
+    content_disposition = response.get("Content-Disposition", "")
+    filename_match = re.search(r'filename="?([^";]+)"?', content_disposition)
+    filename = filename_match.group(1) if filename_match else "filename.txt"
     return filename, response.content, content_type
 
 
+class QueuedMail(LoggedModelBase):
+    """
+    Rendered mail waiting in the outbox.
+    `Mail.send_mail` only enqueues, the actual delivery is done by the `send_queued_mails` management command.
+    """
+
+    class Meta:
+        ordering = ["next_retry_at", "created_at"]
+
+    STATUS_PENDING = "pending"
+    STATUS_SENDING = "sending"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = (
+        (STATUS_PENDING, _("pending")),
+        (STATUS_SENDING, _("sending")),
+        (STATUS_SENT, _("sent")),
+        (STATUS_FAILED, _("failed")),
+    )
+
+    sender = models.CharField(max_length=100, verbose_name=_("From"))
+    recipients = models.JSONField(default=list, verbose_name=_("Recipients"))
+    subject = models.TextField(_("Email subject"))
+    text = models.TextField(_("Text"))
+
+    status = models.CharField(
+        _("Status"),
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        db_index=True,
+    )
+    attempts = models.PositiveSmallIntegerField(_("Delivery attempts"), default=0)
+    next_retry_at = models.DateTimeField(_("Next delivery attempt"), default=timezone.now)
+    sent_at = models.DateTimeField(_("Sent at"), null=True, blank=True)
+    last_error = models.TextField(_("Last error"), blank=True)
+
+    def __str__(self) -> str:
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.get_status_display()})"
+
+    @property
+    def will_be_delivered(self) -> bool:
+        """sent or pending. Failed deliveries are retried until MAIL_OUTBOX_MAX_ATTEMPTS is reached"""
+        return self.status != QueuedMail.STATUS_FAILED
+
+    @staticmethod
+    def initial_status() -> str:
+        """mails, which are delivered right away, are not claimed by the workers draining the outbox"""
+        return QueuedMail.STATUS_PENDING if settings.MAIL_OUTBOX_BACKGROUND else QueuedMail.STATUS_SENDING
+
+    @classmethod
+    def enqueue(
+        cls,
+        subject: str,
+        text: str,
+        sender: str,
+        recipients: list[str],
+        attachments: Optional[list[Union[HttpResponse, tuple[str, Any, str]]]] = None,
+    ) -> "QueuedMail":
+        with transaction.atomic():
+            queued_mail = cls.objects.create(
+                subject=subject,
+                text=text,
+                sender=sender,
+                recipients=recipients,
+                status=cls.initial_status(),
+            )
+            attach: Union[HttpResponse, tuple[str, Any, str]]
+            for attach in attachments or []:
+                (filename, content, mimetype) = clean_attachable(attach)
+                if isinstance(content, str):
+                    content = content.encode()
+                QueuedMailAttachment.objects.create(
+                    mail=queued_mail,
+                    filename=filename,
+                    mimetype=mimetype,
+                    content=content,
+                )
+        return queued_mail
+
+    def as_email_message(self, connection=None) -> EmailMessage:
+        message = EmailMessage(self.subject, self.text, self.sender, self.recipients, connection=connection)
+        attachment: QueuedMailAttachment
+        for attachment in self.attachments.all():
+            message.attach(attachment.filename, bytes(attachment.content), attachment.mimetype)
+        return message
+
+    def deliver(self, connection=None) -> bool:
+        try:
+            with metrics.MAIL_DELIVERY_DURATION.labels(self.sender).time():
+                self.as_email_message(connection).send(fail_silently=False)
+        except Exception as error:  # pylint: disable=broad-except
+            # the backends raise anything from SMTPException to OSError, all of them are worth a retry
+            self.attempts += 1
+            self.last_error = f"{type(error).__name__}: {error}"
+            if self.attempts >= settings.MAIL_OUTBOX_MAX_ATTEMPTS:
+                self.status = QueuedMail.STATUS_FAILED
+                metrics.MAIL_DELIVERIES.labels(self.sender, "failed").inc()
+            else:
+                self.status = QueuedMail.STATUS_PENDING
+                backoff = settings.MAIL_OUTBOX_RETRY_DELAY * 2 ** (self.attempts - 1)
+                self.next_retry_at = timezone.now() + datetime.timedelta(seconds=backoff)
+                metrics.MAIL_DELIVERIES.labels(self.sender, "retry").inc()
+            self.save()
+            return False
+        metrics.MAIL_DELIVERIES.labels(self.sender, "sent").inc()
+        self.attempts += 1
+        self.status = QueuedMail.STATUS_SENT
+        self.sent_at = timezone.now()
+        self.last_error = ""
+        self.save()
+        # attachments (e.g. non-liability forms) contain personal data, which is not needed after the delivery
+        self.attachments.all().delete()
+        return True
+
+    @classmethod
+    def claim_due(cls, batch_size: int) -> list["QueuedMail"]:
+        """
+        Reserves up to batch_size mails for delivery.
+        Mails are claimed with a conditional update, so concurrently running workers never deliver a mail twice.
+        """
+        now = timezone.now()
+        # a worker that died while sending leaves mails in STATUS_SENDING behind
+        cls.objects.filter(
+            status=QueuedMail.STATUS_SENDING,
+            updated_at__lt=now - datetime.timedelta(seconds=settings.MAIL_OUTBOX_SENDING_TIMEOUT),
+        ).update(status=QueuedMail.STATUS_PENDING, updated_at=now)
+
+        due_ids = list(
+            cls.objects.filter(status=QueuedMail.STATUS_PENDING, next_retry_at__lte=now).values_list("id", flat=True)[
+                :batch_size
+            ],
+        )
+        claimed: list[QueuedMail] = []
+        for mail_id in due_ids:
+            if cls.objects.filter(id=mail_id, status=QueuedMail.STATUS_PENDING).update(
+                status=QueuedMail.STATUS_SENDING,
+                updated_at=now,
+            ):
+                claimed.append(cls.objects.get(id=mail_id))
+        return claimed
+
+    @classmethod
+    def deliver_due(cls, batch_size: Optional[int] = None) -> tuple[int, int]:
+        """
+        Delivers one batch of due mails.
+        Returns how many mails were sent and how many failed.
+        """
+        claimed = cls.claim_due(batch_size or settings.MAIL_OUTBOX_BATCH_SIZE)
+        if not claimed:
+            return 0, 0
+        sent = sum(cls.deliver_batch(claimed))
+        return sent, len(claimed) - sent
+
+    @staticmethod
+    def deliver_batch(queued_mails: list["QueuedMail"]) -> list[bool]:
+        """delivers the mails over a single connection. Returns for every mail, if it was sent"""
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception:  # pylint: disable=broad-except
+            pass  # every deliver() retries to connect and records the error against its mail
+        try:
+            return [queued_mail.deliver(connection) for queued_mail in queued_mails]
+        finally:
+            connection.close()
+
+    @classmethod
+    def purge_sent(cls) -> int:
+        retention = datetime.timedelta(days=settings.MAIL_OUTBOX_RETENTION_DAYS)
+        deleted, _deleted_per_model = cls.objects.filter(
+            status=QueuedMail.STATUS_SENT,
+            sent_at__lt=timezone.now() - retention,
+        ).delete()
+        return deleted
+
+
+class QueuedMailAttachment(LoggedModelBase):
+    mail = models.ForeignKey(QueuedMail, related_name="attachments", on_delete=models.CASCADE)
+    filename = models.CharField(max_length=200)
+    # stored in the database instead of MEDIA_ROOT, which is served publicly
+    content = models.BinaryField()
+    mimetype = models.CharField(max_length=200)
+
+    def __str__(self) -> str:
+        return self.filename
+
+
 @deconstructible
 class Semester(LoggedModelBase):
     class Meta:
@@ -208,6 +532,66 @@ class Subject(LoggedModelBase):
         return f"{self.id}: {self.get_degree_display()} {self.subject} ({self.course_bundle})"
 
 
+class _SemesterCache:
+    """
+    Process-level cache of the semester table.
+    It is invalidated, whenever a semester is saved or deleted in this process. As other processes do not notice
+    these changes, entries additionally expire after SEMESTER_CACHE_TIMEOUT seconds.
+    Callers get fresh copies, so that related objects (e.g. semester.fahrt) are not cached across requests and threads.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._semesters: Optional[dict[int, Semester]] = None
+        self._expires_at = 0.0
+        self._generation = 0
+
+    def semesters(self) -> dict[int, Semester]:
+        return {pk: _fresh_copy(semester) for pk, semester in self._cached_semesters().items()}
+
+    def get(self, pk: int) -> Optional[Semester]:
+        semester = self._cached_semesters().get(pk)
+        return _fresh_copy(semester) if semester is not None else None
+
+    def _cached_semesters(self) -> dict[int, Semester]:
+        with self._lock:
+            if self._semesters is not None and time.monotonic() < self._expires_at:
+                return self._semesters
+            generation = self._generation
+        semesters = {semester.pk: semester for semester in Semester.objects.all()}
+        # only cache committed data. Otherwise, a rolled back transaction could leave semesters in the cache
+        transaction.on_commit(functools.partial(self._store, semesters, generation))
+        return semesters
+
+    def _store(self, semesters: dict[int, Semester], generation: int) -> None:
+        with self._lock:
+            if generation == self._generation:
+                self._semesters = semesters
+                self._expires_at = time.monotonic() + settings.SEMESTER_CACHE_TIMEOUT
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._semesters = None
+            self._generation += 1
+
+
+def _fresh_copy(semester: Semester) -> Semester:
+    fresh_semester = copy.copy(semester)
+    fresh_semester._state.fields_cache = {}  # pylint: disable=protected-access
+    fresh_semester.__dict__.pop("_prefetched_objects_cache", None)
+    return fresh_semester
+
+
+semester_cache = _SemesterCache()
+
+
+@receiver(models.signals.post_save, sender=Semester)
+@receiver(models.signals.post_delete, sender=Semester)
+def invalidate_semester_cache(sender, **_kwargs):
+    _ = sender  # sender is needed, for api. it cannot be renamed, but is unused here.
+    semester_cache.invalidate()
+
+
 def current_semester() -> Semester:
     now = timezone.now()
     year = now.year
@@ -218,7 +602,12 @@ def current_semester() -> Semester:
         year += 1
     else:
         semester = Semester.WINTER
-    return Semester.objects.get_or_create(semester=semester, year=year)[0]
+    for cached_semester in semester_cache.semesters().values():
+        if cached_semester.semester == semester and cached_semester.year == year:
+            return cached_semester
+    current, _created = Semester.objects.get_or_create(semester=semester, year=year)
+    semester_cache.invalidate()  # the semester might have been created by another process
+    return current
 
 
 def get_semester(request: HttpRequest) -> int:
@@ -231,6 +620,26 @@ def get_semester(request: HttpRequest) -> int:
     return sem  # noqa: R504
 
 
+def resolve_semester(request: HttpRequest) -> Semester:
+    """The semester selected in the session. Use request_semester, which resolves it only once per request."""
+    semester_pk = get_semester(request)
+    semester = semester_cache.get(semester_pk)
+    if semester is None:
+        # the semester might have been created by another process
+        semester_cache.invalidate()
+        semester = semester_cache.get(semester_pk)
+    if semester is None:
+        raise Http404(_("The selected semester does not exist"))
+    return semester
+
+
+def request_semester(request: HttpRequest) -> Semester:
+    """The semester of this request (see settool_common.middleware.SemesterMiddleware)"""
+    if not hasattr(request, "semester"):
+        request.semester = resolve_semester(request)  # type: ignore[attr-defined]
+    return request.semester  # type: ignore[attr-defined]
+
+
 class QRCode(LoggedModelBase):
     content = models.CharField(max_length=200, unique=True)
     qr_code = models.ImageField(upload_to="qr_codes", blank=True)
@@ -295,3 +704,102 @@ class AnonymisationLog(LoggedModelBase, SemesterModelBase):
 
     def __str__(self) -> str:
         return f"{self.semester}-{self.anon_log_str}"
+
+
+def generate_selection_token() -> str:
+    return secrets.token_urlsafe(9)
+
+
+def selection_expiry() -> datetime.datetime:
+    return timezone.now() + datetime.timedelta(hours=settings.SELECTION_LIFETIME_HOURS)
+
+
+def _encode_ids(ids: Iterable[Any]) -> str:
+    # UUIDs are stored without hyphens, the lookups accept both representations
+    return ",".join(row_id.hex if isinstance(row_id, uuid.UUID) else str(row_id) for row_id in ids)
+
+
+def _decode_ids(encoded_ids: str) -> list[str]:
+    return encoded_ids.split(",") if encoded_ids else []
+
+
+class Selection(LoggedModelBase, SemesterModelBase):
+    """
+    Ids of rows (e.g. the filtered participants), which are passed from one view of a workflow to the next.
+    The views reference the selection by its token (?selection=<token>), so the ids are not stored in the session.
+    Expired selections are deleted by the selection_cronjob.
+    """
+
+    FAHRT_FILTERED = "fahrt_filtered"
+    FAHRT_MAIL = "fahrt_mail"
+    FAHRT_PAYMENTS = "fahrt_payments"
+    GUIDEDTOURS_FILTERED = "tours_filtered"
+    GUIDEDTOURS_MAIL = "tours_mail"
+    BAGS_MAIL = "bags_mail"
+    BAGS_ARRIVALS = "bags_arrivals"
+    KIND_CHOICES = (
+        (FAHRT_FILTERED, _("Filtered participants of the Fahrt")),
+        (FAHRT_MAIL, _("Recipients of a Fahrt-mail")),
+        (FAHRT_PAYMENTS, _("Changed payments of the Fahrt")),
+        (GUIDEDTOURS_FILTERED, _("Filtered participants of the guided tours")),
+        (GUIDEDTOURS_MAIL, _("Recipients of a guided tours-mail")),
+        (BAGS_MAIL, _("Recipients of a bags-mail")),
+        (BAGS_ARRIVALS, _("Changed arrivals of giveaways")),
+    )
+
+    token = models.CharField(max_length=16, unique=True, default=generate_selection_token, editable=False)
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    # comma-separated ids. For the switch-lists (payments, arrivals) the ids, which were switched on/off
+    ids = models.TextField(blank=True)
+    deselected_ids = models.TextField(blank=True)
+    expires_at = models.DateTimeField(default=selection_expiry, db_index=True)
+
+    def __str__(self) -> str:
+        return f"{self.get_kind_display()} ({self.token})"
+
+    @classmethod
+    def store(
+        cls,
+        request: HttpRequest,
+        kind: str,
+        ids: Iterable[Any],
+        deselected_ids: Iterable[Any] = (),
+    ) -> "Selection":
+        return cls.objects.create(
+            owner=request.user,
+            semester=request_semester(request),
+            kind=kind,
+            ids=_encode_ids(ids),
+            deselected_ids=_encode_ids(deselected_ids),
+        )
+
+    @classmethod
+    def from_request(cls, request: HttpRequest, kind: str) -> "Selection":
+        """the selection referenced by the request. Selections of other users, semesters or workflows are hidden"""
+        try:
+            return cls.objects.get(
+                token=request.GET.get(SELECTION_PARAMETER, ""),
+                owner=request.user,
+                semester=request_semester(request),
+                kind=kind,
+                expires_at__gt=timezone.now(),
+            )
+        except cls.DoesNotExist as error:
+            raise Http404(_("The selection does not exist or has expired. Please select again.")) from error
+
+    @classmethod
+    def purge_expired(cls) -> int:
+        deleted, _deleted_per_model = cls.objects.filter(expires_at__lte=timezone.now()).delete()
+        return deleted
+
+    @property
+    def id_list(self) -> list[str]:
+        return _decode_ids(self.ids)
+
+    @property
+    def deselected_id_list(self) -> list[str]:
+        return _decode_ids(self.deselected_ids)
+
+    def url(self, viewname: str, *args: Any) -> str:
+        return f"{reverse(viewname, args=args)}?{urlencode({SELECTION_PARAMETER: self.token})}"
@@ -1 +1,3 @@
 SEMESTER_SESSION_KEY = "semester_session_key"
+# query-parameter referencing a settool_common.models.Selection
+SELECTION_PARAMETER = "selection"
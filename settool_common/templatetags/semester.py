@@ -2,22 +2,19 @@ import datetime
 
 from django import template
 
-from settool_common.models import current_semester
-from settool_common.models import get_semester as get_sem
-from settool_common.models import Semester
+from settool_common.models import current_semester, request_semester, semester_cache
 
 register = template.Library()
 
 
 @register.simple_tag
 def get_available_semesters():
-    return Semester.objects.all()
+    return sorted(semester_cache.semesters().values(), key=lambda semester: (semester.year, semester.semester))
 
 
 @register.simple_tag(takes_context=True)
 def get_semester(context):
-    request = context["request"]
-    return get_sem(request)
+    return request_semester(context["request"]).pk
 
 
 @register.simple_tag
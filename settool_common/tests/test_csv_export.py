@@ -0,0 +1,38 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from settool_common.models import CourseBundle, Mail, Subject
+from settool_common.utils import download_csv
+
+
+class CSVExportTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        for bundle_name in ("Info", "Mathe"):
+            course_bundle = CourseBundle.objects.create(name=bundle_name)
+            for name in ("A", "B", "C"):
+                Subject.objects.create(subject=f"{bundle_name} {name}", course_bundle=course_bundle)
+
+    def test_queryset_is_streamed_with_foreign_key_display(self):
+        subjects = Subject.objects.order_by("subject")
+        response = download_csv(["subject", "course_bundle"], "subjects.csv", subjects)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        with CaptureQueriesContext(connection) as queries:
+            content = b"".join(response.streaming_content).decode()
+        # one query for the display of the course-bundles, one for the rows
+        self.assertEqual(len(queries), 2)
+        lines = content.split("\r\n")
+        self.assertEqual(lines[0], "subject,course_bundle")
+        self.assertEqual(lines[1:-1], [f"{subject.subject},{subject.course_bundle}" for subject in subjects])
+
+    def test_mail_export(self):
+        Mail.objects.create(sender=Mail.SET, subject="Hello, {{vorname}}", text="text", comment="")
+        user = User.objects.create_superuser("admin", "admin@test.de", "password")
+        self.client.force_login(user)
+        response = self.client.get(reverse("export_mail"))
+        self.assertEqual(response.status_code, 200)
+        content = b"".join(response.streaming_content).decode()
+        self.assertIn('settool_common,SET-Team <set@fs.tum.de>,"Hello, {{vorname}}",text,\r\n', content)
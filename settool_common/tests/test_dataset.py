@@ -0,0 +1,65 @@
+from typing import Any
+
+from django.test import TestCase
+from django.utils import timezone
+
+import bags.models as bags_models
+import fahrt.models as fahrt_models
+import settool_common.models as common_models
+import tutors.models as tutor_models
+from settool_common.fixtures.dataset import DatasetGenerator, DatasetSize, semester_has_data
+
+
+class DatasetGeneratorTest(TestCase):
+    def setUp(self) -> None:
+        self.semester = common_models.current_semester()
+        self.size = DatasetSize(subjects=2, participants=5, tours=1, tutors=5, tasks=2, companies=5, giveaway_groups=1)
+
+    def test_semester_with_only_fahrt_settings(self):
+        fahrt_models.Fahrt.objects.create(
+            semester=self.semester,
+            date=timezone.now().date(),
+            open_registration=timezone.now(),
+            close_registration=timezone.now(),
+        )
+        self.assertTrue(semester_has_data(self.semester))
+
+        with self.assertRaises(ValueError):
+            DatasetGenerator(self.size).generate()
+        counts = DatasetGenerator(self.size).generate(replace=True)
+
+        self.assertEqual(counts["fahrt.Participant"], 5)
+        self.assertEqual(fahrt_models.Fahrt.objects.filter(semester=self.semester).count(), 1)
+
+    def test_seed_reproduces_the_dataset(self):
+        def snapshot() -> dict[str, Any]:
+            # the ids of the companies and giveaways are assigned by the database
+            return {
+                "participants": list(
+                    fahrt_models.Participant.objects.order_by("id").values_list(
+                        "id",
+                        "firstname",
+                        "surname",
+                        "subject__subject",
+                        "status",
+                    ),
+                ),
+                "answers": list(
+                    tutor_models.Answer.objects.order_by("tutor", "question").values_list(
+                        "tutor", "question", "answer"
+                    ),
+                ),
+                "assignments": list(
+                    tutor_models.TutorAssignment.objects.order_by("task", "tutor").values_list("task", "tutor")
+                ),
+                "giveaways": sorted(
+                    bags_models.Giveaway.objects.values_list("company__name", "group__name", "item_count", "arrived"),
+                ),
+            }
+
+        DatasetGenerator(self.size, seed=1).generate()
+        first = snapshot()
+        DatasetGenerator(self.size, seed=1).generate(replace=True)
+        self.assertEqual(snapshot(), first)
+        DatasetGenerator(self.size, seed=2).generate(replace=True)
+        self.assertNotEqual(snapshot(), first)
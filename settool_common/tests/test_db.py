@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, connections, OperationalError, transaction
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from fahrt.models import Participant
+from settool_common.db import reporting_database
+
+
+class ReportingDatabaseTest(TransactionTestCase):
+    databases = {"default", settings.REPORTING_DATABASE}
+
+    def test_routing(self):
+        self.assertEqual(Participant.objects.all().db, "default")
+        with reporting_database():
+            self.assertEqual(Participant.objects.all().db, settings.REPORTING_DATABASE)
+            with transaction.atomic():
+                # the reporting connection would not see the uncommitted writes
+                self.assertEqual(Participant.objects.all().db, "default")
+        self.assertEqual(Participant.objects.all().db, "default")
+
+    def test_reporting_is_read_only(self):
+        with connections[settings.REPORTING_DATABASE].cursor() as cursor:
+            with self.assertRaises(OperationalError):
+                cursor.execute("CREATE TABLE read_only_test (id INTEGER)")
+
+    def test_dashboard_reads_from_reporting(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "admin"))
+        with CaptureQueriesContext(connections[settings.REPORTING_DATABASE]) as reporting_queries:
+            response = self.client.get("/fahrt/dashboard/")
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(len(reporting_queries), 0)
+
+
+class SQLitePragmaTest(TransactionTestCase):
+    def test_pragmas(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("the pragmas are specific to SQLite")
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS["busy_timeout"])
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
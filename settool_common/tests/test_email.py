@@ -3,11 +3,13 @@ from datetime import timedelta
 from typing import Any, Optional, Set
 
 from django.core import mail
+from django.core.exceptions import ValidationError
 from django.core.mail import EmailMessage
+from django.core.mail.backends.base import BaseEmailBackend
 from django.db.models import QuerySet
 from django.db.models.query_utils import Q
 from django.template import Context, Template
-from django.test import TestCase
+from django.test import override_settings, TestCase
 from django.utils import timezone
 from django.utils.datetime_safe import date, datetime
 
@@ -20,6 +22,8 @@ from settool_common import cron
 
 
 def serialise_outbox() -> Set[tuple[str, str, str]]:
+    while any(common_models.QueuedMail.deliver_due()):
+        pass
     outbox: list[EmailMessage] = mail.outbox
     res = set()
     for email in outbox:
@@ -348,3 +352,190 @@ class SendEmailNoTemplate(TestCase):
             self.assertTrue(mail_object.send_mail(Context({}), "abc@gmail.com"))
             expected = {(mail_object.subject.strip(), mail_object.text.strip(), mail_object.sender.strip())}
             self.assertEqual(serialise_outbox(), expected)
+
+
+class FailingEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionRefusedError("mailserver is down")
+
+
+@override_settings(MAIL_OUTBOX_BACKGROUND=True)
+class MailOutbox(TestCase):
+    mail_object: common_models.Mail
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.mail_object = common_models.Mail.objects.create(
+            sender=common_models.Mail.SET,
+            subject="Outbox {{ template1 }}",
+            text="abcd",
+        )
+
+    def setUp(self) -> None:
+        mail.outbox.clear()
+
+    def test_send_mail_only_enqueues(self):
+        """check if Mail.send_mail defers the delivery to the outbox"""
+        self.assertTrue(self.mail_object.send_mail({"template1": "1"}, ["a@test.de", "b@test.de"]))
+        self.assertEqual(mail.outbox, [])
+        queued_mail: common_models.QueuedMail = common_models.QueuedMail.objects.get()
+        self.assertEqual(queued_mail.status, common_models.QueuedMail.STATUS_PENDING)
+        self.assertEqual(queued_mail.recipients, ["a@test.de", "b@test.de"])
+
+        self.assertEqual(common_models.QueuedMail.deliver_due(), (1, 0))
+        self.assertEqual(serialise_outbox(), {("Outbox 1", "abcd", common_models.Mail.SET)})
+        queued_mail.refresh_from_db()
+        self.assertEqual(queued_mail.status, common_models.QueuedMail.STATUS_SENT)
+        self.assertEqual(common_models.QueuedMail.deliver_due(), (0, 0))
+
+    def test_batch_size(self):
+        for i in range(5):
+            self.mail_object.send_mail({"template1": i}, "a@test.de")
+        self.assertEqual(common_models.QueuedMail.deliver_due(2), (2, 0))
+        self.assertEqual(common_models.QueuedMail.deliver_due(2), (2, 0))
+        self.assertEqual(common_models.QueuedMail.deliver_due(2), (1, 0))
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_retry_with_backoff(self):
+        """check if failed deliveries are retried with exponential backoff until MAIL_OUTBOX_MAX_ATTEMPTS"""
+        self.mail_object.send_mail({"template1": "1"}, "a@test.de")
+        queued_mail: common_models.QueuedMail = common_models.QueuedMail.objects.get()
+        with override_settings(
+            EMAIL_BACKEND="settool_common.tests.test_email.FailingEmailBackend",
+            MAIL_OUTBOX_MAX_ATTEMPTS=3,
+            MAIL_OUTBOX_RETRY_DELAY=60,
+        ):
+            self.assertEqual(common_models.QueuedMail.deliver_due(), (0, 1))
+            queued_mail.refresh_from_db()
+            self.assertEqual(queued_mail.status, common_models.QueuedMail.STATUS_PENDING)
+            self.assertEqual(queued_mail.attempts, 1)
+            self.assertIn("mailserver is down", queued_mail.last_error)
+            first_delay = queued_mail.next_retry_at - timezone.now()
+            self.assertTrue(timedelta(seconds=50) < first_delay <= timedelta(seconds=60))
+            # not due yet
+            self.assertEqual(common_models.QueuedMail.deliver_due(), (0, 0))
+
+            common_models.QueuedMail.objects.update(next_retry_at=timezone.now())
+            self.assertEqual(common_models.QueuedMail.deliver_due(), (0, 1))
+            queued_mail.refresh_from_db()
+            second_delay = queued_mail.next_retry_at - timezone.now()
+            self.assertTrue(timedelta(seconds=110) < second_delay <= timedelta(seconds=120))
+
+            common_models.QueuedMail.objects.update(next_retry_at=timezone.now())
+            self.assertEqual(common_models.QueuedMail.deliver_due(), (0, 1))
+            queued_mail.refresh_from_db()
+            self.assertEqual(queued_mail.status, common_models.QueuedMail.STATUS_FAILED)
+        self.assertEqual(common_models.QueuedMail.deliver_due(), (0, 0))
+        self.assertEqual(mail.outbox, [])
+
+    def test_attachments(self):
+        self.mail_object.send_mail({}, "a@test.de", [("test.txt", b"content", "text/plain")])
+        common_models.QueuedMail.deliver_due()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].attachments, [("test.txt", "content", "text/plain")])
+        # the attachments are not kept after the delivery
+        self.assertFalse(common_models.QueuedMailAttachment.objects.exists())
+
+    def test_send_mass(self):
+        """check if Mail.send_mass reports the success per recipient and batches the outbox"""
+        contexts_and_recipients: list[tuple[dict[str, Any], str]] = [
+            ({"template1": i}, f"a{i}@test.de") for i in range(5)
+        ]
+        broken_mail = common_models.Mail.objects.create(sender=common_models.Mail.SET, subject="{{ a }}", text="-")
+        broken_mail.subject = "{{ '{{' }} a }}"
+        self.assertEqual(broken_mail.send_mass([({}, "a@test.de")]), [False])
+
+        self.assertEqual(self.mail_object.send_mass(contexts_and_recipients, batch_size=2), [True] * 5)
+        self.assertEqual(common_models.QueuedMail.objects.count(), 5)
+        self.assertEqual(common_models.QueuedMail.deliver_due(), (5, 0))
+        self.assertEqual(
+            serialise_outbox(),
+            {(f"Outbox {i}", "abcd", common_models.Mail.SET) for i in range(5)},
+        )
+
+
+class MailOutboxSynchronous(TestCase):
+    mail_object: common_models.Mail
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.mail_object = common_models.Mail.objects.create(
+            sender=common_models.Mail.SET,
+            subject="Outbox {{ template1 }}",
+            text="abcd",
+        )
+
+    def setUp(self) -> None:
+        mail.outbox.clear()
+
+    def test_send_mail_delivers(self):
+        """check if Mail.send_mail delivers right away without background workers"""
+        self.assertTrue(self.mail_object.send_mail({"template1": "1"}, "a@test.de"))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(common_models.QueuedMail.objects.get().status, common_models.QueuedMail.STATUS_SENT)
+        self.assertEqual(common_models.QueuedMail.deliver_due(), (0, 0))
+
+    @override_settings(EMAIL_BACKEND="settool_common.tests.test_email.FailingEmailBackend")
+    def test_failed_deliveries_are_retried(self):
+        # the mails are retried by the outbox, thus they count as sent
+        self.assertTrue(self.mail_object.send_mail({"template1": 1}, "a@test.de"))
+        self.assertEqual(self.mail_object.send_mass([({"template1": 2}, "a@test.de")]), [True])
+        self.assertEqual(
+            set(common_models.QueuedMail.objects.values_list("status", flat=True)),
+            {common_models.QueuedMail.STATUS_PENDING},
+        )
+
+        with override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend"):
+            common_models.QueuedMail.objects.update(next_retry_at=timezone.now())
+            self.assertEqual(common_models.QueuedMail.deliver_due(), (2, 0))
+        self.assertEqual(len(mail.outbox), 2)
+
+    @override_settings(
+        EMAIL_BACKEND="settool_common.tests.test_email.FailingEmailBackend",
+        MAIL_OUTBOX_MAX_ATTEMPTS=1,
+    )
+    def test_finally_failed_deliveries(self):
+        self.assertFalse(self.mail_object.send_mail({"template1": 1}, "a@test.de"))
+        self.assertEqual(
+            self.mail_object.send_mass([({"template1": 2}, "a@test.de"), ({"template1": 3}, "b@test.de")]),
+            [False, False],
+        )
+
+
+class MailTemplateCache(TestCase):
+    def test_cache_invalidated_on_save(self):
+        """check if edits of a Mail are picked up although its compiled templates are cached"""
+        mail_object = fahrt_models.FahrtMail.objects.create(subject="before {{vorname}}", text="text")
+        self.assertEqual(mail_object.get_mail({"vorname": "A"})[0], "before A")
+        hits = common_models.compile_mail_template.cache_info().hits
+        self.assertEqual(mail_object.get_mail({"vorname": "B"})[0], "before B")
+        self.assertGreater(common_models.compile_mail_template.cache_info().hits, hits)
+
+        mail_object.subject = "after {{vorname}}"
+        mail_object.save()
+        self.assertEqual(mail_object.get_mail({"vorname": "A"})[0], "after A")
+
+    def test_leftover_placeholder_anywhere(self):
+        mail_object = common_models.Mail.objects.create(subject="subject", text="text {{ '{{' }}missing}} text")
+        self.assertFalse(mail_object.send_mail({}, "a@test.de"))
+        self.assertEqual(common_models.QueuedMail.objects.count(), 0)
+
+    def test_placeholder_validation(self):
+        """check if Mail.clean lists unknown placeholders and invalid templates"""
+        valid_mail = fahrt_models.FahrtMail(subject="{{vorname}}", text="{{ participant.id }} {{ frist|date }}")
+        valid_mail.full_clean()
+
+        invalid_mail = fahrt_models.FahrtMail(subject="{{ tutor }}", text="{{ vorname }} {{ task.name }} {% if %}")
+        with self.assertRaises(ValidationError) as context_manager:
+            invalid_mail.full_clean()
+        errors = context_manager.exception.message_dict
+        self.assertEqual(errors["subject"], ["Unknown placeholders: {{tutor}}"])
+        self.assertIn("Invalid template", errors["text"][0])
+
+        invalid_mail.text = "{% for tour in tours %}{{ tour }}{% endfor %} {{ task.name }}"
+        with self.assertRaises(ValidationError) as context_manager:
+            invalid_mail.full_clean()
+        self.assertEqual(context_manager.exception.message_dict["text"], ["Unknown placeholders: {{task}}"])
+
+        # conditional placeholders are allowed
+        tutor_models.TutorMail(subject="{{ tutor }}", text="{{ task }} {{ activation_url }}").full_clean()
@@ -1,5 +1,16 @@
+import datetime
+import os
+import shutil
+import tempfile
+import time
 import unittest
+from typing import Optional
+from unittest import mock
 
+from django.test import override_settings
+from django_tex.core import render_template_with_context
+
+from settool_common import tex
 from settool_common.templatetags import latex
 
 
@@ -23,3 +34,111 @@ class LatexAuxTest(unittest.TestCase):
         ]
         for input_str, replacement_str in replacements:
             self.assertEqual(replacement_str, latex.latex_escape(input_str))
+
+
+class PDFCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(PDF_CACHE_DIR=self.cache_dir, PDF_CACHE_MAX_SIZE=1024)
+        self.settings_override.enable()
+        self.compiled_sources: list[str] = []
+        self.run_tex_patch = mock.patch("settool_common.tex.run_tex", side_effect=self._fake_run_tex)
+        self.run_tex_patch.start()
+
+    def tearDown(self) -> None:
+        self.run_tex_patch.stop()
+        self.settings_override.disable()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def _fake_run_tex(self, source: str, template_name: Optional[str] = None) -> bytes:
+        _ = template_name
+        self.compiled_sources.append(source)
+        return f"%PDF {source}".encode().ljust(400, b" ")
+
+    def test_repeated_compile_is_cached(self):
+        first = tex.compile_source_to_pdf("source a")
+        self.assertEqual(tex.compile_source_to_pdf("source a"), first)
+        self.assertEqual(self.compiled_sources, ["source a"])
+        tex.compile_source_to_pdf("source b")
+        self.assertEqual(self.compiled_sources, ["source a", "source b"])
+
+    def test_key_depends_on_assets_and_date(self):
+        with tempfile.NamedTemporaryFile(suffix=".pdf") as asset:
+            source = f"\\includegraphics[width=2.3cm]{{{asset.name}}}"
+            key = tex.pdf_cache_key(source)
+            self.assertEqual(tex.pdf_cache_key(source), key)
+            asset.write(b"changed logo")
+            asset.flush()
+            self.assertNotEqual(tex.pdf_cache_key(source), key)
+
+        with mock.patch("settool_common.tex.datetime") as mocked_datetime:
+            mocked_datetime.date.today.return_value = datetime.date(2020, 1, 1)
+            key = tex.pdf_cache_key("Stand: \\today")
+            mocked_datetime.date.today.return_value = datetime.date(2020, 1, 2)
+            self.assertNotEqual(tex.pdf_cache_key("Stand: \\today"), key)
+
+    def test_size_bounded_eviction(self):
+        for source in ("a", "b", "c"):
+            tex.compile_source_to_pdf(source)
+            time.sleep(0.01)  # the eviction is ordered by mtime
+        # 3*400 bytes do not fit into 1024 bytes => the least recently used pdf is evicted
+        tex.compile_source_to_pdf("a")
+        self.assertEqual(self.compiled_sources, ["a", "b", "c", "a"])
+        tex.compile_source_to_pdf("c")
+        self.assertEqual(self.compiled_sources, ["a", "b", "c", "a"])
+
+    @override_settings(PDF_CACHE_MAX_SIZE=10 * 1024)
+    def test_cache_is_not_scanned_on_every_miss(self):
+        with mock.patch("settool_common.tex.os.walk", wraps=os.walk) as walk:
+            for source in ("a", "b", "c", "d"):
+                tex.compile_source_to_pdf(source)
+            # the estimate of the cache size is initialised once
+            self.assertEqual(walk.call_count, 1)
+            with override_settings(PDF_CACHE_SCAN_INTERVAL=2):
+                for source in ("e", "f", "g"):
+                    tex.compile_source_to_pdf(source)
+            self.assertEqual(walk.call_count, 2)
+
+
+class PreambleFormatTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.format_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            LATEX_FORMAT_DIR=self.format_dir,
+            LATEX_PRECOMPILED_PREAMBLE=True,
+            # records the preamble instead of dumping a real format
+            LATEX_FORMAT_BUILD_COMMAND="cp {source} {name}.fmt",
+        )
+        self.settings_override.enable()
+
+    def tearDown(self) -> None:
+        self.settings_override.disable()
+        shutil.rmtree(self.format_dir, ignore_errors=True)
+
+    def test_format_is_built_once_per_preamble(self):
+        source = f"\\documentclass{{article}}\n{tex.PREAMBLE_END_MARKER}\n\\begin{{document}}a\\end{{document}}"
+        format_path = tex.get_preamble_format(source)
+        self.assertIsNotNone(format_path)
+        with open(f"{format_path}.fmt", encoding="utf-8") as file:
+            self.assertTrue(file.read().startswith("\\documentclass{article}\n"))
+        mtime = os.stat(f"{format_path}.fmt").st_mtime_ns
+
+        # only the preamble is part of the key
+        self.assertEqual(tex.get_preamble_format(source.replace("a\\end", "b\\end")), format_path)
+        self.assertEqual(os.stat(f"{format_path}.fmt").st_mtime_ns, mtime)
+        # changing the preamble regenerates the format
+        changed_format_path = tex.get_preamble_format(f"\\usepackage{{array}}\n{source}")
+        self.assertNotEqual(changed_format_path, format_path)
+        self.assertTrue(os.path.isfile(f"{changed_format_path}.fmt"))
+
+    def test_fallback(self):
+        self.assertIsNone(tex.get_preamble_format("\\documentclass{article}\\begin{document}\\end{document}"))
+        with override_settings(LATEX_FORMAT_BUILD_COMMAND="exit 1"):
+            self.assertIsNone(tex.get_preamble_format(f"\\documentclass{{book}}\n{tex.PREAMBLE_END_MARKER}"))
+        with override_settings(LATEX_PRECOMPILED_PREAMBLE=False):
+            self.assertIsNone(tex.get_preamble_format(f"\\documentclass{{article}}\n{tex.PREAMBLE_END_MARKER}"))
+
+    def test_base_template_has_marker(self):
+        source = render_template_with_context("tutors/tex/tshirts.tex", {})
+        self.assertIn(tex.PREAMBLE_END_MARKER, source)
+        self.assertNotIn("{%", source[: source.index(tex.PREAMBLE_END_MARKER)])
@@ -0,0 +1,40 @@
+from django.contrib.auth.models import User
+from django.test import override_settings, TestCase
+
+from settool_common.cron import mail_outbox_cronjob
+from tutors.models import TutorMail
+
+
+class MetricsTest(TestCase):
+    @override_settings(METRICS_TOKEN="secret", MAIL_OUTBOX_BACKGROUND=True)
+    def test_metrics(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "admin"))
+        self.client.get("/fahrt/dashboard/")
+        mail = TutorMail.objects.create(subject="Hello", text="Hello {{tutor}}")
+        mail.send_mail({"tutor": "Anna"}, "a@example.com")
+        mail.send_mass([({"tutor": "Ben"}, "b@example.com")])
+        broken_mail = TutorMail.objects.create(subject="Hello", text="Hello {{ '{{' }}tutor}}")
+        broken_mail.send_mass([({}, "c@example.com")])
+        mail_outbox_cronjob()
+
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+        for sample in (
+            'settool_request_duration_seconds_count{method="GET",view="fahrt:dashboard"}',
+            'settool_request_db_queries_count{view="fahrt:dashboard"}',
+            'settool_mail_render_failures_total{mail="TutorMail"}',
+            f'settool_mail_delivery_duration_seconds_count{{sender="{mail.sender}"}}',
+            f'settool_mail_deliveries_total{{result="sent",sender="{mail.sender}"}}',
+            'settool_cron_duration_seconds_count{job="mail_outbox_cronjob"}',
+            'settool_cron_last_success_timestamp_seconds{job="mail_outbox_cronjob"}',
+        ):
+            self.assertContains(response, sample)
+
+    def test_token(self):
+        # without a configured token the metrics are not exposed
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        with self.settings(METRICS_TOKEN="secret"):
+            self.assertEqual(self.client.get("/metrics").status_code, 403)
+            self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer wrong").status_code, 403)
+            self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer sécret").status_code, 403)
+            self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret").status_code, 200)
@@ -0,0 +1,49 @@
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+
+class ProfilingMiddlewareTest(TestCase):
+    def setUp(self) -> None:
+        profile_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(profile_dir.cleanup)
+        self.profile_dir = profile_dir.name
+        settings_override = self.settings(PROFILE_DIR=self.profile_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_superuser_gets_the_report(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "admin"))
+        for response in (
+            self.client.get("/fahrt/dashboard/", {"profile": 1}),
+            self.client.get("/fahrt/dashboard/", {"profile": "True"}),
+            self.client.get("/fahrt/dashboard/", HTTP_X_PROFILE="1"),
+        ):
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["Content-Type"], "text/plain; charset=utf-8")
+            self.assertContains(response, "queries in")
+            self.assertContains(response, "cumulative")
+        stored = os.listdir(self.profile_dir)
+        self.assertTrue(any(name.endswith(".prof") for name in stored))
+        self.assertTrue(any(name.endswith(".sql") for name in stored))
+
+    def test_profiling_has_to_be_enabled(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "admin"))
+        for response in (
+            self.client.get("/fahrt/dashboard/", {"profile": ""}),
+            self.client.get("/fahrt/dashboard/", {"profile": 0}),
+            self.client.get("/fahrt/dashboard/", {"profile": "false"}),
+            self.client.get("/fahrt/dashboard/", HTTP_X_PROFILE="0"),
+        ):
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response["Content-Type"], "text/plain; charset=utf-8")
+        self.assertEqual(os.listdir(self.profile_dir), [])
+
+    def test_other_users_get_the_page(self):
+        user = User.objects.create_user("staff", "staff@example.com", "staff", is_staff=True)
+        self.client.force_login(user)
+        response = self.client.get("/", {"profile": 1})
+        self.assertNotEqual(response.get("Content-Type"), "text/plain; charset=utf-8")
+        self.assertEqual(os.listdir(self.profile_dir), [])
@@ -0,0 +1,108 @@
+from typing import Any, Callable
+
+from django.contrib.auth.models import User
+from django.test import override_settings, TestCase
+from django.urls import reverse
+
+import fahrt.models as fahrt_models
+import guidedtours.models as guidedtours_models
+import settool_common.models as common_models
+import tutors.models as tutor_models
+from settool_common.fixtures.dataset import DatasetGenerator, DatasetSize
+from settool_common.instrumentation import record_queries
+from settool_common.settings import SEMESTER_SESSION_KEY
+
+# maximum number of queries per view, including the session and the user
+QUERY_BUDGETS: dict[str, int] = {
+    "fahrt:dashboard": 10,
+    "fahrt:list_registered": 6,
+    "fahrt:list_confirmed": 10,
+    "fahrt:list_waitinglist": 6,
+    "fahrt:list_cancelled": 6,
+    "fahrt:filter": 6,
+    "tutors:dashboard": 12,
+    "tutors:list_status_all": 7,
+    "tutors:list_status_active": 7,
+    "tutors:list_status_accepted": 7,
+    "tutors:list_task": 6,
+    "tutors:list_event": 6,
+    "bags:dashboard": 35,
+    "bags:list_companys": 7,
+    "guidedtours:dashboard": 6,
+    "guidedtours:list_tours": 6,
+    "guidedtours:filter_participants": 6,
+    "guidedtours:signup": 12,
+    "tutors:batch_accept": 18,
+    "tutors:view_task": 14,
+    "fahrt:view_participant": 10,
+}
+
+# arguments of the views in QUERY_BUDGETS, which have any, resolved from the generated dataset of the semester
+URL_ARGUMENTS: dict[str, Callable[[common_models.Semester], list[Any]]] = {
+    "tutors:view_task": lambda semester: [tutor_models.Task.objects.filter(semester=semester).order_by("id")[0].pk],
+    "fahrt:view_participant": lambda semester: [
+        fahrt_models.Participant.objects.filter(semester=semester).order_by("id")[0].pk,
+    ],
+}
+
+
+def budget_url(url_name: str, semester: common_models.Semester) -> str:
+    return reverse(url_name, args=URL_ARGUMENTS[url_name](semester) if url_name in URL_ARGUMENTS else [])
+
+
+def dataset_size(scale: int) -> DatasetSize:
+    return DatasetSize(
+        subjects=3,
+        participants=4 * scale,
+        tours=scale,
+        tour_participants=scale,
+        tutors=4 * scale,
+        questions=2,
+        events=2,
+        tasks=scale,
+        tutors_per_task=scale,
+        companies=4 * scale,
+        giveaway_groups=2,
+        giveaways=2,
+    )
+
+
+@override_settings(DEBUG=True)
+class QueryBudgetTest(TestCase):
+    """The number of queries of a view must not depend on the size of the semester (N+1 queries)."""
+
+    semester: common_models.Semester
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.semester = common_models.current_semester()
+        cls.user = User.objects.create_superuser("admin", "admin@test.de", "password")
+        # otherwise the first request of guidedtours:signup creates them
+        guidedtours_models.Setting.objects.create(semester=cls.semester)
+
+    def setUp(self) -> None:
+        self.client.force_login(self.user)
+        session = self.client.session
+        session[SEMESTER_SESSION_KEY] = self.semester.pk
+        session.save()
+
+    def query_counts(self) -> dict[str, int]:
+        counts = {}
+        for url_name in QUERY_BUDGETS:
+            url = budget_url(url_name, self.semester)
+            with record_queries() as stats:
+                response: Any = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url_name)
+            self.assertEqual(response["X-DB-Query-Count"], str(stats.count), url_name)
+            counts[url_name] = stats.count
+        return counts
+
+    def test_query_budgets(self):
+        DatasetGenerator(dataset_size(scale=8)).generate()
+        small_counts = self.query_counts()
+        DatasetGenerator(dataset_size(scale=32)).generate(replace=True)
+        large_counts = self.query_counts()
+        for url_name, budget in QUERY_BUDGETS.items():
+            with self.subTest(url_name):
+                self.assertLessEqual(large_counts[url_name], budget)
+                self.assertEqual(small_counts[url_name], large_counts[url_name])
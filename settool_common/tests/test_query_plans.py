@@ -0,0 +1,97 @@
+import re
+from typing import Any, Callable
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+import fahrt.models
+import guidedtours.models
+import settool_common.models as common_models
+import tutors.models
+from settool_common.fixtures.dataset import DatasetGenerator
+from settool_common.settings import SEMESTER_SESSION_KEY
+from settool_common.tests.test_query_budget import budget_url, dataset_size, QUERY_BUDGETS
+
+# tables which grow with every semester. Small tables (semesters, subjects, mails, ...) may be scanned.
+HOT_TABLES = (
+    "fahrt_participant",
+    "tutors_tutor",
+    "tutors_task",
+    "tutors_mailtutortask",
+    "guidedtours_tour",
+    "guidedtours_participant",
+)
+FULL_SCAN_REGEX = re.compile(rf"^SCAN ({'|'.join(HOT_TABLES)})(?: AS \w+)?$")
+
+# the hot filters and the composite index, which has to serve them
+INDEX_PLAN: dict[str, Callable[[common_models.Semester], QuerySet]] = {
+    "fahrt_part_semester_status_idx": lambda semester: fahrt.models.Participant.objects.filter(
+        semester=semester,
+        status="confirmed",
+    ),
+    "tutors_tutor_sem_status_idx": lambda semester: tutors.models.Tutor.objects.filter(
+        semester=semester,
+        status=tutors.models.Tutor.STATUS_ACCEPTED,
+    ),
+    "guidedtours_tour_sem_date_idx": lambda semester: guidedtours.models.Tour.objects.filter(
+        semester=semester,
+        date__gt=timezone.now(),
+    ).order_by("date"),
+    "tutors_task_semester_begin_idx": lambda semester: tutors.models.Task.objects.filter(semester=semester).order_by(
+        "begin",
+    ),
+    "guidedtours_part_tour_time_idx": lambda semester: guidedtours.models.Participant.objects.filter(
+        tour=guidedtours.models.Tour.objects.filter(semester=semester).first(),
+    ).order_by("time"),
+    "tutors_mailtask_task_tutor_idx": lambda semester: tutors.models.MailTutorTask.objects.filter(
+        task=tutors.models.Task.objects.filter(semester=semester).first(),
+        tutor=tutors.models.Tutor.objects.filter(semester=semester).first(),
+    ),
+}
+
+
+class QueryPlanTest(TestCase):
+    """
+    The queries of the main views must use an index instead of scanning the large tables.
+    The hot filters must be served by their composite index.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.semester = common_models.current_semester()
+        cls.user = User.objects.create_superuser("admin", "admin@test.de", "password")
+        DatasetGenerator(dataset_size(scale=8)).generate()
+
+    def setUp(self) -> None:
+        if connection.vendor != "sqlite":
+            self.skipTest("EXPLAIN QUERY PLAN is specific to SQLite")
+        self.client.force_login(self.user)
+        session = self.client.session
+        session[SEMESTER_SESSION_KEY] = self.semester.pk
+        session.save()
+
+    def full_scans(self, sql: str) -> list[str]:
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            return [detail for _id, _parent, _unused, detail in cursor.fetchall() if FULL_SCAN_REGEX.match(detail)]
+
+    def test_no_full_table_scans(self):
+        for url_name in QUERY_BUDGETS:
+            url = budget_url(url_name, self.semester)
+            with CaptureQueriesContext(connection) as queries:
+                response: Any = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url_name)
+            for query in queries.captured_queries:
+                if not query["sql"].startswith("SELECT"):
+                    continue
+                with self.subTest(url_name, sql=query["sql"]):
+                    self.assertEqual(self.full_scans(query["sql"]), [])
+
+    def test_index_plan(self):
+        for index, queryset in INDEX_PLAN.items():
+            with self.subTest(index):
+                self.assertIn(index, queryset(self.semester).explain())
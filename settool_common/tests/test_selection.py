@@ -0,0 +1,69 @@
+from datetime import timedelta
+from uuid import uuid4
+
+from django.contrib.auth.models import User
+from django.http import Http404
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+import settool_common.models as common_models
+from settool_common.cron import selection_cronjob
+
+
+class SelectionTest(TestCase):
+    def setUp(self) -> None:
+        self.semester = common_models.current_semester()
+        self.user = User.objects.create_superuser("admin", "admin@test.de", "admin")
+        self.other_user = User.objects.create_superuser("other", "other@test.de", "other")
+
+    def _request(self, user: User, token: str = ""):
+        request = RequestFactory().get("/", {"selection": token})
+        request.user = user
+        request.semester = self.semester
+        return request
+
+    def test_ids_are_stored_compactly(self):
+        ids = [uuid4() for _i in range(3)]
+        selection = common_models.Selection.store(
+            self._request(self.user),
+            common_models.Selection.FAHRT_PAYMENTS,
+            ids,
+            deselected_ids=[],
+        )
+
+        self.assertEqual(selection.ids, ",".join(participant_id.hex for participant_id in ids))
+        self.assertEqual(selection.id_list, [participant_id.hex for participant_id in ids])
+        self.assertEqual(selection.deselected_id_list, [])
+        self.assertEqual(selection.url("fahrt:finanz_confirm"), f"/fahrt/finanz/confirm/?selection={selection.token}")
+
+    def test_from_request(self):
+        selection = common_models.Selection.store(self._request(self.user), common_models.Selection.BAGS_MAIL, [1, 2])
+
+        found = common_models.Selection.from_request(
+            self._request(self.user, selection.token),
+            common_models.Selection.BAGS_MAIL,
+        )
+
+        self.assertEqual(found, selection)
+        for request, kind in (
+            (self._request(self.other_user, selection.token), common_models.Selection.BAGS_MAIL),
+            (self._request(self.user, selection.token), common_models.Selection.BAGS_ARRIVALS),
+            (self._request(self.user, "unknown"), common_models.Selection.BAGS_MAIL),
+        ):
+            with self.subTest(user=request.user, kind=kind), self.assertRaises(Http404):
+                common_models.Selection.from_request(request, kind)
+
+    def test_expired_selections_are_purged(self):
+        expired = common_models.Selection.store(self._request(self.user), common_models.Selection.BAGS_MAIL, [1])
+        expired.expires_at = timezone.now() - timedelta(minutes=1)
+        expired.save()
+        active = common_models.Selection.store(self._request(self.user), common_models.Selection.BAGS_MAIL, [2])
+
+        with self.assertRaises(Http404):
+            common_models.Selection.from_request(
+                self._request(self.user, expired.token),
+                common_models.Selection.BAGS_MAIL,
+            )
+        selection_cronjob()
+
+        self.assertEqual(list(common_models.Selection.objects.all()), [active])
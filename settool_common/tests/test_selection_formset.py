@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+
+from django import forms
+from django.forms import formset_factory
+from django.test import SimpleTestCase
+
+from settool_common.forms import SelectionFormSet
+
+
+class SelectForm(forms.Form):
+    id = forms.IntegerField()
+    selected = forms.BooleanField(required=False)
+
+
+SelectFormSet = formset_factory(SelectForm, formset=SelectionFormSet, extra=0)
+
+
+def _data(selection: dict[int, bool]) -> dict[str, str]:
+    data = {"form-TOTAL_FORMS": str(len(selection)), "form-INITIAL_FORMS": str(len(selection))}
+    for i, (row_id, selected) in enumerate(selection.items()):
+        data[f"form-{i}-id"] = str(row_id)
+        if selected:
+            data[f"form-{i}-selected"] = "on"
+    return data
+
+
+class SelectionFormSetTest(SimpleTestCase):
+    def setUp(self) -> None:
+        self.rows = [SimpleNamespace(id=row_id, active=row_id % 2 == 0) for row_id in range(1000)]
+
+    def test_rows_and_forms(self):
+        formset = SelectFormSet(rows=self.rows)
+
+        pairs = formset.rows_and_forms()
+
+        self.assertEqual(len(pairs), 1000)
+        for row, form in pairs:
+            self.assertEqual(form.initial, {"id": row.id, "selected": True})
+
+    def test_stale_post_with_removed_rows(self):
+        # the page was loaded with two rows more, than there are now
+        formset = SelectFormSet(_data({row.id: True for row in self.rows} | {5000: True, 5001: False}), rows=self.rows)
+
+        pairs = formset.rows_and_forms()
+
+        self.assertEqual(len(pairs), 1000)
+        self.assertEqual([row.id for row, _form in pairs], [row.id for row in self.rows])
+        self.assertTrue(formset.is_valid())
+        self.assertEqual(formset.selected_ids(), [row.id for row in self.rows])
+
+    def test_selected_ids(self):
+        # ids, which are not in the rows, cannot be selected
+        formset = SelectFormSet(_data({1: True, 2: False, 3: True, 5000: True}), rows=self.rows)
+
+        self.assertTrue(formset.is_valid())
+        self.assertEqual(formset.selected_ids(), [1, 3])
+
+    def test_changed_ids(self):
+        formset = SelectFormSet(
+            _data({1: True, 2: False, 3: False, 4: True}),
+            rows=self.rows,
+            selected=lambda row: row.active,
+        )
+
+        self.assertTrue(formset.is_valid())
+        self.assertEqual(formset.changed_ids(), ([1], [2]))
@@ -0,0 +1,83 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+import fahrt.models as fahrt_models
+from settool_common.middleware import SemesterMiddleware
+from settool_common.models import current_semester, request_semester, Semester, semester_cache
+from settool_common.settings import SEMESTER_SESSION_KEY
+
+
+class SemesterCacheTest(TestCase):
+    def setUp(self) -> None:
+        semester_cache.invalidate()
+        self.addCleanup(semester_cache.invalidate)
+
+    def _fill_cache(self) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            semester_cache.semesters()
+
+    def test_cache_hit(self):
+        semester = current_semester()
+        self._fill_cache()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(current_semester(), semester)
+            self.assertEqual(set(semester_cache.semesters()), {semester.pk})
+        self.assertEqual(len(queries), 0)
+
+    def test_uncommitted_semesters_are_not_cached(self):
+        semester_cache.semesters()
+        with CaptureQueriesContext(connection) as queries:
+            semester_cache.semesters()
+        self.assertEqual(len(queries), 1)
+
+    def test_invalidation(self):
+        self._fill_cache()
+        created = Semester.objects.create(semester=Semester.WINTER, year=1999)
+        self.assertIn(created.pk, semester_cache.semesters())
+        self._fill_cache()
+        created.delete()
+        self.assertNotIn(created.pk, semester_cache.semesters())
+
+    def test_related_objects_are_not_shared(self):
+        semester = current_semester()
+        self._fill_cache()
+        cached = semester_cache.get(semester.pk)
+        with self.assertRaises(fahrt_models.Fahrt.DoesNotExist):
+            _ = cached.fahrt
+
+        self.assertIsNot(semester_cache.get(semester.pk), cached)
+        fahrt = fahrt_models.Fahrt.objects.create(
+            semester=semester,
+            date=date.today(),
+            open_registration=timezone.now(),
+            close_registration=timezone.now(),
+        )
+        self._fill_cache()
+        self.assertEqual(semester_cache.get(semester.pk).fahrt, fahrt)
+
+    def test_middleware(self):
+        semester = Semester.objects.create(semester=Semester.WINTER, year=1999)
+        self._fill_cache()
+        request = RequestFactory().get("/")
+        request.session = {SEMESTER_SESSION_KEY: semester.pk}
+        request.user = User()
+
+        def view(request):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(request_semester(request), semester)
+                self.assertEqual(request.semester.year, 1999)
+            self.assertEqual(len(queries), 0)
+
+        SemesterMiddleware(view)(request)
+
+    def test_unknown_semester(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@test.de", "password"))
+        session = self.client.session
+        session[SEMESTER_SESSION_KEY] = 4242
+        session.save()
+        self.assertEqual(self.client.get("/fahrt/dashboard/").status_code, 404)
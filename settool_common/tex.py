@@ -0,0 +1,232 @@
+"""
+Drop-in replacements for django_tex's render_to_pdf/compile_template_to_pdf with a content-addressed cache.
+
+Compiled PDFs are stored in PDF_CACHE_DIR, keyed by a hash of the rendered .tex source, the interpreter and the
+versions of the included graphics and PDFs.
+The least recently used PDFs are evicted once PDF_CACHE_MAX_SIZE is exceeded. To not scan the whole directory on every
+miss, each process keeps a running estimate of the size of the cache, which is re-synchronised with the directory every
+PDF_CACHE_SCAN_INTERVAL stores (the other processes write into the cache as well).
+
+The preamble of templates/tex/base.tex (everything before PREAMBLE_END_MARKER) is dumped into a precompiled format
+(see mylatexformat), which is reused by every compile. Formats are keyed by the hash of the preamble, thus they are
+regenerated automatically, if base.tex changes.
+"""
+import datetime
+import functools
+import hashlib
+import os
+import re
+import shutil
+import subprocess  # nosec: all commands are configured in the settings
+import tempfile
+import threading
+from typing import Any, Optional
+
+from django.conf import settings
+from django_tex.core import render_template_with_context, run_tex, run_tex_in_directory
+from django_tex.response import PDFResponse
+
+from settool_common import metrics
+
+INCLUDED_FILE_REGEX = re.compile(r"\\(?:includegraphics|includepdf)(?:\[[^\]]*\])?\s*\{\s*([^}]+?)\s*\}")
+PREAMBLE_END_MARKER = "\\csname endofdump\\endcsname"
+
+
+def _asset_versions(source: str) -> list[str]:
+    versions = []
+    for path in sorted(set(INCLUDED_FILE_REGEX.findall(source))):
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            versions.append(f"{path}:{stat.st_mtime_ns}:{stat.st_size}")
+    return versions
+
+
+def pdf_cache_key(source: str) -> str:
+    key_parts = [
+        settings.LATEX_INTERPRETER,
+        getattr(settings, "LATEX_INTERPRETER_OPTIONS", ""),
+        source,
+        *_asset_versions(source),
+    ]
+    if "\\today" in source:
+        # the date is rendered by latex and not part of the source
+        key_parts.append(datetime.date.today().isoformat())
+    digest = hashlib.sha256()
+    for part in key_parts:
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _cache_path(key: str) -> str:
+    return os.path.join(settings.PDF_CACHE_DIR, key[:2], f"{key}.pdf")
+
+
+def _read_cached_pdf(path: str) -> Optional[bytes]:
+    try:
+        with open(path, "rb") as file:
+            pdf = file.read()
+        os.utime(path)  # the mtime is used for the LRU-eviction
+    except FileNotFoundError:
+        return None
+    return pdf
+
+
+def _store_pdf(path: str, pdf: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # write and rename, so that concurrent workers never read a partially written pdf
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix=".tmp", delete=False) as file:
+        file.write(pdf)
+    os.replace(file.name, path)
+
+
+_cache_size_lock = threading.Lock()
+# PDF_CACHE_DIR -> (estimated size in bytes, stores since the directory was scanned)
+_cache_size_estimates: dict[str, tuple[int, int]] = {}
+
+
+def _scan_pdf_cache() -> list[tuple[float, int, str]]:
+    """(mtime, size, path) of every cached PDF"""
+    cached_files: list[tuple[float, int, str]] = []
+    for directory, _subdirectories, filenames in os.walk(settings.PDF_CACHE_DIR):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue  # evicted by another worker
+            cached_files.append((stat.st_mtime, stat.st_size, path))
+    return cached_files
+
+
+def _track_stored_pdf(size: int) -> int:
+    """adds a stored PDF to the running estimate of the cache size. Returns the estimated size"""
+    with _cache_size_lock:
+        estimate, stores = _cache_size_estimates.get(settings.PDF_CACHE_DIR, (0, settings.PDF_CACHE_SCAN_INTERVAL))
+        if stores >= settings.PDF_CACHE_SCAN_INTERVAL:
+            estimate, stores = sum(size for _mtime, size, _path in _scan_pdf_cache()), 0
+        else:
+            estimate, stores = estimate + size, stores + 1
+        _cache_size_estimates[settings.PDF_CACHE_DIR] = (estimate, stores)
+    return estimate
+
+
+def evict_pdf_cache(max_size: Optional[int] = None) -> int:
+    """Deletes the least recently used PDFs until the cache is smaller than max_size. Returns the freed bytes."""
+    max_size = settings.PDF_CACHE_MAX_SIZE if max_size is None else max_size
+    cached_files = _scan_pdf_cache()
+    total_size = sum(size for _mtime, size, _path in cached_files)
+    freed = 0
+    for _mtime, size, path in sorted(cached_files):
+        if total_size - freed <= max_size:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        freed += size
+    with _cache_size_lock:
+        _cache_size_estimates[settings.PDF_CACHE_DIR] = (total_size - freed, 0)
+    return freed
+
+
+def clear_pdf_cache() -> None:
+    shutil.rmtree(settings.PDF_CACHE_DIR, ignore_errors=True)
+    with _cache_size_lock:
+        _cache_size_estimates.pop(settings.PDF_CACHE_DIR, None)
+
+
+@functools.lru_cache(maxsize=None)
+def _tex_engine_version() -> str:
+    try:
+        result = subprocess.run(  # nosec: constant command
+            ["pdftex", "--version"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+    return result.stdout.decode(errors="replace").split("\n", maxsplit=1)[0]
+
+
+# formats, that could not be built in this process. We do not retry them on every compile.
+_BROKEN_FORMATS: set[str] = set()
+
+
+def build_preamble_format(preamble: str, format_path: str) -> None:
+    """dumps the preamble into format_path.fmt. Raises OSError/CalledProcessError, if this is not possible"""
+    name = os.path.basename(format_path)
+    with tempfile.TemporaryDirectory() as tempdir:
+        with open(os.path.join(tempdir, "preamble.tex"), "w", encoding="utf-8") as file:
+            file.write(f"{preamble}\n\\begin{{document}}\\end{{document}}\n")
+        subprocess.run(  # nosec: the command is configured in the settings
+            settings.LATEX_FORMAT_BUILD_COMMAND.format(name=name, source="preamble.tex"),
+            shell=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=True,
+            cwd=tempdir,
+        )
+        os.makedirs(settings.LATEX_FORMAT_DIR, exist_ok=True)
+        # copy and rename, so that concurrent workers never load a partially written format
+        with tempfile.NamedTemporaryFile(dir=settings.LATEX_FORMAT_DIR, suffix=".tmp", delete=False) as file:
+            with open(os.path.join(tempdir, f"{name}.fmt"), "rb") as built_format:
+                shutil.copyfileobj(built_format, file)
+        os.replace(file.name, f"{format_path}.fmt")
+
+
+def get_preamble_format(source: str) -> Optional[str]:
+    """path (without the .fmt-suffix) of the precompiled format matching the preamble of source, if available"""
+    if not settings.LATEX_PRECOMPILED_PREAMBLE or PREAMBLE_END_MARKER not in source:
+        return None
+    preamble = source[: source.index(PREAMBLE_END_MARKER)]
+    preamble_hash = hashlib.sha256(f"{_tex_engine_version()}\0{preamble}".encode()).hexdigest()
+    format_path = os.path.join(settings.LATEX_FORMAT_DIR, f"settool-{preamble_hash[:16]}")
+    if os.path.isfile(f"{format_path}.fmt"):
+        return format_path
+    if format_path in _BROKEN_FORMATS:
+        return None
+    try:
+        build_preamble_format(preamble, format_path)
+    except (OSError, subprocess.CalledProcessError):
+        _BROKEN_FORMATS.add(format_path)
+        return None
+    return format_path
+
+
+def run_tex_with_format(source: str, format_path: str, template_name: Optional[str] = None) -> bytes:
+    name = os.path.basename(format_path)
+    with tempfile.TemporaryDirectory() as tempdir:
+        # the engine looks up formats in the working directory and loads the one named in the first line
+        os.symlink(f"{format_path}.fmt", os.path.join(tempdir, f"{name}.fmt"))
+        return run_tex_in_directory(f"%&{name}\n{source}", tempdir, template_name=template_name)
+
+
+def compile_source_to_pdf_uncached(source: str, template_name: Optional[str] = None) -> bytes:
+    format_path = get_preamble_format(source)
+    if format_path is None:
+        return run_tex(source, template_name=template_name)
+    return run_tex_with_format(source, format_path, template_name=template_name)
+
+
+def compile_source_to_pdf(source: str, template_name: Optional[str] = None) -> bytes:
+    path = _cache_path(pdf_cache_key(source))
+    pdf = _read_cached_pdf(path)
+    if pdf is None:
+        with metrics.LATEX_COMPILE_DURATION.labels(template_name or "<source>").time():
+            pdf = compile_source_to_pdf_uncached(source, template_name=template_name)
+        _store_pdf(path, pdf)
+        if _track_stored_pdf(len(pdf)) > settings.PDF_CACHE_MAX_SIZE:
+            evict_pdf_cache()
+    return pdf
+
+
+def compile_template_to_pdf(template_name: str, context: Optional[dict[str, Any]]) -> bytes:
+    source = render_template_with_context(template_name, context)
+    return compile_source_to_pdf(source, template_name=template_name)
+
+
+def render_to_pdf(request: Any, template_name: str, context=None, filename=None) -> PDFResponse:
+    _ = request  # only included to make the signature conform to django's render function
+    return PDFResponse(compile_template_to_pdf(template_name, context), filename=filename)
@@ -1,31 +1,77 @@
 import csv
 import os
-from typing import Any, Union
+from typing import Any, Iterable, Iterator, Union
 
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
+from django.core.files.storage import FileSystemStorage
 from django.db.models import QuerySet
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
+from django.utils.deconstruct import deconstructible
+
+
+class _Echo:
+    """file-like object, which returns the written value instead of buffering it"""
+
+    @staticmethod
+    def write(value: str) -> str:
+        return value
+
+
+def _queryset_rows(fields: list[str], queryset: QuerySet[Any], chunk_size: int) -> Iterator[list[Any]]:
+    """
+    Rows of the queryset, fetched via values_list in chunks.
+    Foreign keys are exported by their str-representation, which is resolved once per related object.
+    """
+    columns: list[str] = []
+    displays: dict[int, dict[Any, str]] = {}
+    for index, field in enumerate(fields):
+        model_field = queryset.model._meta.get_field(field)
+        if model_field.many_to_one:
+            related_objects = (
+                model_field.related_model.objects.using(queryset.db)
+                .select_related()
+                .filter(
+                    pk__in=queryset.values(model_field.attname),
+                )
+            )
+            displays[index] = {related.pk: str(related) for related in related_objects}
+            columns.append(model_field.attname)
+        else:
+            columns.append(field)
+
+    for values in queryset.values_list(*columns).iterator(chunk_size=chunk_size):
+        row = list(values)
+        for index, display in displays.items():
+            row[index] = display.get(row[index], "")
+        yield row
 
 
 def download_csv(
     fields: list[str],
     dest: str,
-    context: Union[QuerySet[Any], dict[Any, Any], list[Any]],
-) -> HttpResponse:
-    response = HttpResponse(content_type="text/csv")
-    response["Content-Disposition"] = f"inline; filename={os.path.basename(dest)}"
-    writer = csv.writer(response, dialect=csv.excel)
-    writer.writerow(fields)
-
-    for obj in context:
-        row = []
-        for field in fields:
-            if hasattr(obj, field):
-                row.append(getattr(obj, field))
-            else:
-                row.append(obj[field])
-        writer.writerow(row)
+    context: Union[QuerySet[Any], Iterable[dict[str, Any]]],
+    chunk_size: int = 2000,
+) -> StreamingHttpResponse:
+    """
+    Streams the fields of context as csv-file.
+    context is either a queryset (fields have to be model-fields) or an iterable of dicts.
+    """
+    if isinstance(context, QuerySet):
+        # the rows are fetched while the response is streamed. The database is pinned now, as e.g.
+        # settool_common.db.reporting_database() is only active while the view is called
+        rows: Iterable[list[Any]] = _queryset_rows(fields, context.using(context.db), chunk_size)
+    else:
+        rows = ([obj[field] for field in fields] for obj in context)
+    writer = csv.writer(_Echo(), dialect=csv.excel)
 
+    def content() -> Iterator[str]:
+        yield writer.writerow(fields)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(content(), content_type="text/csv")
+    response["Content-Disposition"] = f"inline; filename={os.path.basename(dest)}"
     return response
 
 
@@ -53,3 +99,16 @@ def get_or_none(klass, *args, **kwargs):
         return klass.objects.get(*args, **kwargs)
     except klass.DoesNotExist:
         return None
+
+
+@deconstructible
+class PrivateStorage(FileSystemStorage):
+    """storage in PRIVATE_MEDIA_ROOT. Its files are not served, but only returned by permission-checked views"""
+
+    @property  # type: ignore[override]
+    def base_location(self) -> str:
+        return settings.PRIVATE_MEDIA_ROOT
+
+    @property  # type: ignore[override]
+    def location(self) -> str:
+        return os.path.abspath(self.base_location)
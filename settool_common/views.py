@@ -1,19 +1,22 @@
 import csv
+import hmac
 import os
 import time
 from dataclasses import dataclass
-from typing import Any, Optional, Union
+from typing import Any, Iterator, Optional
 
 from dateutil.relativedelta import relativedelta
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, permission_required, user_passes_test
 from django.core.handlers.wsgi import WSGIRequest
 from django.db.models import Count, QuerySet
 from django.forms import forms
-from django.http import Http404, HttpResponse, HttpResponseRedirect
+from django.http import Http404, HttpResponse, HttpResponseForbidden, HttpResponseRedirect, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils.http import url_has_allowed_host_and_scheme
 from django.utils.translation import gettext as _
+from prometheus_client import CONTENT_TYPE_LATEST
 
 import bags
 import fahrt
@@ -22,9 +25,10 @@ import tutors
 from bags.models import BagMail
 from fahrt.models import FahrtMail
 from guidedtours.models import TourMail
-from settool_common import utils
+from settool_common import metrics, utils
+from settool_common.db import reporting_database
 from settool_common.forms import CourseBundleForm, MailForm, QRCodeForm, SubjectForm
-from settool_common.models import AnonymisationLog, CourseBundle, get_semester, Mail, QRCode, Semester, Subject
+from settool_common.models import AnonymisationLog, CourseBundle, Mail, QRCode, request_semester, Semester, Subject
 from tutors.models import TutorMail
 
 from .forms import CSVFileUploadForm
@@ -186,8 +190,9 @@ def repr_rdelta(delta: relativedelta) -> str:
 
 
 @permission_required("set.mail")
+@reporting_database()
 def dashboard(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     mail_templates_by_sender = (
         Mail.objects.values("sender").annotate(sender_count=Count("sender")).order_by("-sender_count")
     )
@@ -282,7 +287,7 @@ def import_mail(request: WSGIRequest) -> HttpResponse:
 
 
 @permission_required("set.mail")
-def export_mail(request: WSGIRequest) -> HttpResponse:
+def export_mail(request: WSGIRequest) -> StreamingHttpResponse:
     mail_klass_lut = {
         "bags": BagMail,
         "fahrt": FahrtMail,
@@ -290,22 +295,15 @@ def export_mail(request: WSGIRequest) -> HttpResponse:
         "settool_common": Mail,
         "tutors": TutorMail,
     }
-    mails: list[dict[str, str]] = []
-    for source, klass in mail_klass_lut.items():
-        mails += [_clean_mail(mail, source) for mail in klass.objects.all()]
-
-    filename = f"emails_{time.strftime('%Y%m%d-%H%M')}.csv"
-    return utils.download_csv(["source", "sender", "subject", "text", "comment"], filename, mails)
+    fields = ["sender", "subject", "text", "comment"]
 
+    def mails() -> Iterator[dict[str, str]]:
+        for source, klass in mail_klass_lut.items():
+            for mail in klass.objects.values(*fields).iterator():
+                yield {"source": source, **{field: value or "" for field, value in mail.items()}}
 
-def _clean_mail(mail: Union[BagMail, FahrtMail, TourMail, Mail, TutorMail], source: str) -> dict[str, str]:
-    return {
-        "source": source,
-        "sender": mail.sender or "",
-        "subject": mail.subject or "",
-        "text": mail.text or "",
-        "comment": mail.comment or "",
-    }
+    filename = f"emails_{time.strftime('%Y%m%d-%H%M')}.csv"
+    return utils.download_csv(["source", *fields], filename, mails())
 
 
 @permission_required("set.mail")
@@ -413,3 +411,14 @@ def del_subject(request: WSGIRequest, subject_pk: int) -> HttpResponse:
 def login_failed(request: WSGIRequest) -> HttpResponse:
     messages.error(request, _("You are not allowed to login to the application."))
     return redirect("main-view")
+
+
+def export_metrics(request: WSGIRequest) -> HttpResponse:
+    """the prometheus-metrics. METRICS_TOKEN has to be sent as bearer-token, without it the metrics are not exposed"""
+    # compare_digest only accepts ASCII-strings, a header may contain any character
+    if not settings.METRICS_TOKEN or not hmac.compare_digest(
+        request.headers.get("Authorization", "").encode(),
+        f"Bearer {settings.METRICS_TOKEN}".encode(),
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(metrics.render_metrics(), content_type=CONTENT_TYPE_LATEST)
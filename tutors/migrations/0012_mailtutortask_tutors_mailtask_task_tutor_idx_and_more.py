@@ -0,0 +1,25 @@
+# Generated by Django 4.1.13 on 2026-10-18 14:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tutors", "0011_alter_event_id_alter_question_id_alter_task_id_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="mailtutortask",
+            index=models.Index(fields=["task", "tutor"], name="tutors_mailtask_task_tutor_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(fields=["semester", "begin"], name="tutors_task_semester_begin_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="tutor",
+            index=models.Index(fields=["semester", "status"], name="tutors_tutor_sem_status_idx"),
+        ),
+    ]
@@ -28,32 +28,34 @@ class TutorMail(common_models.Mail):
         self.sender = common_models.Mail.SET_TUTOR
         super().save(*args, **kwargs)
 
+    @staticmethod
+    def tutor_context(tutor, task=None):
+        context = {"tutor": tutor}
+        if task is not None:
+            context["task"] = task
+        return context
+
     def send_mail_tutor(self, tutor):
-        context = {
-            "tutor": tutor,
-        }
-        return self.send_mail(context, tutor.email)
+        return self.send_mail(self.tutor_context(tutor), tutor.email)
 
     def send_mail_registration(self, tutor, activation_url):
         context = {
-            "tutor": tutor,
+            **self.tutor_context(tutor),
             "activation_url": activation_url,
         }
         return self.send_mail(context, tutor.email)
 
+    def send_mass_tutors(self, tutors):
+        return self.send_mass((self.tutor_context(tutor), tutor.email) for tutor in tutors)
+
     def send_mail_task(self, tutor, task):
-        context = {
-            "tutor": tutor,
-            "task": task,
-        }
-        return self.send_mail(context, tutor.email)
+        return self.send_mail(self.tutor_context(tutor, task), tutor.email)
+
+    def send_mass_task(self, tutors, task):
+        return self.send_mass((self.tutor_context(tutor, task), tutor.email) for tutor in tutors)
 
     def get_mail_task(self, tutor, task):
-        context = {
-            "tutor": tutor,
-            "task": task,
-        }
-        return self.get_mail(context)
+        return self.get_mail(self.tutor_context(tutor, task))
 
 
 class Settings(common_models.LoggedModelBase):
@@ -131,6 +133,7 @@ class Settings(common_models.LoggedModelBase):
 class Tutor(common_models.UUIDModelBase, common_models.LoggedModelBase, common_models.SemesterModelBase):
     class Meta:
         unique_together = ("semester", "email")
+        indexes = [models.Index(fields=["semester", "status"], name="tutors_tutor_sem_status_idx")]
 
     first_name = models.CharField(_("First name"), max_length=30)
     last_name = models.CharField(_("Last name"), max_length=50)
@@ -221,6 +224,9 @@ class Event(common_models.UUIDModelBase, common_models.LoggedModelBase, common_m
 
 
 class Task(common_models.UUIDModelBase, common_models.LoggedModelBase, common_models.SemesterModelBase):
+    class Meta:
+        indexes = [models.Index(fields=["semester", "begin"], name="tutors_task_semester_begin_idx")]
+
     name = models.CharField(_("Task name"), max_length=250)
     description = models.TextField(_("Description"), blank=True)
     begin = models.DateTimeField(_("Begin"))
@@ -293,6 +299,9 @@ class Answer(common_models.LoggedModelBase):
 
 
 class MailTutorTask(common_models.LoggedModelBase):
+    class Meta:
+        indexes = [models.Index(fields=["task", "tutor"], name="tutors_mailtask_task_tutor_idx")]
+
     mail = models.ForeignKey(TutorMail, on_delete=models.CASCADE)
     tutor = models.ForeignKey(Tutor, on_delete=models.CASCADE)
     task = models.ForeignKey(Task, on_delete=models.CASCADE, blank=True, null=True)
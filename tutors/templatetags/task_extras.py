@@ -5,11 +5,6 @@ from tutors.models import MailTutorTask, Tutor
 register = template.Library()
 
 
-@register.filter
-def in_task(requirement, task_requirements):
-    return requirement.filter(question__id__in=task_requirements.values("id"))
-
-
 @register.simple_tag
 def mail_task_count(task):
     return (
@@ -31,8 +26,3 @@ def times(number):
 @register.filter
 def subtract(value, arg):
     return value - arg
-
-
-@register.filter
-def are_accepted(tutorset):
-    return tutorset.filter(status=Tutor.STATUS_ACCEPTED)
@@ -56,7 +56,7 @@ class TutorExportTest(django.test.TestCase):
         )
         res: HttpResponse = self.client.get("/tutors/tutor/export/csv/")
         self.assertEqual("text/csv", res.get("content-type"))
-        content = res.content
+        content = b"".join(res.streaming_content)
         self.assertGreater(len(content), len(self.csv_header))
         content = str(content.strip(self.csv_header), "utf-8").split("\r\n")
         for i, expected_tutor in enumerate(expected_tutors):
@@ -69,7 +69,7 @@ class TutorExportTest(django.test.TestCase):
     def test_csv_tutor_export_no_data(self):
         res: HttpResponse = self.client.get(f"/tutors/tutor/export/csv/{Tutor.STATUS_INACTIVE}/")
         self.assertEqual("text/csv", res.get("content-type"))
-        self.assertEqual(self.csv_header, res.content)
+        self.assertEqual(self.csv_header, b"".join(res.streaming_content))
 
     def test_csv_tutor_export_filtering_declined(self):
         expected_tutors = Tutor.objects.filter(
@@ -81,7 +81,7 @@ class TutorExportTest(django.test.TestCase):
         )
         res: HttpResponse = self.client.get(f"/tutors/tutor/export/csv/{Tutor.STATUS_DECLINED}/")
         self.assertEqual("text/csv", res.get("content-type"))
-        content = res.content
+        content = b"".join(res.streaming_content)
         self.assertGreater(len(content), len(self.csv_header))
         content = str(content.strip(self.csv_header), "utf-8").split("\r\n")
         for i, expected_tutor in enumerate(expected_tutors):
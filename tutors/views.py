@@ -7,9 +7,9 @@ from django.contrib import messages
 from django.contrib.auth.decorators import permission_required
 from django.core.handlers.wsgi import WSGIRequest
 from django.db import IntegrityError
-from django.db.models import Count, Q, QuerySet
+from django.db.models import Count, Exists, OuterRef, Prefetch, Q, QuerySet, Subquery
 from django.forms import forms, modelformset_factory
-from django.http import Http404, HttpResponse, HttpResponseRedirect
+from django.http import Http404, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.template import Context, Template
 from django.urls import reverse
@@ -19,10 +19,11 @@ from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 from django.utils.safestring import mark_safe
 from django.utils.translation import gettext as _
 from django_tex.response import PDFResponse
-from django_tex.shortcuts import render_to_pdf
 
 from settool_common import utils
-from settool_common.models import get_semester, Semester, Subject
+from settool_common.db import reporting_database
+from settool_common.models import request_semester, Semester, Subject
+from settool_common.tex import render_to_pdf
 from tutors.forms import (
     AnswerForm,
     CollaboratorForm,
@@ -46,13 +47,14 @@ from tutors.models import (
     SubjectTutorCountAssignment,
     Task,
     Tutor,
+    TutorAssignment,
     TutorMail,
 )
 from tutors.tokens import account_activation_token
 
 
 def tutor_signup(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     settings = get_object_or_404(Settings, semester=semester)
 
     if not settings.registration_open:
@@ -134,7 +136,7 @@ def save_answer_formset(answer_formset, tutor_id):
 
 
 def collaborator_signup(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     settings = get_object_or_404(Settings, semester=semester)
 
     if not settings.registration_open:
@@ -244,12 +246,31 @@ def tutor_signup_confirm(request: WSGIRequest, uidb64: Any, token: Any) -> HttpR
 
 @permission_required("tutors.edit_tutors")
 def list_participants(request: WSGIRequest, status: str) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
 
     if status == "all":
         tutors = Tutor.objects.filter(semester=semester)
     else:
         tutors = Tutor.objects.filter(semester=semester, status=status)
+    accepted_in_subject = (
+        Tutor.objects.filter(semester=semester, subject=OuterRef("subject"), status=Tutor.STATUS_ACCEPTED)
+        .values("subject")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    wanted_in_subject = SubjectTutorCountAssignment.objects.filter(
+        semester=semester,
+        subject=OuterRef("subject"),
+    ).values("wanted")[:1]
+    tutors = (
+        tutors.select_related("subject__course_bundle")
+        .prefetch_related("answer_set")
+        .annotate(
+            subject_accepted=Subquery(accepted_in_subject),
+            subject_wanted=Subquery(wanted_in_subject),
+            task_count=Count("task", distinct=True),
+        )
+    )
     return render(
         request,
         "tutors/tutor/list.html",
@@ -297,7 +318,7 @@ def del_tutor(request: WSGIRequest, uid: UUID) -> HttpResponse:
 
 @permission_required("tutors.edit_tutors")
 def edit_tutor(request: WSGIRequest, uid: UUID) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     tutor: Tutor = get_object_or_404(Tutor, pk=uid)
 
     question_count = Question.objects.filter(semester=semester).count()
@@ -380,7 +401,7 @@ def edit_event(request: WSGIRequest, uid: UUID) -> HttpResponse:
 
 @permission_required("tutors.edit_tutors")
 def list_event(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     events = Event.objects.filter(semester=semester).order_by("begin")
     return render(request, "tutors/event/list.html", {"events": events})
 
@@ -404,7 +425,7 @@ def del_event(request: WSGIRequest, uid: UUID) -> HttpResponse:
 
 @permission_required("tutors.edit_tutors")
 def add_event(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
 
     form = EventAdminForm(request.POST or None, semester=semester)
     if form.is_valid():
@@ -450,10 +471,25 @@ def edit_task(request: WSGIRequest, uid: UUID) -> HttpResponse:
 
 @permission_required("tutors.edit_tutors")
 def list_task(request: WSGIRequest) -> HttpResponse:
-    tasks = Task.objects.filter(semester=get_semester(request)).order_by("begin")
+    tasks = Task.objects.filter(semester=request_semester(request)).select_related("event").order_by("begin")
+    tasks = tasks.annotate(
+        tutor_count=Count("tutors", distinct=True),
+        missing_mails=Subquery(_missing_mails(OuterRef("pk"))),
+    )
     return render(request, "tutors/task/list.html", {"tasks": tasks})
 
 
+def _missing_mails(task: Any) -> QuerySet[TutorAssignment]:
+    """number of the assigned tutors of task, who did not get the mail for it yet"""
+    return (
+        TutorAssignment.objects.filter(task=task)
+        .exclude(Exists(MailTutorTask.objects.filter(task=OuterRef("task"), tutor=OuterRef("tutor"))))
+        .values("task")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+
+
 @permission_required("tutors.edit_tutors")
 def del_task(request: WSGIRequest, uid: UUID) -> HttpResponse:
     task = get_object_or_404(Task, pk=uid)
@@ -473,7 +509,7 @@ def del_task(request: WSGIRequest, uid: UUID) -> HttpResponse:
 
 @permission_required("tutors.edit_tutors")
 def add_task(request: WSGIRequest, eid: Optional[UUID] = None) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
 
     form = TaskAdminForm(request.POST or None, semester=semester, initial={"event": eid})
     if form.is_valid():
@@ -491,8 +527,11 @@ def add_task(request: WSGIRequest, eid: Optional[UUID] = None) -> HttpResponse:
 
 
 def view_task(request: WSGIRequest, uid: UUID) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
-    task = get_object_or_404(Task, pk=uid)
+    semester: Semester = request_semester(request)
+    task = get_object_or_404(
+        Task.objects.select_related("event").prefetch_related("allowed_subjects", "requirements"),
+        pk=uid,
+    )
 
     if not request.user.has_perm("tutors.edit_tutors"):
         return render(request, "tutors/task/view.html", {"task": task})
@@ -515,18 +554,32 @@ def view_task(request: WSGIRequest, uid: UUID) -> HttpResponse:
         .exclude(id__in=parallel_task_tutors.values("id"))
         .order_by("last_name")
     )
+    # the task count and the answers to the requirements of the task are loaded with the tutors
+    task_answers = Prefetch(
+        "answer_set",
+        queryset=Answer.objects.filter(question__in=task.requirements.all()),
+        to_attr="task_answers",
+    )
     context = {
         "task": task,
-        "assigned_tutors": assigned_tutors,
-        "unassigned_tutors": unassigned_tutors,
+        "assigned_tutors": _with_task_details(assigned_tutors, task_answers),
+        "unassigned_tutors": _with_task_details(unassigned_tutors, task_answers),
         "assignment_form": form,
     }
     return render(request, "tutors/task/view.html", context)
 
 
+def _with_task_details(tutors: QuerySet[Tutor], task_answers: Prefetch) -> QuerySet[Tutor]:
+    return (
+        tutors.select_related("subject__course_bundle")
+        .prefetch_related(task_answers)
+        .annotate(task_count=Count("task", distinct=True))
+    )
+
+
 @permission_required("tutors.edit_tutors")
 def list_requirements(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     questions = Question.objects.filter(semester=semester)
     return render(request, "tutors/requirement/list.html", {"requirements": questions})
 
@@ -539,7 +592,7 @@ def view_requirement(request: WSGIRequest, uid: UUID) -> HttpResponse:
 
 @permission_required("tutors.edit_tutors")
 def add_requirement(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
 
     form = RequirementAdminForm(request.POST or None, semester=semester)
     if form.is_valid():
@@ -597,7 +650,7 @@ def del_requirement(request: WSGIRequest, uid: UUID) -> HttpResponse:
 
 @permission_required("tutors.edit_tutors")
 def task_mail(request: WSGIRequest, uid: UUID, mail_pk: Optional[int] = None) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     settings = get_object_or_404(Settings, semester=semester)
     task = get_object_or_404(Task, pk=uid)
 
@@ -621,8 +674,9 @@ def task_mail(request: WSGIRequest, uid: UUID, mail_pk: Optional[int] = None) ->
         tutors = form.cleaned_data["tutors"]
         mail_template: TutorMail = form.cleaned_data["mail_template"]
 
-        for tutor in tutors:
-            if mail_template.send_mail_task(tutor, task):
+        tutors = list(tutors)
+        for tutor, success in zip(tutors, mail_template.send_mass_task(tutors, task)):
+            if success:
                 MailTutorTask.objects.create(tutor=tutor, mail=mail_template, task=task)
                 task.log(request.user, f"Send mail to {tutor}.")
             else:
@@ -649,8 +703,9 @@ def task_mail(request: WSGIRequest, uid: UUID, mail_pk: Optional[int] = None) ->
 
 
 @permission_required("tutors.edit_tutors")
-def export(request: WSGIRequest, file_type: str, status: str = "all") -> Union[HttpResponse, PDFResponse]:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+@reporting_database()
+def export(request: WSGIRequest, file_type: str, status: str = "all") -> Union[StreamingHttpResponse, PDFResponse]:
+    semester: Semester = request_semester(request)
 
     if status == "all":
         tutors = Tutor.objects.filter(semester=semester)
@@ -666,7 +721,7 @@ def export(request: WSGIRequest, file_type: str, status: str = "all") -> Union[H
         return utils.download_csv(
             ["last_name", "first_name", "subject", "matriculation_number", "birthday"],
             f"{filename}.csv",
-            list(tutors),
+            tutors,
         )
     if file_type == "tshirt":
         return render_to_pdf(request, "tutors/tex/tshirts.tex", {"tutors": tutors}, f"{filename}.pdf")
@@ -675,6 +730,7 @@ def export(request: WSGIRequest, file_type: str, status: str = "all") -> Union[H
 
 
 @permission_required("tutors.edit_tutors")
+@reporting_database()
 def export_task(request: WSGIRequest, file_type: str, uid: UUID) -> PDFResponse:
     task = get_object_or_404(Task, pk=uid)
     tutors = task.tutors.order_by("last_name", "first_name")
@@ -687,7 +743,7 @@ def export_task(request: WSGIRequest, file_type: str, uid: UUID) -> PDFResponse:
 
 @permission_required("tutors.edit_tutors")
 def general_settings(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     all_tutor_settings = Settings.objects.filter(semester=semester)
     if all_tutor_settings.count() == 0:
         settings = None
@@ -716,7 +772,7 @@ def general_settings(request: WSGIRequest) -> HttpResponse:
 
 @permission_required("tutors.edit_tutors")
 def tutor_settings(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
 
     subject_count = Subject.objects.all().count()
     subjects_existing = SubjectTutorCountAssignment.objects.filter(semester=semester)
@@ -778,7 +834,7 @@ def send_mail(
     mail_pk: Optional[int] = None,
     uid: Optional[UUID] = None,
 ) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     settings = get_object_or_404(Settings, semester=semester)
     template = default_tutor_mail(settings, status, mail_pk)
 
@@ -849,8 +905,8 @@ def send_email_to_all_tutors(
     tutors: list[Tutor],
     request: WSGIRequest,
 ) -> None:
-    for tutor in tutors:
-        if mail_template.send_mail_tutor(tutor):
+    for tutor, success in zip(tutors, mail_template.send_mass_tutors(tutors)):
+        if success:
             MailTutorTask.objects.create(tutor=tutor, mail=mail_template, task=None)
             tutor.log(request.user, f"Send mail to {tutor}.")
         else:
@@ -1057,7 +1113,7 @@ def batch_decline(request: WSGIRequest) -> HttpResponse:
 def _gather_batch_parameters(
     request: WSGIRequest,
 ) -> tuple[Semester, QuerySet[Tutor], dict[int, int], QuerySet[SubjectTutorCountAssignment], bool]:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
     # tutor specific parameters
     all_tutors: QuerySet[Tutor] = Tutor.objects.filter(semester=semester)
     tutors_active: QuerySet[Tutor] = all_tutors.filter(status=Tutor.STATUS_ACTIVE)
@@ -1084,20 +1140,22 @@ def _gather_batch_parameters(
 
 
 @permission_required("tutors.edit_tutors")
+@reporting_database()
 def dashboard(request: WSGIRequest) -> HttpResponse:
-    semester: Semester = get_object_or_404(Semester, pk=get_semester(request))
+    semester: Semester = request_semester(request)
 
     assignments_wish_counter: QuerySet[SubjectTutorCountAssignment]
     assignments_wish_counter = SubjectTutorCountAssignment.objects.filter(semester=semester)
+    accepted_per_subject: dict[int, int] = dict(
+        Tutor.objects.filter(semester=semester, status=Tutor.STATUS_ACCEPTED)
+        .values_list("subject")
+        .annotate(total=Count("id"))
+        .order_by(),
+    )
     count_results = {}
-    for assignment_wish_counter in assignments_wish_counter:
-        counts_tutors: dict[str, int] = Tutor.objects.filter(
-            semester=semester,
-            subject=assignment_wish_counter.subject,
-            status=Tutor.STATUS_ACCEPTED,
-        ).aggregate(total=Count("subject"))
+    for assignment_wish_counter in assignments_wish_counter.select_related("subject__course_bundle"):
         count_results[assignment_wish_counter.subject] = (
-            counts_tutors["total"] or 0,
+            accepted_per_subject.get(assignment_wish_counter.subject_id, 0),
             assignment_wish_counter.wanted,
         )
 
@@ -1112,13 +1170,11 @@ def dashboard(request: WSGIRequest) -> HttpResponse:
         .order_by("begin")[:5]
     )
 
-    missing_mails = 0
-    for task in Task.objects.filter(semester=semester):
-        missing_mails += (
-            Tutor.objects.filter(task=task)
-            .exclude(id__in=MailTutorTask.objects.filter(task=task).values("tutor_id"))
-            .count()
-        )
+    missing_mails = (
+        TutorAssignment.objects.filter(task__semester=semester)
+        .exclude(Exists(MailTutorTask.objects.filter(task=OuterRef("task"), tutor=OuterRef("tutor"))))
+        .count()
+    )
 
     accepted_tutors = Tutor.objects.filter(semester=semester, status=Tutor.STATUS_ACCEPTED).count()
     waiting_tutors = Tutor.objects.filter(semester=semester, status=Tutor.STATUS_ACTIVE).count()